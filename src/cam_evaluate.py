@@ -22,11 +22,6 @@ def main(args):
     )
     out_file = os.path.join(exp_dir, "cam_results.csv")
 
-    if os.path.exists(out_file):
-        results = pd.read_csv(out_file)
-        print(results)
-        return results
-
     data = model_utils.load_data(
         model_config,
         iso_code=args.iso_code,
@@ -36,6 +31,18 @@ def main(args):
     filepaths = data_utils.get_image_filepaths(
         model_config, data[(data["dataset"] == "test") & (data["class"] == "school")]
     )
+
+    # Reuse the CAM results if the model and data have not changed
+    key = cam_utils.get_cam_results_key(
+        args.iso_code, model_config, filepaths, float(args.percentile)
+    )
+    cache_file = os.path.join(exp_dir, f"cam_results_{key}.csv")
+    if os.path.exists(cache_file):
+        results = pd.read_csv(cache_file)
+        results.to_csv(out_file, index=False)
+        print(results)
+        return results
+
     cam_scores_all, cam_scores_mean = cam_utils.compare_cams(
         args.iso_code,
         model_config,
@@ -43,12 +50,15 @@ def main(args):
         float(args.percentile),
         metrics=True,
         show=False,
+        n_workers=int(args.n_workers),
     )
     results = pd.DataFrame(cam_scores_mean, index=["score"]).T
 
     results = results.reset_index()
     results.columns = ["method", "score"]
+    results.to_csv(cache_file, index=False)
     results.to_csv(out_file, index=False)
+    return results
 
 
 if __name__ == "__main__":
@@ -58,6 +68,7 @@ if __name__ == "__main__":
         "--config", default="configs/config.yaml", help="ISO 3166-1 alpha-3 code"
     )
     parser.add_argument("--percentile", help="Percentile", default=90)
+    parser.add_argument("--n_workers", help="Parallel processes (CPU only)", default=1)
     args = parser.parse_args()
 
     main(args)
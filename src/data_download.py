@@ -4,6 +4,7 @@ import geopandas as gpd
 import argparse
 
 from utils import download_utils
+from utils import data_utils
 from utils import config_utils
 
 import warnings
@@ -30,12 +31,21 @@ def main(config, profile, in_file):
     download_utils.download_buildings(config, source="ms", verbose=True)
     logging.info("Downloading Google Open Buildings...")
     download_utils.download_buildings(config, source="google", verbose=True)
+    logging.info("Building building centroid indexes...")
+    for iso_code in config["iso_codes"]:
+        for source in ["ms", "google"]:
+            data_utils.build_building_index(iso_code, config, source=source)
 
     logging.info("Downloading GHSL BUILT-C...")
     download_utils.download_ghsl(config, type="built_c")
     logging.info("Downloading GHSL SMOD...")
     download_utils.download_ghsl(config, type="smod")
 
+    logging.info("Setting up summed-area tables of the building rasters...")
+    for iso_code in config["iso_codes"]:
+        for source in ["ms", "google", "ghsl"]:
+            data_utils.build_integral_image(iso_code, config, source=source)
+
 
 if __name__ == "__main__":
     # Load arguments from parser
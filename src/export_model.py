@@ -0,0 +1,81 @@
+import os
+import logging
+import argparse
+import pandas as pd
+
+from utils import config_utils
+from utils import model_utils
+from utils import pred_utils
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main(args):
+    config = config_utils.load_config(os.path.join(os.getcwd(), args.config))
+    if args.project:
+        config["project"] = args.project
+
+    # Export the given model, or all models of the ensemble
+    if args.model_config:
+        model_configs = [model_utils.load_model_config(args.model_config, config)]
+    else:
+        model_configs = model_utils.get_ensemble_configs(args.iso_code, config)
+
+    reports = []
+    for model_config in model_configs:
+        logging.info(f"Exporting {model_config['config_name']} ({args.format})...")
+        if args.format == "checkpoint":
+            pred_utils.export_checkpoint(args.iso_code, model_config)
+            if args.benchmark:
+                report = pred_utils.benchmark_model_loading(args.iso_code, model_config)
+                reports.append(pd.DataFrame([report]))
+        elif args.format == "int8":
+            pred_utils.quantize_model(args.iso_code, model_config)
+            if args.benchmark:
+                report = pred_utils.evaluate_quantized_model(
+                    args.iso_code,
+                    model_config,
+                    n_samples=args.n_samples and int(args.n_samples),
+                )
+                reports.append(pd.DataFrame([report]))
+        else:
+            pred_utils.export_graph(args.iso_code, model_config, backend=args.format)
+            if args.benchmark:
+                report = pred_utils.benchmark_backend(
+                    args.iso_code,
+                    model_config,
+                    backend=args.format,
+                    n_samples=args.n_samples and int(args.n_samples),
+                )
+                reports.append(report)
+
+    if args.benchmark:
+        reports = pd.concat(reports, ignore_index=True)
+        print(reports)
+        return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Model Export")
+    parser.add_argument("--iso_code", help="ISO 3166-1 alpha-3 code")
+    parser.add_argument(
+        "--config", default="configs/config.yaml", help="Main config file"
+    )
+    parser.add_argument(
+        "--model_config", help="Model config file (default: ensemble)", default=None
+    )
+    parser.add_argument("--project", help="Overwrite project name", default=None)
+    parser.add_argument(
+        "--format",
+        help="Export format (checkpoint, onnx, torchscript, int8)",
+        default="checkpoint",
+    )
+    parser.add_argument(
+        "--benchmark", help="Benchmark the exported models", action="store_true"
+    )
+    parser.add_argument(
+        "--n_samples", help="Number of val images for parity checks", default=None
+    )
+    args = parser.parse_args()
+
+    main(args)
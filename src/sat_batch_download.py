@@ -25,6 +25,7 @@ def main(args):
         args.buffer_size,
         args.sum_threshold,
         args.adm_level,
+        mosaic=args.mosaic,
     )
 
 
@@ -45,6 +46,9 @@ if __name__ == "__main__":
     parser.add_argument(
         "--spacing", default=150, help="Sliding window spacing (default 150)"
     )
+    parser.add_argument(
+        "--mosaic", action="store_true", help="Download images as mosaics"
+    )
     args = parser.parse_args()
 
     # Download satellite images
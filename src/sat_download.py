@@ -4,8 +4,12 @@ import argparse
 import subprocess
 
 from tqdm import tqdm
+import numpy as np
 import pandas as pd
 import geopandas as gpd
+import rasterio as rio
+from rasterio.io import MemoryFile
+from pyproj import Transformer
 from owslib.wms import WebMapService
 
 from utils import data_utils
@@ -29,6 +33,7 @@ def download_sat_images(
     filename: str = None,
     out_dir: str = None,
     download_validated: bool = True,
+    mosaic: bool = False,
 ) -> None:
     """
     Download satellite images based on provided configurations and credentials.
@@ -64,6 +69,8 @@ def download_sat_images(
         filename (str, optional): Filename for reading the data. Defaults to None.
         out_dir (str, optional): Output directory for saving images. Defaults to None.
         download_validated (bool, optional): Whether to download validated images. Defaults to False.
+        mosaic (bool, optional): If True, downloads neighbouring images as one mosaic per block
+            and crops them locally (see `download_sat_mosaics`). Defaults to False.
 
     Returns:
         None
@@ -121,6 +128,13 @@ def download_sat_images(
     url = f"{config['digitalglobe_url']}connectid={creds['connect_id']}"
     wms = WebMapService(url, username=creds["username"], password=creds["password"])
 
+    # Download overlapping images as mosaics
+    if mosaic:
+        download_sat_mosaics(
+            wms, config, data, out_dir, src_crs=src_crs, target_crs=target_crs
+        )
+        return
+
     # Download images with progress bar
     bar_format = "{l_bar}{bar:20}{r_bar}{bar:-20b}"
     for index in tqdm(range(len(data)), bar_format=bar_format):
@@ -178,6 +192,252 @@ def download_sat_images(
                 pass
 
 
+def get_tile_bounds(
+    data: gpd.GeoDataFrame,
+    size: float,
+    src_crs: str = "EPSG:4326",
+    target_crs: str = "EPSG:3857",
+) -> np.ndarray:
+    """
+    Compute the request bounding box of each image in the WMS coordinate reference system.
+
+    Args:
+        data (gpd.GeoDataFrame): GeoDataFrame with 'lon' and 'lat' columns in target_crs.
+        size (float): Half-width of each image in target_crs units.
+        src_crs (str, optional): CRS of the WMS request. Defaults to "EPSG:4326".
+        target_crs (str, optional): CRS of the 'lon' and 'lat' columns. Defaults to "EPSG:3857".
+
+    Returns:
+        np.ndarray: Array of shape (n, 4) with the (minx, miny, maxx, maxy) of each image.
+    """
+    transformer = Transformer.from_crs(target_crs, src_crs, always_xy=True)
+    minx, miny = transformer.transform(data.lon.values - size, data.lat.values - size)
+    maxx, maxy = transformer.transform(data.lon.values + size, data.lat.values + size)
+    return np.stack([minx, miny, maxx, maxy], axis=1)
+
+
+def download_sat_tile(
+    wms: WebMapService,
+    config: dict,
+    bbox: tuple,
+    image_file: str,
+    src_crs: str = "EPSG:4326",
+) -> None:
+    """
+    Download a single satellite image from the WMS, retrying until it is saved.
+
+    Args:
+        wms (WebMapService): Web Map Service connection.
+        config (dict): Configuration dictionary containing the image width and height
+            and the WMS request parameters (see `download_sat_mosaics`).
+        bbox (tuple): Request bounding box (minx, miny, maxx, maxy) in src_crs.
+        image_file (str): Output file of the image.
+        src_crs (str, optional): CRS of the WMS request. Defaults to "EPSG:4326".
+
+    Returns:
+        None
+    """
+    while not os.path.exists(image_file):
+        try:
+            # Request image from WMS
+            img = wms.getmap(
+                bbox=tuple(bbox),
+                layers=config["layers"],
+                srs=src_crs,
+                size=(config["width"], config["height"]),
+                featureProfile=config["featureprofile"],
+                coverage_cql_filter=config["coverage_cql_filter"],
+                exceptions=config["exceptions"],
+                transparent=config["transparent"],
+                format=config["format"],
+            )
+            # Save the image to file
+            with open(image_file, "wb") as file:
+                file.write(img.read())
+        except:
+            pass
+
+
+def align_tiles(bounds: np.ndarray, width: int, height: int, tolerance: float = 1e-6):
+    """
+    Snap a group of image bounding boxes to the pixel grid of the first one.
+
+    An image is aligned if its size matches the grid resolution and its offset from the
+    first image is a whole number of pixels, both within `tolerance` pixels. Aligned
+    images can be cut out of a mosaic on that grid without any resampling.
+
+    Args:
+        bounds (np.ndarray): Array of shape (n, 4) with the (minx, miny, maxx, maxy) of each image.
+        width (int): Width of each image in pixels.
+        height (int): Height of each image in pixels.
+        tolerance (float, optional): Maximum misalignment in pixels. Defaults to 1e-6.
+
+    Returns:
+        tuple: Boolean mask of the aligned images, their integer column and row offsets
+            in the mosaic, and the mosaic transform, width and height.
+    """
+    # Pixel grid of the first image
+    res_x = (bounds[0, 2] - bounds[0, 0]) / width
+    res_y = (bounds[0, 3] - bounds[0, 1]) / height
+
+    # Offsets of each image from the first image, in pixels
+    cols = (bounds[:, 0] - bounds[0, 0]) / res_x
+    rows = (bounds[0, 3] - bounds[:, 3]) / res_y
+    aligned = (
+        (np.abs(cols - np.round(cols)) <= tolerance)
+        & (np.abs(rows - np.round(rows)) <= tolerance)
+        & (np.abs((bounds[:, 2] - bounds[:, 0]) / res_x - width) <= tolerance)
+        & (np.abs((bounds[:, 3] - bounds[:, 1]) / res_y - height) <= tolerance)
+    )
+
+    # Mosaic covering the aligned images on that grid
+    cols = np.round(cols[aligned]).astype(int)
+    rows = np.round(rows[aligned]).astype(int)
+    xmin = bounds[0, 0] + cols.min() * res_x
+    ymax = bounds[0, 3] - rows.min() * res_y
+    cols, rows = cols - cols.min(), rows - rows.min()
+    mosaic_width, mosaic_height = cols.max() + width, rows.max() + height
+    mosaic_transform = rio.transform.from_origin(xmin, ymax, res_x, res_y)
+
+    return aligned, cols, rows, mosaic_transform, mosaic_width, mosaic_height
+
+
+def download_sat_mosaics(
+    wms: WebMapService,
+    config: dict,
+    data: gpd.GeoDataFrame,
+    out_dir: str,
+    id_col: str = "UID",
+    src_crs: str = "EPSG:4326",
+    target_crs: str = "EPSG:3857",
+) -> None:
+    """
+    Download satellite images as mosaics and crop each image locally.
+
+    The images are grouped into square blocks on a grid in target_crs. One `getmap`
+    request is made per block, covering the extent of the images in the block on the
+    pixel grid of a single image request, so that overlapping images no longer fetch
+    the same ground pixels several times. Each `<UID>.tiff` is then copied out of the
+    mosaic pixel for pixel (integer window, no resampling) and saved as a georeferenced
+    GeoTIFF, so it is identical to a single image request. Since only images on the same
+    pixel grid can share a mosaic (see `align_tiles`), a block is split into one mosaic
+    per group of aligned images (typically one per row); single images are requested
+    individually, as without mosaics.
+
+    Args:
+        wms (WebMapService): Web Map Service connection.
+        config (dict): Configuration dictionary containing necessary parameters.
+            - size (float): Half-width of each image in target_crs units.
+            - width (int): Width of each image in pixels.
+            - height (int): Height of each image in pixels.
+            - mosaic_size (int, optional): Maximum width and height of a mosaic in pixels.
+                Defaults to 2048.
+            - mosaic_tolerance (float, optional): Maximum misalignment in pixels of an
+                image cut out of a mosaic. Defaults to 1e-6.
+            - layers, featureprofile, coverage_cql_filter, exceptions, transparent,
+                format: WMS request parameters.
+        data (gpd.GeoDataFrame): GeoDataFrame with 'lon' and 'lat' columns in target_crs.
+        out_dir (str): Output directory for saving images.
+        id_col (str, optional): Column name for unique identifiers in the data. Defaults to "UID".
+        src_crs (str, optional): CRS of the WMS request. Defaults to "EPSG:4326".
+        target_crs (str, optional): CRS of the 'lon' and 'lat' columns. Defaults to "EPSG:3857".
+
+    Returns:
+        None
+    """
+    size = config["size"]
+    width, height = config["width"], config["height"]
+    mosaic_size = config.get("mosaic_size", 2048)
+    tolerance = config.get("mosaic_tolerance", 1e-6)
+
+    # Ground sampling distance of a single image request in target_crs units
+    gsd_x, gsd_y = 2 * size / width, 2 * size / height
+
+    # Keep only the images that do not exist yet
+    image_files = [os.path.join(out_dir, f"{uid}.tiff") for uid in data[id_col]]
+    missing = np.array([not os.path.exists(file) for file in image_files])
+    data = data[missing].reset_index(drop=True)
+    image_files = [file for file, miss in zip(image_files, missing) if miss]
+    if len(data) == 0:
+        return
+
+    # Assign the image centres to blocks that fit within the maximum mosaic size
+    block_x = max(mosaic_size * gsd_x - 2 * size, 2 * gsd_x)
+    block_y = max(mosaic_size * gsd_y - 2 * size, 2 * gsd_y)
+    blocks = data_utils.assign_blocks(
+        data.lon.values, data.lat.values, block_x, block_y
+    )
+
+    # Compute the request bounding box of each image
+    tile_bounds = get_tile_bounds(data, size, src_crs, target_crs)
+    logging.info(
+        f"Downloading {len(data)} images with {blocks.max() + 1} mosaic requests..."
+    )
+
+    bar_format = "{l_bar}{bar:20}{r_bar}{bar:-20b}"
+    for block in tqdm(range(blocks.max() + 1), bar_format=bar_format):
+        remaining = np.where(blocks == block)[0]
+
+        # Split the block into groups of images that share a pixel grid (in practice,
+        # images in the same row, since latitudes do not map linearly to target_crs)
+        while len(remaining) > 0:
+            aligned, cols, rows, mosaic_transform, mosaic_width, mosaic_height = (
+                align_tiles(tile_bounds[remaining], width, height, tolerance)
+            )
+            indexes, remaining = remaining[aligned], remaining[~aligned]
+
+            # Request single images as without mosaics
+            if len(indexes) == 1:
+                index = indexes[0]
+                download_sat_tile(
+                    wms, config, tile_bounds[index], image_files[index], src_crs
+                )
+                continue
+
+            bbox = rio.transform.array_bounds(
+                mosaic_height, mosaic_width, mosaic_transform
+            )
+            bbox = (bbox[0], bbox[1], bbox[2], bbox[3])
+            while not all(os.path.exists(image_files[index]) for index in indexes):
+                try:
+                    # Request mosaic from WMS
+                    img = wms.getmap(
+                        bbox=bbox,
+                        layers=config["layers"],
+                        srs=src_crs,
+                        size=(mosaic_width, mosaic_height),
+                        featureProfile=config["featureprofile"],
+                        coverage_cql_filter=config["coverage_cql_filter"],
+                        exceptions=config["exceptions"],
+                        transparent=config["transparent"],
+                        format=config["format"],
+                    )
+
+                    # Copy each image out of the mosaic without resampling
+                    with MemoryFile(img.read()) as memfile:
+                        with memfile.open() as src:
+                            for index, col, row in zip(indexes, cols, rows):
+                                window = rio.windows.Window(col, row, width, height)
+                                image = src.read(window=window)
+                                with rio.open(
+                                    image_files[index],
+                                    "w",
+                                    driver="GTiff",
+                                    width=width,
+                                    height=height,
+                                    count=src.count,
+                                    dtype=image.dtype,
+                                    transform=rio.transform.from_bounds(
+                                        *tile_bounds[index], width, height
+                                    ),
+                                    crs=src_crs,
+                                ) as dst:
+                                    dst.write(image)
+
+                except:
+                    pass
+
+
 def main():
     # Load arguments from parser
     parser = argparse.ArgumentParser(description="Satellite Image Download")
@@ -62,45 +62,141 @@ def main(args):
         sat_dir = os.path.join(cwd, "output", args.iso_code, "images", shapename)
         print(f"Downloading {tiles.shape[0]} satellite images for {shapename} ...")
         sat_download.download_sat_images(
-            sat_creds, sat_config, data=data, out_dir=sat_dir
+            sat_creds, sat_config, data=data, out_dir=sat_dir, mosaic=args.mosaic
         )
 
         print(f"Generating predictions for {shapename}...")
         model_configs = model_utils.get_ensemble_configs(args.iso_code, data_config)
+        cam_config = model_configs[0]
+        if args.student_config:
+            # Replace the ensemble with a single distilled student
+            model_configs = [
+                model_utils.load_model_config(args.student_config, data_config)
+            ]
+        for model_config in model_configs:
+            # Override the runtime settings of the model configs only when given
+            if args.backend:
+                model_config["backend"] = args.backend
+            if args.n_threads:
+                model_config["n_threads"] = int(args.n_threads)
+            if args.quantize:
+                model_config["quantize"] = True
 
         # Calculate the threshold that optimizes the F2 score of the validation set
-        val_output = model_utils.ensemble_models(
-            args.iso_code, data_config, phase="val"
-        )
-        val_results = eval_utils.evaluate(
-            y_true=val_output["y_true"],
-            y_pred=val_output["y_preds"],
-            y_prob=val_output["y_probs"],
-            beta=2,
-        )
-        threshold = val_results["optim_threshold"]
+        if args.student_config:
+            threshold = pred_utils.get_val_threshold(args.iso_code, model_configs[0])
+        else:
+            val_output = model_utils.ensemble_models(
+                args.iso_code, data_config, phase="val"
+            )
+            val_results = eval_utils.evaluate(
+                y_true=val_output["y_true"],
+                y_pred=val_output["y_preds"],
+                y_prob=val_output["y_probs"],
+                beta=2,
+            )
+            threshold = val_results["optim_threshold"]
         threshold = min(0.5, threshold)
 
+        # Keep the results of the student apart from those of the full ensemble
+        pred_shapename = shapename
+        if args.student_config:
+            pred_shapename = f"{shapename}_{model_configs[0]['config_name']}"
+
         print(f"Setting threshold to {threshold}...")
-        results = pred_utils.ensemble_predict(
-            data=tiles,
-            iso_code=args.iso_code,
-            shapename=shapename,
-            model_configs=model_configs,
-            threshold=threshold,
-            in_dir=sat_dir,
-        )
+        if args.dense and args.dense_eval_samples:
+            # Check the agreement and speedup of dense inference on a sample of tiles
+            for model_config in model_configs:
+                backend = pred_utils.get_backend(model_config)
+                if backend == "torch" and pred_utils.is_dense_model(
+                    model_config["model"]
+                ):
+                    pred_utils.evaluate_dense_predict(
+                        data=tiles,
+                        iso_code=args.iso_code,
+                        config=model_config,
+                        in_dir=sat_dir,
+                        threshold=threshold,
+                        n_samples=int(args.dense_eval_samples),
+                        shapename=pred_shapename,
+                    )
+
+        cam_results = None
+        if args.cascade_config:
+            # Screen tiles with a fast model before the full ensemble
+            screen_config = model_utils.load_model_config(
+                args.cascade_config, data_config
+            )
+            if args.backend:
+                screen_config["backend"] = args.backend
+            if args.n_threads:
+                screen_config["n_threads"] = int(args.n_threads)
+            if args.quantize:
+                screen_config["quantize"] = True
+            results = pred_utils.cascade_predict(
+                data=tiles,
+                iso_code=args.iso_code,
+                shapename=pred_shapename,
+                data_config=data_config,
+                screen_config=screen_config,
+                model_configs=model_configs,
+                threshold=threshold,
+                band=float(args.cascade_band),
+                in_dir=sat_dir,
+                anytime=args.anytime,
+                dense=args.dense,
+            )
+        elif args.cam_in_pass:
+            # Generate the CAM points in the same pass as the ensemble predictions
+            results, cam_results = cam_utils.cam_ensemble_predict(
+                data=tiles,
+                iso_code=args.iso_code,
+                shapename=pred_shapename,
+                model_configs=model_configs,
+                threshold=threshold,
+                in_dir=sat_dir,
+            )
+        else:
+            results = pred_utils.ensemble_predict(
+                data=tiles,
+                iso_code=args.iso_code,
+                shapename=pred_shapename,
+                model_configs=model_configs,
+                threshold=threshold,
+                in_dir=sat_dir,
+                anytime=args.anytime,
+                dense=args.dense,
+            )
+
+        pred_utils.save_tile_report(results, args.iso_code, shapename, data_config)
+
+        if cam_results is not None:
+            results = cam_results
+            continue
 
-        print(f"Generating GeoTIFFs for {shapename}...")
         subdata = results[results["pred"] == model_configs[0]["pos_class"]]
-        geotiff_dir = data_utils.makedir(
-            os.path.join("output", args.iso_code, "geotiff", shapename)
-        )
-        cam_utils.georeference_images(subdata, sat_config, sat_dir, geotiff_dir)
+        if args.skip_geotiff:
+            # CAM points are georeferenced from the tile bounds
+            geotiff_dir, ext = sat_dir, ".tiff"
+        else:
+            print(f"Generating GeoTIFFs for {shapename}...")
+            geotiff_dir = data_utils.makedir(
+                os.path.join("output", args.iso_code, "geotiff", shapename)
+            )
+            driver = "VRT" if args.vrt else "GTiff"
+            cam_utils.georeference_images(
+                subdata,
+                sat_config,
+                sat_dir,
+                geotiff_dir,
+                driver=driver,
+                mosaic=args.vrt,
+            )
+            ext = ".vrt" if args.vrt else ".tif"
 
         print(f"Generating CAMs for {shapename}...")
         results = cam_utils.cam_predict(
-            args.iso_code, model_configs[0], subdata, geotiff_dir, shapename
+            args.iso_code, cam_config, subdata, geotiff_dir, shapename, ext=ext
         )
 
     preds = post_utils.load_preds(
@@ -124,7 +220,64 @@ if __name__ == "__main__":
     parser.add_argument("--project", help="Overwrite project name", default=None)
     parser.add_argument("--start_index", help="Starting index", default=0)
     parser.add_argument("--iso_code", help="ISO code")
+    parser.add_argument(
+        "--cascade_config", help="Screening model config file", default=None
+    )
+    parser.add_argument(
+        "--cascade_band", help="Cascade uncertainty band half-width", default=0.2
+    )
+    parser.add_argument(
+        "--anytime", help="Early-exit ensemble averaging", action="store_true"
+    )
+    parser.add_argument(
+        "--mosaic", help="Download images as mosaics", action="store_true"
+    )
+    parser.add_argument(
+        "--dense", help="Dense inference over mosaics", action="store_true"
+    )
+    parser.add_argument(
+        "--dense_eval_samples",
+        help="Number of tiles to compare dense and per-tile inference on",
+        default=None,
+    )
+    parser.add_argument(
+        "--backend",
+        help="Inference backend (torch, onnx, torchscript)",
+        default=None,
+    )
+    parser.add_argument("--n_threads", help="CPU threads per model", default=None)
+    parser.add_argument(
+        "--quantize", help="Use int8 quantized models", action="store_true"
+    )
+    parser.add_argument(
+        "--student_config", help="Distilled student model config file", default=None
+    )
+    parser.add_argument(
+        "--skip_geotiff",
+        help="Generate CAMs without writing GeoTIFFs",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--vrt", help="Georeference tiles as virtual rasters", action="store_true"
+    )
+    parser.add_argument(
+        "--cam_in_pass",
+        help="Generate CAMs in the same pass as the ensemble predictions",
+        action="store_true",
+    )
     args = parser.parse_args()
     logging.info(args)
 
+    # Reject combinations of options that cannot run together
+    if args.anytime and args.dense:
+        parser.error("--anytime and --dense cannot be combined")
+    if args.dense_eval_samples and not args.dense:
+        parser.error("--dense_eval_samples requires --dense")
+    if args.skip_geotiff and args.vrt:
+        parser.error("--skip_geotiff and --vrt cannot be combined")
+    if args.cam_in_pass:
+        for option in ["cascade_config", "student_config", "anytime", "dense"]:
+            if getattr(args, option):
+                parser.error(f"--cam_in_pass cannot be combined with --{option}")
+
     main(args)
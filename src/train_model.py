@@ -11,6 +11,7 @@ from utils import config_utils
 from utils import cnn_utils
 from utils import eval_utils
 from utils import model_utils
+from utils import pred_utils
 
 
 torch.cuda.empty_cache()
@@ -47,7 +48,21 @@ def main(c, wandb):
 
     # Load dataset
     phases = ["train", "val", "test"]
-    data, data_loader, classes = cnn_utils.load_dataset(config=c, phases=phases)
+    if c.get("distill", False):
+        # Label the training tiles (and unlabelled prediction tiles) with the ensemble's probabilities
+        soft_labels = pred_utils.get_ensemble_soft_labels(
+            c["iso_code"], c, phase="train"
+        )
+        unlabelled = pred_utils.get_unlabelled_soft_labels(
+            c["iso_code"],
+            c,
+            n_samples=int(len(soft_labels) * c.get("distill_unlabelled", 1.0)),
+        )
+        data, data_loader, classes = cnn_utils.load_distill_dataset(
+            config=c, phases=phases, soft_labels=soft_labels, unlabelled=unlabelled
+        )
+    else:
+        data, data_loader, classes = cnn_utils.load_dataset(config=c, phases=phases)
     logging.info(
         f"Train/val/test sizes: {len(data['train'])}/{len(data['val'])}/{len(data['test'])}"
     )
@@ -89,17 +104,30 @@ def main(c, wandb):
         logging.info("\nEpoch {}/{}".format(epoch, n_epochs))
 
         # Train model
-        cnn_utils.train(
-            data_loader["train"],
-            model,
-            criterion,
-            optimizer,
-            device,
-            pos_label=1,
-            beta=beta,
-            wandb=wandb,
-            logging=logging,
-        )
+        if c.get("distill", False):
+            cnn_utils.distill_train(
+                data_loader["train"],
+                model,
+                optimizer,
+                device,
+                pos_label=1,
+                beta=beta,
+                alpha=c.get("distill_alpha", 0.0),
+                wandb=wandb,
+                logging=logging,
+            )
+        else:
+            cnn_utils.train(
+                data_loader["train"],
+                model,
+                criterion,
+                optimizer,
+                device,
+                pos_label=1,
+                beta=beta,
+                wandb=wandb,
+                logging=logging,
+            )
         # Evauate model
         val_results, val_cm, val_preds = cnn_utils.evaluate(
             data_loader["val"],
@@ -198,6 +226,10 @@ def main(c, wandb):
                 prefix=f"{phase}_{rurban}",
             )
 
+    # Compare the student with its teacher ensemble
+    if c.get("distill", False):
+        pred_utils.evaluate_distillation(c["iso_code"], c, student_config=c)
+
     return final_results
 
 
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import model_utils
+
+
+def make_data(seed: int = 0) -> pd.DataFrame:
+    """
+    Builds a synthetic dataset with unbalanced strata over rurban and iso.
+
+    Args:
+        seed (int, optional): Seed of the synthetic attributes. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: Dataset with UID, rurban and iso columns.
+    """
+    rng = np.random.default_rng(seed)
+    sizes = {
+        ("urban", "KEN"): 1200,
+        ("rural", "KEN"): 450,
+        ("urban", "RWA"): 300,
+        ("rural", "RWA"): 57,
+        ("rural", "BWA"): 13,
+    }
+    rows = [key for key, size in sizes.items() for _ in range(size)]
+    rows = [rows[i] for i in rng.permutation(len(rows))]
+    data = pd.DataFrame(rows, columns=["rurban", "iso"])
+    data["UID"] = [f"UID_{i}" for i in range(len(data))]
+    return data
+
+
+@pytest.mark.parametrize("test_size", [0.1, 0.2, 0.3])
+def test_split_stratum_proportions(test_size):
+    data = make_data()
+    data = model_utils.train_val_test_split(
+        data, test_size=test_size, attributes=["rurban", "iso"], verbose=False
+    )
+
+    # Every row is assigned to exactly one split
+    assert set(data["dataset"].unique()) <= {"train", "val", "test"}
+
+    # Test and val each hold test_size of every stratum, within rounding
+    for _, stratum in data.groupby(["rurban", "iso"]):
+        counts = stratum["dataset"].value_counts()
+        expected = test_size * len(stratum)
+        for phase in ["test", "val"]:
+            assert abs(counts.get(phase, 0) - expected) <= 2
+        assert counts.get("test", 0) == counts.get("val", 0)
+        expected_train = len(stratum) - counts.get("test", 0) - counts.get("val", 0)
+        assert counts.get("train", 0) == expected_train
+
+
+def test_split_is_reproducible():
+    def split(seed):
+        data = model_utils.train_val_test_split(
+            make_data(), attributes=["rurban", "iso"], verbose=False, seed=seed
+        )
+        return data["dataset"]
+
+    # A fixed seed gives the same split; another seed shuffles the strata differently
+    assert split(42).equals(split(42))
+    assert not split(42).equals(split(7))
+
+
+def test_split_keeps_existing_split():
+    data = make_data()
+    data["dataset"] = "train"
+    data = model_utils.train_val_test_split(data, verbose=False)
+    assert (data["dataset"] == "train").all()
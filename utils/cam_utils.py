@@ -1,5 +1,9 @@
 import os
+import json
+import joblib
+import hashlib
 import logging
+import xml.etree.ElementTree as ET
 import operator
 import numpy as np
 import pandas as pd
@@ -21,6 +25,7 @@ from pytorch_grad_cam.utils.image import (
 
 import torch
 import torchvision
+import torch.nn.functional as nnf
 from torchcam.utils import overlay_mask
 import torchvision.transforms as transforms
 from torchvision.transforms.functional import to_pil_image
@@ -28,6 +33,7 @@ from torchvision.transforms.functional import to_pil_image
 from utils import data_utils
 from utils import pred_utils
 from utils import cnn_utils
+from utils import model_utils
 
 from pytorch_grad_cam.metrics.cam_mult_image import CamMultImageConfidenceChange
 from pytorch_grad_cam.metrics.road import ROADCombined
@@ -87,22 +93,9 @@ def get_best_cam_method(iso_code: str, model_config: dict) -> str:
     Raises:
         FileNotFoundError: If the CAM results file does not exist in the specified path.
     """
-    model_name = model_config["model"]
-    cam_results_file = os.path.join(
-        os.getcwd(),
-        "exp",
-        model_config["project"],
-        f"{iso_code}_{model_name}",
-        "cam_results.csv",
-    )
+    cam_results_file = model_utils.get_cam_results_file(iso_code, model_config)
     if os.path.exists(cam_results_file):
-        cam_results = pd.read_csv(cam_results_file)
-        cam_results["method"] = cam_results["method"].replace(
-            {"gradcam++": "gradcamplusplus"}
-        )
-        cam_method = cam_results[cam_results["score"] == cam_results["score"].min()][
-            "method"
-        ].values[0]
+        cam_method = model_utils.read_cam_method(cam_results_file)
         print(f"Best cam method: {cam_method}")
     else:
         raise FileNotFoundError(f"CAM results file not found at {cam_results_file}")
@@ -192,6 +185,7 @@ def cam_predict(
     shapename: str,
     buffer_size: int = 50,
     verbose: bool = False,
+    ext: str = ".tif",
 ) -> gpd.GeoDataFrame:
     """
     Runs the Class Activation Map (CAM) prediction process for a given region, model configuration,
@@ -209,13 +203,218 @@ def cam_predict(
         shapename (str): Identifier for the shapefile, used in naming the output file.
         buffer_size (int, optional): Size of the buffer around points for CAM extraction. Default is 50.
         verbose (bool, optional): Flag for verbosity in the prediction process. Default is False.
+        ext (str, optional): File extension of the images in geotiff_dir. Default is ".tif".
 
     Returns:
         gpd.GeoDataFrame: The results of the CAM prediction as a GeoDataFrame.
     """
     # Determine the best CAM method for the given iso_code and model config
     cam_method = get_best_cam_method(iso_code, config)
+    out_file = get_cam_file(iso_code, config, shapename, cam_method)
+
+    # If the output file already exists, load and return it
+    if os.path.exists(out_file):
+        return gpd.read_file(out_file)
+
+    # Load the specified model for the country and configuration
+    model = pred_utils.load_model(iso_code, config, backend="torch")
+    model.eval()  # Set model to evaluation mode for inference
+
+    # Initialize the CAM extractor with the selected CAM method and model
+    cam_extractor = get_cam_extractor(config, model, cam_method)
+
+    # Generate CAM points
+    results = generate_cam_points(
+        data, config, geotiff_dir, model, cam_extractor, buffer_size, ext=ext
+    )
+
+    return save_cam_points(iso_code, config, results, out_file)
+
+
+def cam_ensemble_predict(
+    data: gpd.GeoDataFrame,
+    iso_code: str,
+    shapename: str,
+    model_configs: list,
+    threshold: float,
+    in_dir: str = None,
+    buffer_size: int = 50,
+) -> tuple:
+    """
+    Runs the ensemble prediction and the CAM extraction of the positive tiles in a single
+    pass over the images of the primary model (`model_configs[0]`), instead of running
+    `pred_utils.ensemble_predict` and then `cam_predict`, which decodes every positive
+    tile again for a separate CAM forward and backward pass.
+
+    The other members are evaluated first, so the ensemble decision of each tile is known as
+    soon as the primary model has scored it. The forward pass of the primary model goes through
+    the hooks of the CAM extractor, and the gradients (for gradient-based CAM methods) and CAM
+    peaks are only computed for the tiles above the threshold. The results are saved to the
+    same files as `pred_utils.ensemble_predict` and `cam_predict`. As in `generate_cam_points`,
+    `cam_top_k` and `cam_analytic_peaks` in the config of the primary model control the peaks.
+
+    Args:
+        data (gpd.GeoDataFrame): The tiles to be processed.
+        iso_code (str): The ISO code representing the country.
+        shapename (str): Identifier for the shapefile, used in naming the output files.
+        model_configs (list of dicts): Configuration dictionaries of the ensemble members;
+            the first member is used for the CAMs.
+        threshold (float): Threshold value for converting probabilities to binary predictions.
+        in_dir (str, optional): Directory containing input images. Default is None.
+        buffer_size (int, optional): Buffer size around each CAM point in meters. Default is 50.
+
+    Returns:
+        tuple: A tuple containing:
+            - results (gpd.GeoDataFrame): The ensemble results (see `pred_utils.ensemble_predict`).
+            - cam_results (gpd.GeoDataFrame): The CAM points of the positive tiles (see `cam_predict`).
+    """
+    cam_config = model_configs[0]
+    n_models = len(model_configs)
+
+    # Define class labels based on the positive and negative class configurations
+    classes = {1: cam_config["pos_class"], 0: cam_config["neg_class"]}
+
+    # Define the output files of the ensemble results and the CAM points
+    out_dir = data_utils.makedir(
+        os.path.join(
+            "output", iso_code, "results", cam_config["project"], "tiles", "ensemble"
+        )
+    )
+    out_file = os.path.join(out_dir, f"{iso_code}_{shapename}_ensemble_results.geojson")
+    cam_method = get_best_cam_method(iso_code, cam_config)
+    cam_file = get_cam_file(iso_code, cam_config, shapename, cam_method)
+
+    # If both results files already exist, load and return them
+    if os.path.exists(out_file) and os.path.exists(cam_file):
+        return gpd.read_file(out_file), gpd.read_file(cam_file)
+
+    # Accumulate the probabilities of the other members first
+    data = data.reset_index(drop=True)
+    probs = np.zeros(len(data))
+    for model_config in model_configs[1:]:
+        print(f"Generating predictions with {model_config['config_name']}...")
+        results = pred_utils.cnn_predict(
+            data=data.copy(),
+            iso_code=iso_code,
+            shapename=shapename,
+            config=model_config,
+            in_dir=in_dir,
+        )
+        probs = probs + results["prob"].to_numpy()
+
+    # Load the primary model and attach the CAM extractor hooks
+    print(f"Generating predictions and CAMs with {cam_config['config_name']}...")
+    model = pred_utils.load_model(iso_code, cam_config, backend="torch")
+    model.eval()
+    cam_extractor = get_cam_extractor(cam_config, model, cam_method)
+
+    # Tag missing and degenerate images
+    files = data_utils.get_image_filepaths(cam_config, data, in_dir)
+    status = pred_utils.get_tile_status(files, cam_config)
+    valid = np.where(status == "valid")[0]
+
+    # Get the tile size in pixels (all tiles share the size of the downloaded images)
+    width, height = cam_config.get("width"), cam_config.get("height")
+    if (width is None or height is None) and len(valid) > 0:
+        with rio.open(files[valid[0]]) as map_layer:
+            width, height = map_layer.width, map_layer.height
+
+    # Lists to store the CAM peaks and the indices of their tiles
+    points, indices = [], []
+    primary = np.zeros(len(data))
+    batch_size = cam_config.get("batch_size", 16)
+    batches = pred_utils.load_image_batches(
+        [files[index] for index in valid], cam_config, batch_size
+    )
+    for batch_index, input_tensor in enumerate(batches):
+        batch = valid[batch_index * batch_size : (batch_index + 1) * batch_size]
+        input_tensor = input_tensor.to(device)
+
+        # Score the batch through the hooks, which keep the target layer activations
+        outputs = cam_extractor.activations_and_grads(input_tensor)
+        primary[batch] = nnf.softmax(outputs, dim=1)[:, 1].detach().cpu().numpy()
+
+        # Only keep the tiles whose ensemble mean is above the threshold
+        positive = np.where((probs[batch] + primary[batch]) / n_models > threshold)[0]
+        if len(positive) == 0:
+            continue
+
+        # Backpropagate the positive class score of the positive tiles only
+        targets = [ClassifierOutputTarget(1)] * len(batch)
+        if cam_extractor.uses_gradients:
+            model.zero_grad()
+            loss = sum(targets[row](outputs[row]) for row in positive)
+            loss.backward()
+
+        # Keep the inputs, activations and gradients of the positive tiles only
+        rows = torch.from_numpy(positive).to(input_tensor.device)
+        activations_and_grads = cam_extractor.activations_and_grads
+        activations_and_grads.activations = [
+            activation[rows.to(activation.device)]
+            for activation in activations_and_grads.activations
+        ]
+        activations_and_grads.gradients = [
+            gradient[rows.to(gradient.device)]
+            for gradient in activations_and_grads.gradients
+        ]
+        input_tensor = input_tensor[rows]
+        targets = [targets[row] for row in positive]
+
+        # Compute the CAMs from the stored activations and gradients
+        cam_maps = cam_extractor.aggregate_multi_layer(
+            cam_extractor.compute_cam_per_layer(input_tensor, targets, False)
+        )
+        peaks, mask = find_cam_peaks(
+            torch.from_numpy(cam_maps).to(device),
+            image_size=(width, height),
+            analytic=cam_config.get("cam_analytic_peaks", False),
+            top_k=cam_config.get("cam_top_k", 1),
+        )
+
+        # Flatten the peaks, keeping the tile index of each point
+        points.append(peaks[mask])
+        indices.extend(np.repeat(batch[positive], mask.sum(axis=1)).tolist())
+
+    # Save the primary model results so that later runs can reuse them
+    pred_file = pred_utils.get_pred_file(
+        iso_code, shapename, cam_config, backend="torch"
+    )
+    results = gpd.GeoDataFrame(
+        data[["UID", "geometry"]].assign(prob=primary, tile_status=status),
+        geometry="geometry",
+    )
+    if not os.path.exists(pred_file):
+        results.to_file(pred_file, driver="GeoJSON")
+
+    # Average the probabilities across all models and save the ensemble results
+    results["prob"] = (probs + primary) / n_models
+    preds = results["prob"] > threshold
+    results["pred"] = [str(classes[int(pred)]) for pred in preds]
+    results.to_file(out_file, driver="GeoJSON")
+
+    # Georeference and save the CAM points
+    points = np.concatenate(points) if len(points) > 0 else np.zeros((0, 2))
+    cam_results = georeference_cam_points(
+        results, indices, points, width, height, buffer_size=buffer_size
+    )
+    cam_results = save_cam_points(iso_code, cam_config, cam_results, cam_file)
+
+    return results, cam_results
+
+
+def get_cam_file(iso_code: str, config: dict, shapename: str, cam_method: str) -> str:
+    """
+    Returns the path of the CAM points file of a shapename, creating its directory if needed.
+
+    Args:
+        iso_code (str): The ISO code representing the country.
+        config (dict): Configuration dictionary for the model, including "project" and "config_name".
+        shapename (str): Identifier for the shapefile, used in naming the output file.
+        cam_method (str): The CAM method used to generate the points.
 
+    Returns:
+        str: The path to the CAM points GeoJSON file.
+    """
     # Create the output directory for storing results if it doesn't already exist
     out_dir = data_utils.makedir(
         os.path.join(
@@ -232,35 +431,30 @@ def cam_predict(
     )
 
     # Define the path to the output file
-    out_file = os.path.join(
+    return os.path.join(
         out_dir, f"{iso_code}_{shapename}_{config['config_name']}_{cam_method}.geojson"
     )
 
-    # If the output file already exists, load and return it
-    if os.path.exists(out_file):
-        return gpd.read_file(out_file)
-
-    # Load the specified model for the country and configuration
-    model = pred_utils.load_model(iso_code, config)
-    model.eval()  # Set model to evaluation mode for inference
 
-    # Initialize the CAM extractor with the selected CAM method and model
-    cam_extractor = get_cam_extractor(config, model, cam_method)
+def save_cam_points(
+    iso_code: str, config: dict, results: gpd.GeoDataFrame, out_file: str
+) -> gpd.GeoDataFrame:
+    """
+    Assigns the building sum to CAM points from the in-memory building layers
+    (see `data_utils.get_building_sums`) and saves them to a GeoJSON file.
 
-    # Generate CAM points
-    results = generate_cam_points(
-        data, config, geotiff_dir, model, cam_extractor, buffer_size
-    )
+    Args:
+        iso_code (str): The ISO code representing the country.
+        config (dict): Configuration dictionary for the model.
+        results (gpd.GeoDataFrame): The CAM points.
+        out_file (str): Path to the output GeoJSON file (see `get_cam_file`).
 
-    # Assign building pixel sum to CAM points
-    temp_file = os.path.join(
-        out_dir,
-        f"{iso_code}_{shapename}_{config['config_name']}_{cam_method}_temp.geojson",
-    )
-    results.to_file(temp_file, driver="GeoJSON")
-    results = data_utils.filter_uninhabited(
-        iso_code, config, results, in_vector=temp_file
-    )
+    Returns:
+        gpd.GeoDataFrame: The filtered CAM points.
+    """
+    # Assign building sum to CAM points
+    results = results.reset_index(drop=True)
+    results["sum"] = data_utils.get_building_sums(iso_code, config, results)
 
     # Save the resulting CAM points to a GeoJSON file
     results.to_file(out_file, driver="GeoJSON")
@@ -268,6 +462,36 @@ def cam_predict(
     return results
 
 
+def pixel_to_world(
+    bounds: np.ndarray, rows: np.ndarray, cols: np.ndarray, width: int, height: int
+) -> tuple:
+    """
+    Maps pixel coordinates to world coordinates given the bounds of each tile.
+
+    This is the vectorized equivalent of `rio.open(file).xy(row, col)` for tiles
+    georeferenced with `rio.transform.from_bounds(*bounds, width, height)`, i.e.
+    the coordinates of the pixel centers.
+
+    Args:
+        bounds (np.ndarray): Array of shape (N, 4) with the (minx, miny, maxx, maxy) of each tile.
+        rows (np.ndarray): Array of shape (N,) with the pixel rows.
+        cols (np.ndarray): Array of shape (N,) with the pixel columns.
+        width (int): Width of the tiles in pixels.
+        height (int): Height of the tiles in pixels.
+
+    Returns:
+        tuple: A tuple containing the x and y world coordinates as arrays of shape (N,).
+    """
+    bounds = np.asarray(bounds, dtype=float).reshape(-1, 4)
+    minx, miny, maxx, maxy = bounds.T
+
+    # Offset to the pixel centers and scale by the pixel size
+    xs = minx + (np.asarray(cols) + 0.5) * (maxx - minx) / width
+    ys = maxy - (np.asarray(rows) + 0.5) * (maxy - miny) / height
+
+    return xs, ys
+
+
 def generate_cam_points(
     data: pd.DataFrame,
     config: dict,
@@ -276,10 +500,16 @@ def generate_cam_points(
     cam_extractor,
     buffer_size: int = 50,
     show: bool = False,
+    batch_size: int = None,
+    ext: str = ".tif",
 ) -> gpd.GeoDataFrame:
     """
     Generates Class Activation Map (CAM) points for each image in the dataset
-    and returns them as a GeoDataFrame.
+    and returns them as a GeoDataFrame. Missing and degenerate images
+    (see `pred_utils.get_tile_status`) are skipped. The CAM points are georeferenced
+    from the tile bounds in `data`, so the images need not be georeferenced themselves. Setting `cam_top_k` in the config
+    returns up to that many peaks per tile (for tiles with more than one school), and
+    `cam_analytic_peaks` finds the peaks at CAM resolution (see `find_cam_peaks`).
 
     Args:
         data (pd.DataFrame): DataFrame containing the metadata and information about the images.
@@ -290,75 +520,234 @@ def generate_cam_points(
         buffer_size (int, optional): Buffer size around each CAM point in meters. Defaults to 50.
         show (bool, optional): If True, displays the CAM points on top of the raster images.
             Defaults to False.
+        batch_size (int, optional): Number of tiles per CAM batch. Defaults to the
+            config's batch_size (or 16).
+        ext (str, optional): File extension of the images. Defaults to ".tif".
 
     Returns:
         gpd.GeoDataFrame: A GeoDataFrame containing the CAM points with their probabilities and UIDs.
     """
-    # List to store the generated CAM points
-    results = []
-
     # Reset index of the input DataFrame
     data = data.reset_index(drop=True)
 
     # Get filepaths for the images
-    filepaths = data_utils.get_image_filepaths(config, data, in_dir, ext=".tif")
+    filepaths = data_utils.get_image_filepaths(config, data, in_dir, ext=ext)
+
+    # Tag missing and degenerate images
+    status = pred_utils.get_tile_status(filepaths, config)
+
+    # Generate the CAM peaks of all valid tiles in batches
+    indices = [index for index in data.index if status[index] == "valid"]
+    print(f"Generating CAM points for {len(indices)}/{len(data)} tiles...")
+    _, points, mask = generate_cams(
+        config,
+        [filepaths[index] for index in indices],
+        cam_extractor,
+        batch_size=batch_size or config.get("batch_size", 16),
+        analytic=config.get("cam_analytic_peaks", False),
+        top_k=config.get("cam_top_k", 1),
+    )
 
-    # Store the coordinate reference system (CRS) of the input data
-    crs = data.crs
+    # Flatten the peaks, keeping the tile index of each point
+    indices = np.repeat(indices, mask.sum(axis=1)).tolist()
+    points = points[mask]
 
-    # Iterate over each row in the DataFrame
-    print(f"Generating CAM points for {len(data)} tiles...")
-    for index in tqdm(list(data.index), total=len(data)):
-        # Generate CAM for the current image
-        if os.path.exists(filepaths[index]):
-            _, point, _ = generate_cam(
-                config,
-                filepaths[index],
-                model,
-                cam_extractor,
-                metrics=False,
-                show=False,
-            )
-            # Open the image file and extract coordinates for the CAM point
+    # Get the tile size in pixels (all tiles share the size of the downloaded images)
+    width, height = config.get("width"), config.get("height")
+    if (width is None or height is None) and len(indices) > 0:
+        with rio.open(filepaths[indices[0]]) as map_layer:
+            width, height = map_layer.width, map_layer.height
+
+    # Map the CAM points to world coordinates using the tile bounds
+    results = georeference_cam_points(
+        data, indices, points, width, height, buffer_size=buffer_size
+    )
+
+    # Optionally show the CAM points on top of the images
+    if show:
+        for index, coord in zip(indices, results.geometry.centroid):
             with rio.open(filepaths[index]) as map_layer:
-                coord = [map_layer.xy(point[1], point[0])]
-                coord = geometry.Point(coord)
-                crs = map_layer.crs
-                results.append(coord)
+                fig, ax = plt.subplots(figsize=(6, 6))
+                rasterio.plot.show(map_layer, ax=ax)
+                geom = gpd.GeoDataFrame(geometry=[coord], crs=results.crs)
+                geom.plot(facecolor="none", edgecolor="blue", ax=ax)
 
-                # Optionally show the CAM point on the image
-                if show:
-                    fig, ax = plt.subplots(figsize=(6, 6))
-                    rasterio.plot.show(map_layer, ax=ax)
-                    geom = gpd.GeoDataFrame(geometry=[coord], crs=crs)
-                    geom.plot(facecolor="none", edgecolor="blue", ax=ax)
+    return results
 
-    # Convert the results list to a GeoDataFrame
-    results = gpd.GeoDataFrame(geometry=results, crs=crs)
+
+def georeference_cam_points(
+    data: gpd.GeoDataFrame,
+    indices: list,
+    points: np.ndarray,
+    width: int,
+    height: int,
+    buffer_size: int = 50,
+) -> gpd.GeoDataFrame:
+    """
+    Converts CAM peaks in pixel coordinates to buffered CAM points in EPSG:3857,
+    using the bounds of the tiles (see `georeference_images`).
+
+    Args:
+        data (gpd.GeoDataFrame): The tiles, with "UID", "prob" and tile geometries.
+        indices (list): Positional index in `data` of the tile of each point.
+        points (np.ndarray): Array of shape (N, 2) with the (x, y) pixel coordinates of each point.
+        width (int): Width of the tiles in pixels.
+        height (int): Height of the tiles in pixels.
+        buffer_size (int, optional): Buffer size around each CAM point in meters. Defaults to 50.
+
+    Returns:
+        gpd.GeoDataFrame: A GeoDataFrame containing the CAM points with their probabilities and UIDs.
+    """
+    # Map the CAM points to world coordinates using the tile bounds
+    crs = "EPSG:3857"
+    bounds = data.geometry
+    if data.crs is not None:
+        bounds = bounds.to_crs(crs)
+    points = np.asarray(points).reshape(-1, 2)
+    xs, ys = pixel_to_world(
+        bounds.bounds.to_numpy()[indices],
+        points[:, 1],
+        points[:, 0],
+        width,
+        height,
+    )
+    results = gpd.GeoDataFrame(geometry=gpd.points_from_xy(xs, ys), crs=crs)
 
     # Create a square buffer around each point
-    results = results.to_crs("EPSG:3857")
     results["geometry"] = results["geometry"].buffer(buffer_size, cap_style=3)
-    results = results.to_crs(crs)
 
-    # Assign UID and probabilties
-    results["prob"] = data.prob
-    results["UID"] = data.UID
+    # Assign UID and probabilties of the processed tiles
+    results["prob"] = data.prob.iloc[indices].to_numpy()
+    results["UID"] = data.UID.iloc[indices].to_numpy()
 
     return results
 
 
+def load_image(filepath: str) -> Image.Image:
+    """
+    Loads an image as an RGB PIL image. GDAL virtual rasters (.vrt), which PIL
+    cannot open, are read through rasterio.
+
+    Args:
+        filepath (str): Path to the image file.
+
+    Returns:
+        PIL.Image.Image: The RGB image.
+    """
+    if filepath.endswith(".vrt"):
+        with rio.open(filepath) as src:
+            image = src.read([1, 2, 3]).transpose((1, 2, 0))
+        return Image.fromarray(image).convert("RGB")
+
+    return Image.open(filepath).convert("RGB")
+
+
+def write_vrt(
+    out_file: str,
+    sources: list,
+    width: int,
+    height: int,
+    transform,
+    crs,
+    dtype: str = "uint8",
+    bands: list = [1, 2, 3],
+    nodata: float = 0,
+) -> None:
+    """
+    Writes a GDAL virtual raster (VRT) that references the pixels of existing
+    images under a new geotransform and CRS, without copying them.
+
+    Args:
+        out_file (str): Path of the output VRT file.
+        sources (list): List of (filepath, src_size, dst_window) tuples, where src_size is the
+            (width, height) of the source image and dst_window is the (xoff, yoff, xsize, ysize)
+            of the source in the VRT pixel grid.
+        width (int): Width of the VRT in pixels.
+        height (int): Height of the VRT in pixels.
+        transform (affine.Affine): Geotransform of the VRT.
+        crs (str or dict): Coordinate reference system of the VRT.
+        dtype (str, optional): Data type of the source bands. Defaults to "uint8".
+        bands (list, optional): Source bands to reference. Defaults to [1, 2, 3].
+        nodata (float, optional): No-data value of the VRT bands. Defaults to 0.
+
+    Returns:
+        None
+    """
+    # Map numpy data types to GDAL data types
+    gdal_dtypes = {
+        "uint8": "Byte",
+        "uint16": "UInt16",
+        "int16": "Int16",
+        "uint32": "UInt32",
+        "int32": "Int32",
+        "float32": "Float32",
+        "float64": "Float64",
+    }
+
+    root = ET.Element("VRTDataset", rasterXSize=str(width), rasterYSize=str(height))
+    ET.SubElement(root, "SRS").text = rio.crs.CRS.from_user_input(crs).to_wkt()
+    ET.SubElement(root, "GeoTransform").text = ", ".join(
+        repr(float(value)) for value in transform.to_gdal()
+    )
+
+    out_dir = os.path.dirname(os.path.abspath(out_file))
+    for index, band in enumerate(bands):
+        band_elem = ET.SubElement(
+            root, "VRTRasterBand", dataType=gdal_dtypes[dtype], band=str(index + 1)
+        )
+        ET.SubElement(band_elem, "NoDataValue").text = str(nodata)
+        for filepath, (src_width, src_height), dst_window in sources:
+            # Reference the source band by its path relative to the VRT
+            source = ET.SubElement(band_elem, "SimpleSource")
+            ET.SubElement(source, "SourceFilename", relativeToVRT="1").text = (
+                os.path.relpath(os.path.abspath(filepath), out_dir)
+            )
+            ET.SubElement(source, "SourceBand").text = str(band)
+            ET.SubElement(
+                source,
+                "SrcRect",
+                xOff="0",
+                yOff="0",
+                xSize=str(src_width),
+                ySize=str(src_height),
+            )
+            xoff, yoff, xsize, ysize = dst_window
+            ET.SubElement(
+                source,
+                "DstRect",
+                xOff=repr(float(xoff)),
+                yOff=repr(float(yoff)),
+                xSize=repr(float(xsize)),
+                ySize=repr(float(ysize)),
+            )
+
+    ET.ElementTree(root).write(out_file)
+
+
 def georeference_images(
-    data: pd.DataFrame, config: dict, in_dir: str, out_dir: str
+    data: pd.DataFrame,
+    config: dict,
+    in_dir: str,
+    out_dir: str,
+    driver: str = "GTiff",
+    mosaic: bool = False,
 ) -> None:
     """
     Georeferences and saves images from the specified directory using the given metadata.
 
+    With driver="VRT", no pixels are read or copied: each tile is saved as a small
+    GDAL virtual raster (`<UID>.vrt`) that points to the original image with the
+    computed transform and CRS, which rasterio (and `load_image`) can read like a GeoTIFF.
+
     Args:
         data (pd.DataFrame): DataFrame containing image metadata and geometries.
         config (dict): Configuration dictionary specifying image dimensions and other settings.
         in_dir (str): Directory where input images are located.
         out_dir (str): Directory where georeferenced images will be saved.
+        driver (str, optional): Output format, either "GTiff" (full copies) or "VRT"
+            (virtual rasters). Defaults to "GTiff".
+        mosaic (bool, optional): If True, also writes a mosaic VRT of all tiles next to
+            out_dir (`<out_dir>.vrt`), referencing the original images. Defaults to False.
 
     Returns:
         None
@@ -366,37 +755,60 @@ def georeference_images(
     filepaths = data_utils.get_image_filepaths(config, data, in_dir=in_dir)
     data = data.reset_index(drop=True)
 
+    # Read specific bands from the image
+    bands = [1, 2, 3]
+    # Define the CRS (Coordinate Reference System)
+    crs = {"init": "EPSG:3857"}
+    ext = ".vrt" if driver == "VRT" else ".tif"
+
+    # List to store the tiles of the mosaic
+    tiles = []
+
     # Iterate over each row in the DataFrame
     for index in tqdm(range(len(data)), total=len(data)):
         # Define the output filename for the georeferenced image
-        filename = os.path.join(out_dir, f"{data.iloc[index].UID}.tif")
+        filename = os.path.join(out_dir, f"{data.iloc[index].UID}{ext}")
+
+        # Get bounding box from the DataFrame for georeferencing
+        bounds = data.iloc[index].geometry.bounds
 
         # Check if the file already exists to avoid reprocessing
-        if not os.path.exists(filename):
-            # Open the input image file
-            dataset = rio.open(filepaths[index], "r")
-            if dataset.read().shape[0] < 3:
-                continue
+        if not os.path.exists(filename) or mosaic:
+            # Open the input image file (only the header is read for VRTs)
+            with rio.open(filepaths[index], "r") as src:
+                if src.count < 3:
+                    continue
+                size, dtype = (src.width, src.height), src.dtypes[0]
+                if mosaic:
+                    tiles.append((filepaths[index], size, bounds, dtype))
+                if os.path.exists(filename):
+                    continue
+
+                # Create a transformation matrix from the bounding box
+                transform = rio.transform.from_bounds(
+                    bounds[0],
+                    bounds[1],
+                    bounds[2],
+                    bounds[3],
+                    config["width"],
+                    config["height"],
+                )
 
-            # Read specific bands from the image
-            bands = [1, 2, 3]
-            # logging.info(filepaths[index])
-            dataset = dataset.read(bands)
-
-            # Get bounding box from the DataFrame for georeferencing
-            bounds = data.iloc[index].geometry.bounds
-
-            # Create a transformation matrix from the bounding box
-            transform = rio.transform.from_bounds(
-                bounds[0],
-                bounds[1],
-                bounds[2],
-                bounds[3],
-                config["width"],
-                config["height"],
-            )
-            # Define the CRS (Coordinate Reference System)
-            crs = {"init": "EPSG:3857"}
+                if driver == "VRT":
+                    # Reference the original pixels under the new transform
+                    write_vrt(
+                        filename,
+                        [(filepaths[index], size, (0, 0, *size))],
+                        config["width"],
+                        config["height"],
+                        transform,
+                        crs,
+                        dtype=dtype,
+                        bands=bands,
+                    )
+                    continue
+
+                dataset = src.read(bands)
 
             # Write the georeferenced image to the output file
             with rio.open(
@@ -413,6 +825,43 @@ def georeference_images(
             ) as dst:
                 dst.write(dataset, indexes=bands)
 
+    if mosaic and len(tiles) > 0:
+        # Place all tiles on a common grid at the resolution of the first tile
+        all_bounds = np.array([tile[2] for tile in tiles])
+        minx, miny = all_bounds[:, 0].min(), all_bounds[:, 1].min()
+        maxx, maxy = all_bounds[:, 2].max(), all_bounds[:, 3].max()
+        res_x = (all_bounds[0, 2] - all_bounds[0, 0]) / config["width"]
+        res_y = (all_bounds[0, 3] - all_bounds[0, 1]) / config["height"]
+        width = int(np.ceil((maxx - minx) / res_x))
+        height = int(np.ceil((maxy - miny) / res_y))
+        transform = rio.transform.from_origin(minx, maxy, res_x, res_y)
+
+        sources = [
+            (
+                filepath,
+                size,
+                (
+                    (bounds[0] - minx) / res_x,
+                    (maxy - bounds[3]) / res_y,
+                    (bounds[2] - bounds[0]) / res_x,
+                    (bounds[3] - bounds[1]) / res_y,
+                ),
+            )
+            for filepath, size, bounds, _ in tiles
+        ]
+        out_file = f"{os.path.normpath(out_dir)}.vrt"
+        write_vrt(
+            out_file,
+            sources,
+            width,
+            height,
+            transform,
+            crs,
+            dtype=tiles[0][3],
+            bands=bands,
+        )
+        logging.info(f"Mosaic of {len(tiles)} tiles saved to {out_file}")
+
 
 def compare_cams(
     iso_code: str,
@@ -422,10 +871,16 @@ def compare_cams(
     show: bool = True,
     metrics: bool = True,
     verbose: bool = False,
+    batch_size: int = None,
+    n_workers: int = 1,
 ) -> tuple:
     """
     Compares different CAM (Class Activation Map) methods on a set of images and computes their scores.
 
+    The model is loaded once and shared by all methods. Unless `show` is True, each method is
+    scored over batches of images (see `score_cam_method`), and on the CPU the methods can be
+    scored in parallel processes.
+
     Args:
         iso_code (str): ISO code for the region or dataset.
         config (dict): Configuration dictionary containing model and CAM settings.
@@ -434,35 +889,66 @@ def compare_cams(
         show (bool, optional): Whether to display CAM visualizations. Defaults to True.
         metrics (bool, optional): Whether to calculate metrics for CAMs. Defaults to True.
         verbose (bool, optional): Whether to print detailed logs. Defaults to False.
+        batch_size (int, optional): Number of images per batch. Defaults to the config's batch_size.
+        n_workers (int, optional): Number of parallel processes used to score the CAM methods
+            when running on the CPU. Defaults to 1.
 
     Returns:
         tuple: A dictionary of CAM scores for each method, and a dictionary of mean CAM scores for each method.
     """
     # Dictionary to store CAM scores for each method
     cam_scores = dict()
+    batch_size = batch_size or config["batch_size"]
 
-    # Iterate over each CAM method
-    for cam_name, cam in cams.items():
-        # Load the model and prepare it for evaluation
-        model = pred_utils.load_model(iso_code, config, verbose=verbose)
-        model.eval()
-        model = model.to(device)
+    # Load the model once and prepare it for evaluation
+    model = pred_utils.load_model(iso_code, config, verbose=verbose, backend="torch")
+    model.eval()
+    model = model.to(device)
+
+    if not show:
+        # Score the CAM methods over batches, in parallel processes if CPU-bound
+        n_workers = int(n_workers) if device.type == "cpu" else 1
+        n_threads = max(1, (os.cpu_count() or 1) // n_workers)
+        if n_workers > 1:
+            scores = joblib.Parallel(n_jobs=n_workers)(
+                joblib.delayed(score_cam_method)(
+                    config,
+                    filepaths,
+                    model,
+                    cam_name,
+                    percentile,
+                    metrics=metrics,
+                    batch_size=batch_size,
+                    n_threads=n_threads,
+                )
+                for cam_name in cams
+            )
+        else:
+            scores = [
+                score_cam_method(
+                    config,
+                    filepaths,
+                    model,
+                    cam_name,
+                    percentile,
+                    metrics=metrics,
+                    batch_size=batch_size,
+                )
+                for cam_name in cams
+            ]
+        cam_scores = dict(zip(cams, scores))
 
+    # Iterate over each CAM method to display the CAMs of each image
+    for cam_name in cams if show else []:
         # Initialize a list to store scores for the current CAM method
         cam_scores[cam_name] = []
 
         # Get the CAM extractor for the current method
         with get_cam_extractor(config, model, cam_name) as cam_extractor:
-            cam_extractor.batch_size = config["batch_size"]
-
-            # Create a progress bar for processing the file paths
-            pbar = data_utils.create_progress_bar(filepaths) if not show else filepaths
+            cam_extractor.batch_size = batch_size
 
             # Process each file path
-            for filepath in pbar:
-                if not show:
-                    pbar.set_description(f"Processing {cam_name}")
-
+            for filepath in filepaths:
                 # Generate CAM for the current image and method
                 cam_map, point, score = generate_cam(
                     config,
@@ -486,6 +972,117 @@ def compare_cams(
     return cam_scores, cam_scores_mean
 
 
+def score_cam_method(
+    config: dict,
+    filepaths: list,
+    model: torch.nn.Module,
+    cam_name: str,
+    percentile: int = 90,
+    metrics: bool = True,
+    batch_size: int = 16,
+    n_threads: int = None,
+) -> list:
+    """
+    Scores a CAM method over batches of images with the ROAD (Most Relevant First) metric.
+
+    As in `generate_cam`, the score of an image is set to 0 if its ROAD perturbation
+    has no edges (i.e. the whole image was blurred away).
+
+    Args:
+        config (dict): Configuration dictionary containing model and image settings.
+        filepaths (list of str): List of file paths to the images to be processed.
+        model (torch.nn.Module): The model used to generate the CAMs.
+        cam_name (str): Name of the CAM method (see `cams`).
+        percentile (int, optional): Percentile for the CAM score threshold. Defaults to 90.
+        metrics (bool, optional): Whether to calculate the metric; if False, all scores are 0.
+            Defaults to True.
+        batch_size (int, optional): Number of images per batch. Defaults to 16.
+        n_threads (int, optional): Number of CPU threads used by torch, e.g. when running
+            in a parallel process. Defaults to None (unchanged).
+
+    Returns:
+        list: The CAM score of each image.
+    """
+    if n_threads:
+        torch.set_num_threads(n_threads)
+
+    transforms = cnn_utils.get_transforms(config["img_size"])
+    cam_metric = ROADMostRelevantFirst(percentile=percentile)
+
+    scores = []
+    with get_cam_extractor(config, model, cam_name) as cam_extractor:
+        cam_extractor.batch_size = batch_size
+
+        batches = list(range(0, len(filepaths), batch_size))
+        pbar = data_utils.create_progress_bar(batches)
+        pbar.set_description(f"Processing {cam_name}")
+        for index in pbar:
+            # Load and preprocess the images of the batch
+            images = [
+                load_image(filepath)
+                for filepath in filepaths[index : index + batch_size]
+            ]
+            input_tensor = torch.stack([transforms["test"](image) for image in images])
+            input_tensor = input_tensor.to(device)
+            targets = [ClassifierOutputTarget(1)] * len(images)
+
+            # Generate the CAM maps of the whole batch
+            cam_maps = cam_extractor(input_tensor=input_tensor, targets=targets)
+            if not metrics:
+                scores.extend([0] * len(images))
+                continue
+
+            # Calculate the CAM metric of the whole batch
+            batch_scores, road_visualizations = cam_metric(
+                input_tensor, cam_maps, targets, model, return_visualization=True
+            )
+
+            # Check that the road visualizations are not blank
+            for score, road_visualization in zip(batch_scores, road_visualizations):
+                road_visualization = road_visualization.cpu().numpy()
+                road_visualization = deprocess_image(
+                    road_visualization.transpose((1, 2, 0))
+                )
+                edges = skimage.feature.canny(
+                    image=cv2.cvtColor(road_visualization, cv2.COLOR_BGR2GRAY),
+                    sigma=3,
+                )
+                scores.append(float(score) if edges.any() else 0)
+
+    return scores
+
+
+def get_cam_results_key(
+    iso_code: str, config: dict, filepaths: list, percentile: int = 90
+) -> str:
+    """
+    Computes a hash of the model and data used to compare the CAM methods, so that
+    the CAM results of a model can be cached and only regenerated when the model
+    (i.e. the model file), the images, the percentile or the CAM methods change.
+
+    Args:
+        iso_code (str): ISO code for the region or dataset.
+        config (dict): Configuration dictionary of the model.
+        filepaths (list of str): List of file paths to the images.
+        percentile (int, optional): Percentile for the CAM score threshold. Defaults to 90.
+
+    Returns:
+        str: The hash of the model and data.
+    """
+    model_file = model_utils.get_model_file(iso_code, config)
+    model_stat = os.stat(model_file) if os.path.exists(model_file) else None
+
+    # Hash the model file metadata, the images, and the settings
+    key = {
+        "model": config["model"],
+        "model_file": [model_stat.st_size, model_stat.st_mtime] if model_stat else None,
+        "filepaths": sorted(os.path.basename(filepath) for filepath in filepaths),
+        "percentile": float(percentile),
+        "cams": list(cams),
+    }
+    return hashlib.md5(json.dumps(key, sort_keys=True).encode()).hexdigest()[:12]
+
+
 def compare_random(
     iso_code: str,
     data: pd.DataFrame,
@@ -516,7 +1113,7 @@ def compare_random(
         data = data[(data["class"] == config["pos_class"])]
 
     # Load and prepare the model
-    model = pred_utils.load_model(iso_code, config, verbose=verbose)
+    model = pred_utils.load_model(iso_code, config, verbose=verbose, backend="torch")
     model.eval()
 
     # Get the CAM extractor based on the specified method
@@ -575,7 +1172,7 @@ def generate_cam(
     logger.disabled = True
 
     # Load and preprocess the image
-    image = Image.open(filepath).convert("RGB")
+    image = load_image(filepath)
     transforms = cnn_utils.get_transforms(config["img_size"])
     input_tensor = transforms["test"](image).to(device).unsqueeze(0)
     input_image = input_tensor.detach().cpu().numpy()[0].transpose((1, 2, 0))
@@ -589,7 +1186,6 @@ def generate_cam(
     # Generate the CAM map
     targets = [ClassifierOutputTarget(1)]
     cam_map = cam_extractor(input_tensor=input_tensor, targets=targets)
-    result = show_cam_on_image(input_image, cam_map[0, :], use_rgb=True)
     point = generate_point_from_cam(config, cam_map[0, :], image)
 
     score = 0
@@ -612,6 +1208,7 @@ def generate_cam(
 
     if show:
         # Display the CAM results
+        result = show_cam_on_image(input_image, cam_map[0, :], use_rgb=True)
         road_visualization = Image.fromarray(road_visualization)
         thresh_cam = cam_map < np.percentile(cam_map, percentile)
         thresh_cam = thresh_cam.transpose((0, 1, 2))[0, :, :]
@@ -646,8 +1243,177 @@ def generate_cam(
     return cam_map, point, score
 
 
+def generate_cams(
+    config: dict,
+    filepaths: list,
+    cam_extractor,
+    batch_size: int = 16,
+    analytic: bool = False,
+    top_k: int = 1,
+    return_maps: bool = False,
+) -> tuple:
+    """
+    Generates Class Activation Maps (CAMs) and their peak points for batches of images.
+
+    The peaks are found per batch and the CAM maps are discarded afterwards, unless
+    `return_maps` is set (the maps take img_size x img_size floats per image).
+
+    Args:
+        config (dict): Configuration dictionary containing model and image settings.
+        filepaths (list): List of paths to the image files.
+        cam_extractor (callable): The CAM extractor object (see `get_cam_extractor`).
+        batch_size (int, optional): Number of images per batch. Defaults to 16.
+        analytic (bool, optional): If True, finds the peaks at CAM resolution and maps them
+            back to image coordinates (see `find_cam_peaks`). Defaults to False.
+        top_k (int, optional): Maximum number of peaks per image. Defaults to 1.
+        return_maps (bool, optional): If True, also returns the CAM maps. Defaults to False.
+
+    Returns:
+        tuple: A tuple containing:
+            - cam_maps (numpy.ndarray): The CAM maps of shape (N, H, W) at the model's input
+                size, or None if `return_maps` is False.
+            - points (numpy.ndarray): The (x, y) pixel coordinates of the CAM peaks in each
+                image, of shape (N, top_k, 2).
+            - mask (numpy.ndarray): Boolean array of shape (N, top_k) flagging the valid peaks.
+    """
+    transforms = cnn_utils.get_transforms(config["img_size"])
+    targets = [ClassifierOutputTarget(1)] * batch_size
+
+    cam_maps, points, masks = [], [], []
+    batches = list(range(0, len(filepaths), batch_size))
+    for index in data_utils.create_progress_bar(batches):
+        # Load and preprocess the images of the batch
+        images = [
+            load_image(filepath) for filepath in filepaths[index : index + batch_size]
+        ]
+        input_tensor = torch.stack([transforms["test"](image) for image in images])
+
+        # Generate the CAM maps of the whole batch
+        batch_maps = cam_extractor(
+            input_tensor=input_tensor.to(device), targets=targets[: len(images)]
+        )
+
+        # Find the CAM peaks of the batch, grouping the images by size
+        batch_points = np.zeros((len(images), top_k, 2), dtype=int)
+        batch_mask = np.zeros((len(images), top_k), dtype=bool)
+        sizes = [image.size for image in images]
+        for size in set(sizes):
+            subset = [i for i in range(len(images)) if sizes[i] == size]
+            peaks, mask = find_cam_peaks(
+                torch.from_numpy(batch_maps[subset]).to(device),
+                image_size=size,
+                analytic=analytic,
+                top_k=top_k,
+            )
+            batch_points[subset, : peaks.shape[1]] = peaks
+            batch_mask[subset, : mask.shape[1]] = mask
+
+        if return_maps:
+            cam_maps.append(batch_maps)
+        points.append(batch_points)
+        masks.append(batch_mask)
+
+    if len(points) == 0:
+        cam_maps = [np.zeros((0, config["img_size"], config["img_size"]))]
+        points = [np.zeros((0, top_k, 2), dtype=int)]
+        masks = [np.zeros((0, top_k), dtype=bool)]
+
+    cam_maps = np.concatenate(cam_maps) if return_maps else None
+    return cam_maps, np.concatenate(points), np.concatenate(masks)
+
+
+def find_cam_peaks(
+    cam_maps,
+    image_size: tuple = None,
+    analytic: bool = False,
+    top_k: int = 1,
+    min_distance: int = 1,
+    min_ratio: float = 0.5,
+) -> tuple:
+    """
+    Finds the peak activations of a batch of Class Activation Maps (CAMs) using tensor operations.
+
+    By default, the CAMs are resized to the image size (on the CAM device) and the peaks are
+    located with a single argmax over the resized maps. If `analytic` is True, the peaks are
+    found at CAM resolution and mapped back to image coordinates through the pixel-center
+    scaling between the two grids, which avoids the resize altogether.
+
+    When `top_k` > 1, peaks are restricted to local maxima within `min_distance` CAM pixels
+    (non-maximum suppression via max pooling) and secondary peaks are only kept if their
+    activation is at least `min_ratio` times the tile's highest activation.
+
+    Args:
+        cam_maps (torch.Tensor or np.ndarray): CAM maps of shape (N, h, w) or (h, w).
+        image_size (tuple, optional): The (width, height) of the images, as returned by
+            `PIL.Image.size`. Defaults to None (the CAM resolution).
+        analytic (bool, optional): If True, finds the peaks at CAM resolution. Defaults to False.
+        top_k (int, optional): Maximum number of peaks per map. Defaults to 1.
+        min_distance (int, optional): Minimum distance between peaks in CAM pixels
+            (only used when top_k > 1). Defaults to 1.
+        min_ratio (float, optional): Minimum activation of secondary peaks relative to the
+            highest activation (only used when top_k > 1). Defaults to 0.5.
+
+    Returns:
+        tuple: A tuple containing:
+            - peaks (numpy.ndarray): The (x, y) image coordinates of the peaks, of shape (N, top_k, 2).
+            - mask (numpy.ndarray): Boolean array of shape (N, top_k) flagging the valid peaks.
+    """
+    if not torch.is_tensor(cam_maps):
+        cam_maps = torch.from_numpy(np.asarray(cam_maps))
+    if cam_maps.ndim == 2:
+        cam_maps = cam_maps.unsqueeze(0)
+    cam_maps = cam_maps.float().unsqueeze(1)
+
+    # Image and CAM sizes, as (height, width)
+    cam_height, cam_width = cam_maps.shape[-2:]
+    height, width = (
+        (image_size[1], image_size[0]) if image_size else (cam_height, cam_width)
+    )
+
+    # Resize the CAMs to the image size, unless the peaks are mapped analytically
+    if not analytic and (height, width) != (cam_height, cam_width):
+        cam_maps = nnf.interpolate(
+            cam_maps, size=(height, width), mode="bilinear", align_corners=False
+        )
+    n_maps, _, map_height, map_width = cam_maps.shape
+
+    # Keep only local maxima when more than one peak is requested
+    top_k = min(top_k, map_height * map_width)
+    if top_k > 1:
+        kernel = 2 * min_distance + 1
+        if not analytic:
+            # Scale the suppression window to the image resolution
+            kernel = 2 * round(min_distance * height / cam_height) + 1
+        pooled = nnf.max_pool2d(cam_maps, kernel, stride=1, padding=kernel // 2)
+        cam_maps = torch.where(
+            cam_maps == pooled, cam_maps, torch.full_like(cam_maps, -float("inf"))
+        )
+
+    # Find the peaks over the flattened maps in one op
+    cam_maps = cam_maps.reshape(n_maps, -1)
+    if top_k == 1:
+        # argmax returns the first maximum, matching a row-major scan
+        indices = cam_maps.argmax(dim=1, keepdim=True)
+        values = cam_maps.gather(1, indices)
+    else:
+        values, indices = cam_maps.topk(top_k, dim=1)
+    rows = torch.div(indices, map_width, rounding_mode="floor")
+    cols = indices % map_width
+    mask = values >= values[:, :1] * min_ratio
+    mask[:, 0] = True
+
+    if analytic and (height, width) != (cam_height, cam_width):
+        # Map the CAM pixel centers to the image grid
+        cols = ((cols.float() + 0.5) * width / cam_width - 0.5).round().long()
+        rows = ((rows.float() + 0.5) * height / cam_height - 0.5).round().long()
+        cols, rows = cols.clamp(0, width - 1), rows.clamp(0, height - 1)
+
+    peaks = torch.stack([cols, rows], dim=-1)
+    return peaks.cpu().numpy(), mask.cpu().numpy()
+
+
 def generate_point_from_cam(
-    config: dict, cam_map: np.ndarray, image: PIL.Image
+    config: dict, cam_map: np.ndarray, image: PIL.Image, analytic: bool = False
 ) -> tuple:
     """
     Generates a point of interest from the Class Activation Map (CAM)
@@ -657,27 +1423,14 @@ def generate_point_from_cam(
         config (dict): Configuration dictionary containing model and image settings.
         cam_map (torch.Tensor or np.ndarray): The CAM map as a tensor or NumPy array.
         image (PIL.Image): The input image used for CAM generation.
+        analytic (bool, optional): If True, finds the peak at CAM resolution and maps it
+            back to image coordinates (see `find_cam_peaks`). Defaults to False.
 
     Returns:
         tuple: The (x, y) coordinates of the point with the highest activation in the CAM map.
     """
-    if torch.is_tensor(cam_map):
-        cam_map = np.array(cam_map.cpu())
-
-    # Convert CAM map to tensor
-    ten_map = torch.tensor(cam_map)
-    transform = transforms.Resize(size=(image.size[0], image.size[1]), antialias=None)
-    ten_map = transform(ten_map.unsqueeze(0)).squeeze()
-
-    values = []
-    for i in range(0, ten_map.shape[0]):
-        # Find the maximum value and its index in each channel
-        index, value = max(enumerate(ten_map[i]), key=operator.itemgetter(1))
-        values.append(value)
-
-    # Find the channel with the maximum activation
-    y_index, y_value = max(enumerate(values), key=operator.itemgetter(1))
-    x_index, x_value = max(enumerate(ten_map[y_index]), key=operator.itemgetter(1))
+    peaks, _ = find_cam_peaks(cam_map, image_size=image.size, analytic=analytic)
 
     # Return the coordinates of the maximum activation point
-    return (x_index, y_index)
+    x_index, y_index = peaks[0, 0]
+    return (int(x_index), int(y_index))
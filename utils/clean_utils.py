@@ -2,7 +2,6 @@ import os
 import numpy as np
 import geopandas as gpd
 import rasterio as rio
-from rasterio.mask import mask
 
 from utils import data_utils
 import logging
@@ -70,34 +69,13 @@ def sample_points(
     points = points[~points["index"].isin(intersecting)]
     points["geometry"] = points["geometry"].centroid
 
-    # Sample points from the microsoft raster
+    # Sample points from the building rasters (see `data_utils.build_integral_image`)
     points = points.to_crs("EPSG:3857")
-    coord_list = [(x, y) for x, y in zip(points["geometry"].x, points["geometry"].y)]
-
-    points = points.to_crs("ESRI:54009")
-    ghsl_coord_list = [
-        (x, y) for x, y in zip(points["geometry"].x, points["geometry"].y)
-    ]
-    raster_dir = os.path.join(os.getcwd(), config["rasters_dir"])
-
-    # Filter points with pixel value greater than 0 and convert back to EPSG:4326
-    ms_path = os.path.join(raster_dir, "ms_buildings", f"{iso_code}_ms.tif")
-    points["ms_val"] = 0
-    if os.path.exists(ms_path):
-        with rio.open(ms_path) as src:
-            points["ms_val"] = [x[0] for x in src.sample(coord_list)]
-
-    google_path = os.path.join(raster_dir, "google_buildings", f"{iso_code}_google.tif")
-    points["google_val"] = 0
-    if os.path.exists(google_path):
-        with rio.open(google_path) as src:
-            points["google_val"] = [x[0] for x in src.sample(coord_list)]
-
-    ghsl_path = os.path.join(raster_dir, "ghsl", config["ghsl_built_c_file"])
-    col_val = "ghsl_val" if "ms_val" in points.columns else "pixel_val"
-    points[col_val] = 0
-    with rio.open(ghsl_path) as src:
-        points[col_val] = [x[0] for x in src.sample(ghsl_coord_list)]
+    for source in ["ms", "google", "ghsl"]:
+        integral = data_utils.load_integral_image(iso_code, config, source)
+        points[f"{source}_val"] = 0
+        if integral is not None:
+            points[f"{source}_val"] = data_utils.pixel_values(integral, points)
 
     points["pixel_val"] = points[["ms_val", "google_val", "ghsl_val"]].max(axis=1)
     points = points[points["pixel_val"] > 0]
@@ -210,6 +188,10 @@ def filter_uninhabited_locations(
     """
     Filters uninhabited locations based on building footprint raster data.
 
+    The building pixels within the buffered box of each location are summed in constant
+    time with the summed-area tables of the building rasters (see
+    `data_utils.build_integral_image`); for GHSL, the box is taken in ESRI:54009.
+
     Args:
         iso_code (str): ISO code for the country to process.
         data (GeoDataFrame): GeoDataFrame containing data to filter.
@@ -225,58 +207,20 @@ def filter_uninhabited_locations(
     """
     data = data.reset_index(drop=True)
     buffer_size = config["filter_buffer_size"]
+    logging.info(f"Processing {iso_code} {shape_name} ({len(data)} locations)...")
+
+    # Buffer the locations into square boxes
+    boxes = data.to_crs("EPSG:3857")
+    boxes["geometry"] = boxes["geometry"].buffer(buffer_size, cap_style=3)
 
-    # Generate file paths based on the iso_code and source
-    raster_dir = os.path.join(os.getcwd(), config["rasters_dir"])
-    ms_path = os.path.join(raster_dir, "ms_buildings", f"{iso_code}_ms.tif")
-    google_path = os.path.join(raster_dir, "google_buildings", f"{iso_code}_google.tif")
-    ghsl_path = os.path.join(raster_dir, "ghsl", config["ghsl_built_c_file"])
-
-    pixel_sums = []
-    for index in (pbar := data_utils.create_progress_bar(range(len(data)))):
-        pbar.set_description(f"Processing {iso_code} {shape_name} {index}/{len(data)}")
-
-        # Extract a single row from the DataFrame
-        subdata = data.iloc[[index]]
-        subdata = subdata.to_crs("EPSG:3857")
-        subdata["geometry"] = subdata["geometry"].buffer(buffer_size, cap_style=3)
-
-        # Mask the raster data with the buffered geometry from Microsoft
-        image = []
-        pixel_sum = 0
-        if os.path.exists(ms_path):
-            with rio.open(ms_path) as src:
-                try:
-                    geometry = [subdata.iloc[0]["geometry"]]
-                    image, transform = rio.mask.mask(src, geometry, crop=True)
-                    image[image == 255] = 1
-                    pixel_sum = np.sum(image)
-                except:
-                    pass
-
-        # If no building pixels found, attempt with Google Open Buildings
-        if pixel_sum == 0:
-            if os.path.exists(google_path):
-                with rio.open(google_path) as src:
-                    try:
-                        geometry = [subdata.iloc[0]["geometry"]]
-                        image, transform = rio.mask.mask(src, geometry, crop=True)
-                        image[image == 255] = 1
-                        pixel_sum = np.sum(image)
-                    except:
-                        pass
-
-        # If no building pixels found, attempt with GHSL data
-        if pixel_sum == 0:
-            with rio.open(ghsl_path) as src:
-                subdata = subdata.to_crs("ESRI:54009")
-                geometry = [subdata.iloc[0]["geometry"]]
-                image, transform = rio.mask.mask(src, geometry, crop=True)
-                image[image == 255] = 0  # no pixel value
-                pixel_sum = np.sum(image)
-
-        # Appending the pixel sum to the list
-        pixel_sums.append(pixel_sum)
+    # Sum the building pixels with the summed-area tables of the Microsoft raster,
+    # then of Google Open Buildings and GHSL for the locations with no building pixels
+    pixel_sums = np.zeros(len(data))
+    for source in ["ms", "google", "ghsl"]:
+        integral = data_utils.load_integral_image(iso_code, config, source)
+        missing = pixel_sums == 0
+        if integral is not None and missing.any():
+            pixel_sums[missing] = data_utils.box_sums(integral, boxes[missing])
 
     # Filter data based on pixel sums and updating DataFrame accordingly
     data["sum"] = pixel_sums
@@ -413,10 +357,11 @@ def clean_data(
     if not os.path.exists(out_file):
         data[name] = 0
         geoboundaries = data_utils.get_geoboundaries(config, iso_code, adm_level="ADM1")
-        geoboundaries = geoboundaries[["shapeName", "geometry"]].dropna(
-            subset=["shapeName"]
+        matches = data_utils.assign_geoboundary(
+            config, iso_code, data, adm_level="ADM1"
         )
-        data = data.sjoin(geoboundaries, how="left", predicate="within")
+        shapenames = geoboundaries["shapeName"].to_numpy()[np.maximum(matches, 0)]
+        data["shapeName"] = np.where(matches >= 0, shapenames, None)
         data.loc[data["shapeName"].isna(), "clean"] = 3
         data.loc[data["geometry"].duplicated(keep="first"), "clean"] = 2
 
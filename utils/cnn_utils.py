@@ -164,6 +164,40 @@ class SchoolDataset(Dataset):
         return len(self.dataset)
 
 
+class DistillDataset(SchoolDataset):
+    """
+    A dataset of labelled and unlabelled images with the soft probabilities of a teacher ensemble.
+
+    The dataset DataFrame must contain a "soft_prob" column with the probability of the positive
+    class predicted by the teacher. Unlabelled images have a missing "class" and are given the
+    label -1.
+    """
+
+    def __getitem__(self, index: int):
+        """
+        Retrieves an item from the dataset at the specified index.
+
+        Args:
+            index (int): Index of the item to retrieve.
+
+        Returns:
+            tuple: A tuple containing the transformed image tensor, class label (-1 if unlabelled),
+                soft probability of the positive class, and the UID.
+        """
+        item = self.dataset.iloc[index]
+
+        # Open the image and apply transformations if any
+        image = Image.open(item["filepath"]).convert("RGB")
+        x = self.transform(image) if self.transform else image
+        image.close()
+
+        # Get the class label and the teacher's soft probability
+        y = self.classes.get(item["class"], -1)
+        soft_prob = torch.tensor(item["soft_prob"], dtype=torch.float)
+
+        return x, y, soft_prob, item["UID"]
+
+
 def visualize_data(
     data: dict,
     data_loader: dict,
@@ -281,6 +315,111 @@ def load_dataset(config: dict, phases: list, verbose: bool = True) -> tuple:
     return data, data_loader, classes
 
 
+def load_distill_dataset(
+    config: dict,
+    phases: list,
+    soft_labels: pd.DataFrame,
+    unlabelled: pd.DataFrame = None,
+    verbose: bool = True,
+) -> tuple:
+    """
+    Loads the dataset for distillation, where the training set is labelled with the soft
+    probabilities of a teacher ensemble and extended with unlabelled tiles.
+
+    Args:
+        config (dict): Configuration dictionary (see `load_dataset`).
+        phases (list): List of dataset phases to load (e.g., ["train", "val", "test"]).
+        soft_labels (pd.DataFrame): Teacher probabilities of the training tiles,
+            with "UID" and "soft_prob" columns.
+        unlabelled (pd.DataFrame, optional): Unlabelled tiles with "UID", "filepath",
+            and "soft_prob" columns. Defaults to None.
+        verbose (bool, optional): If True, prints additional information. Defaults to True.
+
+    Returns:
+        tuple: A tuple containing the datasets, data loaders, and class labels (see `load_dataset`).
+            The training set is a DistillDataset.
+    """
+    data, data_loader, classes = load_dataset(config, phases=phases, verbose=verbose)
+
+    # Attach the teacher probabilities to the labelled training tiles
+    train = data["train"].dataset.merge(
+        soft_labels[["UID", "soft_prob"]], on="UID", how="inner"
+    )
+
+    # Add the unlabelled tiles
+    if unlabelled is not None and len(unlabelled) > 0:
+        unlabelled = unlabelled[["UID", "filepath", "soft_prob"]].assign(
+            **{"class": np.nan}
+        )
+        train = pd.concat([train, unlabelled], ignore_index=True)
+    train = train.sample(frac=1, random_state=SEED).reset_index(drop=True)
+
+    if verbose:
+        logging.info(
+            f"Distillation set: {train['class'].notna().sum()} labelled, "
+            f"{train['class'].isna().sum()} unlabelled"
+        )
+
+    # Replace the training set and loader
+    data["train"] = DistillDataset(
+        train,
+        data["train"].classes,
+        data["train"].transform,
+        normalize=config["normalize"],
+    )
+    data_loader["train"] = torch.utils.data.DataLoader(
+        data["train"],
+        batch_size=config["batch_size"],
+        num_workers=config["n_workers"],
+        shuffle=True,
+        drop_last=True,
+    )
+    return data, data_loader, classes
+
+
+def allocate_buffers(
+    data_loader: DataLoader, device: torch.device
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Preallocates on-device buffers for the labels, predictions, and probabilities
+    of one pass over the data loader.
+
+    Args:
+        data_loader (torch.utils.data.DataLoader): DataLoader to be iterated over.
+        device (torch.device): Device on which to allocate the buffers.
+
+    Returns:
+        Tuple[torch.Tensor, torch.Tensor, torch.Tensor]: Buffers for the actual labels,
+            predicted labels, and prediction probabilities. The buffers are sized to
+            an upper bound of the number of samples yielded by the data loader.
+    """
+    # Number of batches times the batch size bounds the number of samples,
+    # regardless of whether the last incomplete batch is dropped
+    if data_loader.batch_size is not None:
+        size = len(data_loader) * data_loader.batch_size
+    else:
+        size = len(data_loader.dataset)
+
+    y_actuals = torch.empty(size, dtype=torch.long, device=device)
+    y_preds = torch.empty(size, dtype=torch.long, device=device)
+    y_probs = torch.empty(size, dtype=torch.float, device=device)
+    return y_actuals, y_preds, y_probs
+
+
+def transfer_buffers(buffers: tuple, n_samples: int) -> Tuple[np.ndarray, ...]:
+    """
+    Transfers the filled part of on-device buffers to the host.
+
+    Args:
+        buffers (tuple): Tuple of on-device buffers created by `allocate_buffers`.
+        n_samples (int): Number of samples written to the buffers.
+
+    Returns:
+        Tuple[np.ndarray, ...]: The filled part of each buffer as a NumPy array.
+    """
+    return tuple(buffer[:n_samples].cpu().numpy() for buffer in buffers)
+
+
 def train(
     data_loader: DataLoader,
     model: nn.Module,
@@ -314,14 +453,17 @@ def train(
     # Set the model to training mode
     model.train()
 
-    # Initialize lists to store actual labels, predicted labels, and prediction probabilities
-    y_actuals, y_preds, y_probs = [], [], []
-    running_loss = 0.0
+    # Preallocate on-device buffers for actual labels, predicted labels,
+    # and prediction probabilities to avoid per-batch host syncs
+    y_actuals, y_preds, y_probs = allocate_buffers(data_loader, device)
+    running_loss = torch.zeros((), device=device)
+    n_samples = 0
 
     # Iterate over batches of data from the data loader
     for inputs, labels, _ in tqdm(data_loader, total=len(data_loader)):
         inputs = inputs.to(device)  # Move inputs to the specified device
         labels = labels.to(device)  # Move labels to the specified device
+        batch_size = inputs.size(0)
 
         # Zero the parameter gradients
         optimizer.zero_grad()
@@ -336,13 +478,20 @@ def train(
             loss.backward()  # Backward pass
             optimizer.step()  # Optimize the model parameters
 
-            running_loss += loss.item() * inputs.size(0)
-            y_actuals.extend(labels.cpu().numpy().tolist())
-            y_preds.extend(preds.data.cpu().numpy().tolist())
-            y_probs.extend(probs.data.cpu().numpy().tolist())
+        # Accumulate the loss and predictions on the device
+        running_loss += loss.detach() * batch_size
+        y_actuals[n_samples : n_samples + batch_size] = labels
+        y_preds[n_samples : n_samples + batch_size] = preds.detach()
+        y_probs[n_samples : n_samples + batch_size] = probs.detach()
+        n_samples += batch_size
+
+    # Transfer the filled part of the buffers to the host once per epoch
+    y_actuals, y_preds, y_probs = transfer_buffers(
+        (y_actuals, y_preds, y_probs), n_samples
+    )
 
     # Calculate epoch loss
-    epoch_loss = running_loss / len(data_loader)
+    epoch_loss = running_loss.item() / max(n_samples, 1)
 
     # Evaluate the model's performance
     epoch_results = eval_utils.evaluate(
@@ -371,6 +520,107 @@ def train(
     return epoch_results
 
 
+def distill_train(
+    data_loader: DataLoader,
+    model: nn.Module,
+    optimizer: optim.Optimizer,
+    device: torch.device,
+    logging: Any,
+    pos_label: int,
+    beta: float,
+    alpha: float = 0.0,
+    wandb: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    Train a student model for one epoch on the soft probabilities of a teacher ensemble.
+
+    The loss is the cross-entropy between the student's predicted distribution and the teacher's
+    distribution, optionally mixed with the cross-entropy on the hard labels of labelled images.
+
+    Args:
+        data_loader (torch.utils.data.DataLoader): DataLoader of a DistillDataset.
+        model (nn.Module): The student model to train.
+        optimizer (optim.Optimizer): Optimizer for training.
+        device (torch.device): Device to run the model on.
+        logging (Any): Logging object for logging training progress.
+        pos_label (int): Positive class label.
+        beta (float): Weight of precision in the F-beta score.
+        alpha (float, optional): Weight of the hard-label loss. Defaults to 0.0.
+        wandb (Any, optional): Weights & Biases object for logging. Defaults to None.
+
+    Returns:
+        Dict[str, Any]: Dictionary containing the training loss and the evaluation metrics
+            on the labelled images.
+    """
+    # Set the model to training mode
+    model.train()
+
+    # Preallocate on-device buffers for actual labels, predicted labels, and probabilities
+    y_actuals, y_preds, y_probs = allocate_buffers(data_loader, device)
+    running_loss = torch.zeros((), device=device)
+    n_samples = 0
+
+    for inputs, labels, soft_probs, _ in tqdm(data_loader, total=len(data_loader)):
+        inputs = inputs.to(device)
+        labels = labels.to(device)
+        soft_probs = soft_probs.to(device)
+        batch_size = inputs.size(0)
+
+        # Zero the parameter gradients
+        optimizer.zero_grad()
+
+        with torch.set_grad_enabled(True):
+            outputs = model(inputs)
+            _, preds = torch.max(outputs, 1)
+            probs = nnf.softmax(outputs, dim=1)[:, 1]
+
+            # Cross-entropy with the teacher's distribution over (negative, positive)
+            targets = torch.stack([1 - soft_probs, soft_probs], dim=1)
+            loss = -(targets * nnf.log_softmax(outputs, dim=1)).sum(dim=1).mean()
+
+            # Optionally mix in the hard-label loss of the labelled images
+            labelled = labels >= 0
+            if alpha > 0 and labelled.any():
+                hard_loss = nnf.cross_entropy(outputs[labelled], labels[labelled])
+                loss = (1 - alpha) * loss + alpha * hard_loss
+
+            loss.backward()  # Backward pass
+            optimizer.step()  # Optimize the model parameters
+
+        # Accumulate the loss and predictions on the device
+        running_loss += loss.detach() * batch_size
+        y_actuals[n_samples : n_samples + batch_size] = labels
+        y_preds[n_samples : n_samples + batch_size] = preds.detach()
+        y_probs[n_samples : n_samples + batch_size] = probs.detach()
+        n_samples += batch_size
+
+    # Transfer the filled part of the buffers to the host once per epoch
+    y_actuals, y_preds, y_probs = transfer_buffers(
+        (y_actuals, y_preds, y_probs), n_samples
+    )
+    epoch_loss = running_loss.item() / max(n_samples, 1)
+
+    # Evaluate the model's performance on the labelled images
+    labelled = y_actuals >= 0
+    epoch_results = eval_utils.evaluate(
+        y_actuals[labelled], y_preds[labelled], y_probs[labelled], pos_label, beta=beta
+    )
+
+    # Add loss to the results
+    epoch_results["loss"] = epoch_loss
+    epoch_results = {f"train_{key}": val for key, val in epoch_results.items()}
+
+    # Log the results
+    learning_rate = optimizer.param_groups[0]["lr"]
+    log_results = {key: val for key, val in epoch_results.items() if key[-1] != "_"}
+    logging.info(f"Train (distill): {log_results} LR: {learning_rate}")
+
+    # Log results to Weights & Biases if available
+    if wandb is not None:
+        wandb.log(log_results)
+    return epoch_results
+
+
 def evaluate(
     data_loader: DataLoader,
     class_names: list,
@@ -407,9 +657,12 @@ def evaluate(
     # Set the model to evaluation mode
     model.eval()
 
-    # Initialize lists to store UIDs, actual labels, predicted labels, and prediction probabilities
-    y_uids, y_actuals, y_preds, y_probs = [], [], [], []
-    running_loss = 0.0  # Initialize running loss
+    # Preallocate on-device buffers for actual labels, predicted labels,
+    # and prediction probabilities; UIDs are strings and stay on the host
+    y_uids = []
+    y_actuals, y_preds, y_probs = allocate_buffers(data_loader, device)
+    running_loss = torch.zeros((), device=device)  # Initialize running loss
+    n_samples = 0
     confusion_matrix = torch.zeros(
         len(class_names), len(class_names)
     )  # Initialize confusion matrix
@@ -418,6 +671,7 @@ def evaluate(
     for inputs, labels, uids in tqdm(data_loader, total=len(data_loader)):
         inputs = inputs.to(device)  # Move inputs to the specified device
         labels = labels.to(device)  # Move labels to the specified device
+        batch_size = inputs.size(0)
 
         # Disable gradient calculation for evaluation
         with torch.set_grad_enabled(False):
@@ -427,15 +681,21 @@ def evaluate(
             probs = soft_outputs[:, 1]
             loss = criterion(outputs, labels)
 
-        # Update running loss
-        running_loss += loss.item() * inputs.size(0)
-        y_actuals.extend(labels.cpu().numpy().tolist())
-        y_preds.extend(preds.data.cpu().numpy().tolist())
-        y_probs.extend(probs.data.cpu().numpy().tolist())
+        # Accumulate the loss and predictions on the device
+        running_loss += loss * batch_size
+        y_actuals[n_samples : n_samples + batch_size] = labels
+        y_preds[n_samples : n_samples + batch_size] = preds
+        y_probs[n_samples : n_samples + batch_size] = probs
         y_uids.extend(uids)
+        n_samples += batch_size
+
+    # Transfer the filled part of the buffers to the host once per epoch
+    y_actuals, y_preds, y_probs = transfer_buffers(
+        (y_actuals, y_preds, y_probs), n_samples
+    )
 
     # Calculate epoch loss
-    epoch_loss = running_loss / len(data_loader)
+    epoch_loss = running_loss.item() / max(n_samples, 1)
 
     # Evaluate the model's performance
     epoch_results = eval_utils.evaluate(
@@ -512,7 +772,7 @@ def get_transforms(
     return transformations
 
 
-def get_model(model_type: str, n_classes: int) -> nn.Module:
+def get_model(model_type: str, n_classes: int, pretrained: bool = True) -> nn.Module:
     """
     Get a pretrained model with the specified architecture and modify the
     final layer to match the number of classes.
@@ -520,68 +780,99 @@ def get_model(model_type: str, n_classes: int) -> nn.Module:
     Args:
         model_type (str): The type of model to load (e.g., "resnet18", "inception_v3").
         n_classes (int): The number of output classes for the final layer.
+        pretrained (bool, optional): If False, builds the architecture with randomly
+            initialized weights, without downloading any pretrained weights. Use this
+            when the weights are overwritten by a trained checkpoint. Defaults to True.
 
     Returns:
         nn.Module: The modified model with the final layer adjusted for the specified number of classes.
     """
 
+    def get_weights(weights):
+        # Skip the pretrained weights when they are overwritten by a trained checkpoint
+        return weights if pretrained else None
+
     if "resnet" in model_type:
         if model_type == "resnet18":
-            model = models.resnet18(weights=ResNet18_Weights.DEFAULT)
+            model = models.resnet18(weights=get_weights(ResNet18_Weights.DEFAULT))
         elif model_type == "resnet34":
-            model = models.resnet34(weights=ResNet34_Weights.DEFAULT)
+            model = models.resnet34(weights=get_weights(ResNet34_Weights.DEFAULT))
         elif model_type == "resnet50":
-            model = models.resnet50(weights=ResNet50_Weights.DEFAULT)
+            model = models.resnet50(weights=get_weights(ResNet50_Weights.DEFAULT))
         elif model_type == "resnet50_fmow_rgb_gassl":
             weights = ResNet50_Weights.FMOW_RGB_GASSL
             model = timm.create_model(
                 "resnet50", in_chans=weights.meta["in_chans"], num_classes=n_classes
             )
-            model.load_state_dict(weights.get_state_dict(progress=True), strict=False)
+            if pretrained:
+                model.load_state_dict(
+                    weights.get_state_dict(progress=True), strict=False
+                )
 
         num_ftrs = model.fc.in_features
         model.fc = nn.Linear(num_ftrs, n_classes)
 
     elif "inception" in model_type:
-        model = models.inception_v3(weights=Inception_V3_Weights.IMAGENET1K_V1)
+        model = models.inception_v3(
+            weights=get_weights(Inception_V3_Weights.IMAGENET1K_V1)
+        )
         model.aux_logits = False
         num_ftrs = model.fc.in_features
         model.fc = nn.Linear(num_ftrs, n_classes)
 
     elif "vgg" in model_type:
-        model = models.vgg16(weights=VGG16_Weights.IMAGENET1K_V1)
+        model = models.vgg16(weights=get_weights(VGG16_Weights.IMAGENET1K_V1))
         num_ftrs = model.classifier[6].in_features
         model.classifier[6] = nn.Linear(num_ftrs, n_classes)
 
     elif "efficientnet" in model_type:
-        model = models.efficientnet_b0(weights=EfficientNet_B0_Weights.IMAGENET1K_V1)
+        model = models.efficientnet_b0(
+            weights=get_weights(EfficientNet_B0_Weights.IMAGENET1K_V1)
+        )
         num_ftrs = model.classifier[1].in_features
         model.classifier[1] = nn.Linear(num_ftrs, n_classes)
 
     elif "xception" in model_type:
-        model = timm.create_model("xception", pretrained=True, num_classes=n_classes)
+        model = timm.create_model(
+            "xception", pretrained=pretrained, num_classes=n_classes
+        )
 
     elif "convnext" in model_type:
         if "small" in model_type:
-            model = models.convnext_small(weights="IMAGENET1K_V1")
+            model = models.convnext_small(weights=get_weights("IMAGENET1K_V1"))
         elif "base" in model_type:
-            model = models.convnext_base(weights="IMAGENET1K_V1")
+            model = models.convnext_base(weights=get_weights("IMAGENET1K_V1"))
         elif "large" in model_type:
-            model = models.convnext_large(weights="IMAGENET1K_V1")
+            model = models.convnext_large(weights=get_weights("IMAGENET1K_V1"))
         num_ftrs = model.classifier[2].in_features
         model.classifier[2] = nn.Linear(num_ftrs, n_classes)
 
     elif "satlas" in model_type:
         device = "cuda" if torch.cuda.is_available() else "cpu"
-        weights_manager = satlaspretrain_models.Weights()
         model_identifier = model_type.split("-")[-1]
-        model = weights_manager.get_pretrained_model(
-            model_identifier=model_identifier,
-            num_categories=n_classes,
-            fpn=True,
-            head=satlaspretrain_models.Head.CLASSIFY,
-            device=device,
-        )
+        if pretrained:
+            weights_manager = satlaspretrain_models.Weights()
+            model = weights_manager.get_pretrained_model(
+                model_identifier=model_identifier,
+                num_categories=n_classes,
+                fpn=True,
+                head=satlaspretrain_models.Head.CLASSIFY,
+                device=device,
+            )
+        else:
+            # Build the same architecture from its description, without downloading weights
+            model_info = satlaspretrain_models.utils.SatlasPretrain_weights[
+                model_identifier
+            ]
+            model = satlaspretrain_models.Model(
+                num_channels=model_info["num_channels"],
+                multi_image=model_info["multi_image"],
+                backbone=model_info["backbone"],
+                fpn=True,
+                head=satlaspretrain_models.Head.CLASSIFY,
+                num_categories=n_classes,
+                weights=None,
+            ).to(device)
 
         class ModelModified(nn.Module):
             def __init__(self, model):
@@ -595,29 +886,109 @@ def get_model(model_type: str, n_classes: int) -> nn.Module:
 
     elif "vit" in model_type:
         if model_type == "vit_b_16":
-            model = models.vit_b_16(weights=ViT_B_16_Weights.IMAGENET1K_V1)
+            model = models.vit_b_16(weights=get_weights(ViT_B_16_Weights.IMAGENET1K_V1))
             model.heads.head = nn.Linear(model.heads.head.in_features, n_classes)
         elif model_type == "vit_l_16":
-            model = models.vit_l_16(weights=ViT_L_16_Weights.IMAGENET1K_V1)
+            model = models.vit_l_16(weights=get_weights(ViT_L_16_Weights.IMAGENET1K_V1))
             model.heads.head = nn.Linear(model.heads.head.in_features, n_classes)
         elif model_type == "vit_h_14":
-            model = models.vit_h_14(weights=ViT_H_14_Weights.IMAGENET1K_SWAG_LINEAR_V1)
+            model = models.vit_h_14(
+                weights=get_weights(ViT_H_14_Weights.IMAGENET1K_SWAG_LINEAR_V1)
+            )
             model.heads.head = nn.Linear(model.heads.head.in_features, n_classes)
 
     elif "swin" in model_type:
         if model_type == "swin_v2_t":
-            model = models.swin_v2_t(weights=Swin_V2_T_Weights.IMAGENET1K_V1)
+            model = models.swin_v2_t(
+                weights=get_weights(Swin_V2_T_Weights.IMAGENET1K_V1)
+            )
             model.head = nn.Linear(model.head.in_features, n_classes)
         elif model_type == "swin_v2_s":
-            model = models.swin_v2_s(weights=Swin_V2_S_Weights.IMAGENET1K_V1)
+            model = models.swin_v2_s(
+                weights=get_weights(Swin_V2_S_Weights.IMAGENET1K_V1)
+            )
             model.head = nn.Linear(model.head.in_features, n_classes)
         elif model_type == "swin_v2_b":
-            model = models.swin_v2_b(weights=Swin_V2_B_Weights.IMAGENET1K_V1)
+            model = models.swin_v2_b(
+                weights=get_weights(Swin_V2_B_Weights.IMAGENET1K_V1)
+            )
             model.head = nn.Linear(model.head.in_features, n_classes)
 
     return model
 
 
+def strip_state_dict(state_dict: dict, prefix: str = "module.") -> dict:
+    """
+    Remove a prefix (e.g., the one added by nn.DataParallel) from the keys of a state dict.
+
+    Args:
+        state_dict (dict): The model state dict.
+        prefix (str, optional): The prefix to remove. Defaults to "module.".
+
+    Returns:
+        dict: The state dict with the prefix removed from its keys.
+    """
+    return {
+        (key[len(prefix) :] if key.startswith(prefix) else key): value
+        for key, value in state_dict.items()
+    }
+
+
+def save_checkpoint(
+    model: nn.Module, model_type: str, n_classes: int, out_file: str, **kwargs
+) -> str:
+    """
+    Save a self-describing checkpoint that can be loaded without the model config
+    and without downloading any pretrained weights.
+
+    Args:
+        model (nn.Module): The trained model, optionally wrapped in nn.DataParallel.
+        model_type (str): The type of model (e.g., "convnext_large").
+        n_classes (int): The number of output classes.
+        out_file (str): Path to the output checkpoint file.
+        **kwargs: Additional metadata to store in the checkpoint (e.g., img_size, classes).
+
+    Returns:
+        str: Path to the saved checkpoint file.
+    """
+    if isinstance(model, nn.DataParallel):
+        model = model.module
+
+    checkpoint = {
+        "model_type": model_type,
+        "n_classes": n_classes,
+        "state_dict": strip_state_dict(model.state_dict()),
+    }
+    checkpoint.update(kwargs)
+    torch.save(checkpoint, out_file)
+
+    return out_file
+
+
+def load_checkpoint(model_file: str, device: str = "cpu") -> tuple:
+    """
+    Load a self-describing checkpoint saved with `save_checkpoint`.
+
+    Args:
+        model_file (str): Path to the checkpoint file.
+        device (str, optional): Device to map the weights to. Defaults to "cpu".
+
+    Returns:
+        tuple: A tuple containing the model (not wrapped in nn.DataParallel) and the
+            checkpoint metadata (all entries except the state dict).
+    """
+    checkpoint = torch.load(model_file, map_location=device)
+    state_dict = checkpoint.pop("state_dict")
+
+    # Build the architecture without pretrained weights and load the trained weights
+    model = get_model(
+        checkpoint["model_type"], checkpoint["n_classes"], pretrained=False
+    )
+    model.load_state_dict(state_dict)
+
+    return model, checkpoint
+
+
 def load_model(
     model_type: str,
     n_classes: int,
@@ -666,7 +1037,8 @@ def load_model(
                 The learning rate scheduler.
     """
     # Get the model based on the specified type and number of classes
-    model = get_model(model_type, n_classes)
+    # (pretrained weights are not needed if they are overwritten by the model file)
+    model = get_model(model_type, n_classes, pretrained=model_file is None)
     model = nn.DataParallel(model)  # Wrap the model for multi-GPU training
     if model_file:
         logging.info(f"Loading {model_file}...")
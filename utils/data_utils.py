@@ -2,20 +2,36 @@ import os
 import requests
 
 import geojson
+import shapely
 import numpy as np
 import pandas as pd
 import geopandas as gpd
+import rasterio as rio
+import rasterio.features
+import json
+import hashlib
 
 from tqdm import tqdm
 from pyproj import Transformer
 from scipy.sparse.csgraph import connected_components
-from exactextract import exact_extract
 
 import logging
 
 pd.options.mode.chained_assignment = None
 logging.basicConfig(level=logging.INFO)
 
+# In-memory building presence layers, keyed by ISO code
+building_cache = dict()
+
+# Summed-area tables of the building rasters, keyed by ISO code and source
+integral_cache = dict()
+
+# In-process geoboundaries and their spatial indexes, keyed by file
+geoboundary_cache = dict()
+
+# In-process reference tables (ISO codes, building dataset indexes), keyed by file
+reference_cache = dict()
+
 
 def create_progress_bar(items: list) -> tqdm:
     """
@@ -49,6 +65,105 @@ def makedir(out_dir: str) -> str:
     return out_dir
 
 
+def assign_blocks(
+    x: np.ndarray, y: np.ndarray, block_x: float, block_y: float = None
+) -> np.ndarray:
+    """
+    Assign points to the blocks of a regular grid anchored at their minimum coordinates.
+
+    Args:
+        x (np.ndarray): X coordinates of the points.
+        y (np.ndarray): Y coordinates of the points.
+        block_x (float): Width of each block, in the units of the coordinates.
+        block_y (float, optional): Height of each block. Defaults to block_x.
+
+    Returns:
+        np.ndarray: Array of consecutive block indices, one per point.
+    """
+    if block_y is None:
+        block_y = block_x
+    col = np.floor((x - np.min(x)) / block_x).astype(int)
+    row = np.floor((y - np.min(y)) / block_y).astype(int)
+    blocks = pd.Series(list(zip(row, col))).factorize()[0]
+    return blocks
+
+
+def get_reference_file(config: dict, url: str) -> str:
+    """
+    Returns the local copy of a reference dataset (e.g. the ISO codes CSV or the building
+    dataset indexes), downloading it once into a versioned on-disk cache.
+
+    Files are saved to `<vectors_dir>/reference/<reference_version>/`, named after the URL,
+    so that bumping `reference_version` in the config fetches fresh copies. In offline mode
+    (`offline: True` in the config or the `GIGA_OFFLINE=1` environment variable), nothing is
+    downloaded and missing files raise an error.
+
+    Args:
+        config (dict): Configuration dictionary containing:
+            - vectors_dir (str): Directory where vector data is stored.
+            - reference_version (str, optional): Version of the reference data. Default is "v1".
+            - offline (bool, optional): If True, never download. Default is False.
+        url (str): URL (or local path) of the reference dataset.
+
+    Returns:
+        str: Path to the local copy of the reference dataset.
+    """
+    # Local files are used as they are
+    if os.path.exists(url):
+        return url
+
+    # Name the cached file after the URL so that different URLs never collide
+    version = config.get("reference_version", "v1")
+    out_dir = os.path.join(os.getcwd(), config["vectors_dir"], "reference", version)
+    url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
+    out_file = os.path.join(out_dir, f"{url_hash}_{os.path.basename(url)}")
+    if os.path.exists(out_file):
+        return out_file
+
+    offline = config.get("offline", False) or os.environ.get("GIGA_OFFLINE") == "1"
+    if offline:
+        raise FileNotFoundError(
+            f"{out_file} not found and offline mode is enabled; download {url} first."
+        )
+
+    # Download to a temporary file first so that interrupted downloads are not cached
+    makedir(out_dir)
+    logging.info(f"Downloading {url} to {out_file}...")
+    r = requests.get(url, stream=True)
+    r.raise_for_status()
+    with open(f"{out_file}.part", "wb") as file:
+        for chunk in r.iter_content(chunk_size=1 << 20):
+            file.write(chunk)
+    os.replace(f"{out_file}.part", out_file)
+
+    # Record where and when the file was downloaded from
+    with open(f"{out_file}.json", "w") as file:
+        json.dump({"url": url, "version": version, "date": r.headers.get("Date")}, file)
+
+    return out_file
+
+
+def load_reference(url: str, reader=pd.read_csv, config: dict = None) -> pd.DataFrame:
+    """
+    Reads a reference dataset once per process.
+
+    Args:
+        url (str): URL or local path of the reference dataset.
+        reader (callable, optional): Function reading the file, e.g. `pd.read_csv` or
+            `gpd.read_file`. Default is `pd.read_csv`.
+        config (dict, optional): Configuration dictionary. If given, URLs are resolved
+            to their cached local copy (see `get_reference_file`). Default is None.
+
+    Returns:
+        pd.DataFrame: A copy of the reference dataset.
+    """
+    if config is not None:
+        url = get_reference_file(config, url)
+    if url not in reference_cache:
+        reference_cache[url] = reader(url)
+    return reference_cache[url].copy()
+
+
 def get_iso_regions(config: dict, iso_code: str) -> tuple:
     """
     Retrieve the country, sub-region, and region names for a given ISO code.
@@ -61,8 +176,8 @@ def get_iso_regions(config: dict, iso_code: str) -> tuple:
         tuple: A tuple containing the country name (str), sub-region name (str),
             and region name (str).
     """
-    # Read the ISO codes CSV file from the provided URL
-    codes = pd.read_csv(config["iso_codes_url"])
+    # Read the ISO codes CSV file from the reference data cache
+    codes = load_reference(config["iso_codes_url"], config=config)
     # Query the DataFrame for the specified ISO code
     subcode = codes.query(f"`alpha-3` == '{iso_code}'")
     # Extract the country name
@@ -269,32 +384,72 @@ def prepare_data(
 
 
 def get_geoboundaries(
-    config: dict, iso_code: str, out_dir: str = None, adm_level: str = "ADM0"
+    config: dict,
+    iso_code: str,
+    out_dir: str = None,
+    adm_level: str = "ADM0",
+    crs: str = None,
 ) -> gpd.GeoDataFrame:
     """
     Fetch geoboundaries for a specified ISO code and administrative level.
 
+    The geoboundaries are read from disk once per process (see `load_geoboundaries`);
+    each call returns a copy, so callers can modify it freely.
+
     Args:
         config (dict): Configuration dictionary containing necessary parameters.
         iso_code (str): ISO code of the country for which geoboundaries are requested.
         out_dir (str, optional): Output directory where the geoboundary file will be saved.
         adm_level (str, optional): Administrative level of the geoboundary. Default is "ADM0".
+        crs (str, optional): CRS of the returned geoboundaries (e.g. "EPSG:3857").
+            Default is None (the CRS of the geoboundary file, i.e. EPSG:4326).
 
     Returns:
         gpd.GeoDataFrame: GeoDataFrame containing the fetched geoboundaries.
     """
+    geoboundaries = load_geoboundaries(config, iso_code, out_dir, adm_level)
+    geoboundary = geoboundaries["data"][None]
+    if crs is not None:
+        if crs not in geoboundaries["data"]:
+            geoboundaries["data"][crs] = geoboundary.to_crs(crs)
+        geoboundary = geoboundaries["data"][crs]
+    return geoboundary.copy()
+
+
+def load_geoboundaries(
+    config: dict, iso_code: str, out_dir: str = None, adm_level: str = "ADM0"
+) -> dict:
+    """
+    Loads the geoboundaries of a specified ISO code and administrative level once per
+    process, downloading them if needed.
+
+    The cached entry holds the geoboundaries with cleaned shape names in their original CRS
+    (key None) and pre-projected to EPSG:3857, EPSG:4326 and ESRI:54009, as well as the
+    spatial indexes built by `get_geoboundary_tree`.
+
+    Args:
+        config (dict): Configuration dictionary containing necessary parameters.
+        iso_code (str): ISO code of the country for which geoboundaries are requested.
+        out_dir (str, optional): Output directory where the geoboundary file will be saved.
+        adm_level (str, optional): Administrative level of the geoboundary. Default is "ADM0".
+
+    Returns:
+        dict: Dictionary with the geoboundaries per CRS ("data") and their STRtrees ("trees").
+    """
     # Set the default output directory if not provided
     if not out_dir:
         out_dir = os.path.join(
             os.getcwd(), config["vectors_dir"], config["project"], "geoboundaries"
         )
 
-    # Ensure the output directory exists
-    out_dir = makedir(out_dir)
-
     # Define the filename and full output file path
     filename = f"{iso_code}_{adm_level}_geoboundary.geojson"
     out_file = os.path.join(out_dir, filename)
+    if out_file in geoboundary_cache:
+        return geoboundary_cache[out_file]
+
+    # Ensure the output directory exists
+    out_dir = makedir(out_dir)
 
     # Download geoboundary if it doesn't already exist
     if not os.path.exists(out_file):
@@ -318,14 +473,183 @@ def get_geoboundaries(
     # Read the GeoJSON file into a GeoDataFrame
     geoboundary = gpd.read_file(out_file).fillna("")
 
-    # Clean up 'shapeName' column if present
+    # Clean up 'shapeName' column if present (keep alphanumeric characters and dashes)
     if "shapeName" in geoboundary.columns:
-        geoboundary["shapeName"] = geoboundary["shapeName"].apply(
-            lambda x: "".join(
-                [char if char.isalnum() or char == "-" else " " for char in x]
-            )
+        geoboundary["shapeName"] = geoboundary["shapeName"].str.replace(
+            r"[^\w-]|_", " ", regex=True
+        )
+
+    # Pre-project the geoboundaries to the CRSs used across the pipeline
+    data = {None: geoboundary}
+    for crs in ["EPSG:3857", "EPSG:4326", "ESRI:54009"]:
+        data[crs] = geoboundary.to_crs(crs)
+
+    geoboundary_cache[out_file] = {"data": data, "trees": dict(), "parents": dict()}
+    return geoboundary_cache[out_file]
+
+
+def get_geoboundary_tree(
+    config: dict, iso_code: str, adm_level: str = "ADM0", crs: str = "EPSG:4326"
+) -> tuple:
+    """
+    Returns the geoboundaries of a specified ISO code and administrative level with
+    an STRtree over their prepared geometries, built once per process.
+
+    Args:
+        config (dict): Configuration dictionary containing necessary parameters.
+        iso_code (str): ISO code of the country for which geoboundaries are requested.
+        adm_level (str, optional): Administrative level of the geoboundary. Default is "ADM0".
+        crs (str, optional): CRS of the geoboundaries. Default is "EPSG:4326".
+
+    Returns:
+        tuple: The geoboundaries (gpd.GeoDataFrame, not to be modified) and their STRtree.
+    """
+    geoboundaries = load_geoboundaries(config, iso_code, adm_level=adm_level)
+    if crs not in geoboundaries["data"]:
+        geoboundaries["data"][crs] = geoboundaries["data"][None].to_crs(crs)
+    geoboundary = geoboundaries["data"][crs]
+
+    if crs not in geoboundaries["trees"]:
+        geometries = geoboundary.geometry.values
+        shapely.prepare(geometries)
+        geoboundaries["trees"][crs] = shapely.STRtree(geometries)
+
+    return geoboundary, geoboundaries["trees"][crs]
+
+
+def query_first(
+    tree: shapely.STRtree, geometries: np.ndarray, predicate: str = "within"
+) -> np.ndarray:
+    """
+    Queries an STRtree and keeps the first (lowest index) tree geometry matching each
+    input geometry, i.e. an sjoin that does not duplicate rows on overlapping polygons.
+
+    Args:
+        tree (shapely.STRtree): Spatial index over the tree geometries (e.g. polygons).
+        geometries (np.ndarray): Array of input geometries (e.g. points).
+        predicate (str, optional): Spatial predicate, as in `gpd.sjoin`. Default is "within".
+
+    Returns:
+        np.ndarray: Positional index of the matching tree geometry, or -1 if none.
+    """
+    index, tree_index = tree.query(geometries, predicate=predicate)
+    order = np.lexsort((tree_index, index))
+    index, tree_index = index[order], tree_index[order]
+    index, first = np.unique(index, return_index=True)
+
+    matches = np.full(len(geometries), -1, dtype=np.int64)
+    matches[index] = tree_index[first]
+    return matches
+
+
+def assign_geoboundary(
+    config: dict,
+    iso_code: str,
+    data: gpd.GeoDataFrame,
+    adm_level: str = "ADM0",
+    predicate: str = "within",
+) -> np.ndarray:
+    """
+    Finds the geoboundary that contains each geometry (point-in-polygon, like an
+    sjoin with predicate "within") using the cached STRtree of the geoboundaries.
+
+    Args:
+        config (dict): Configuration dictionary containing necessary parameters.
+        iso_code (str): ISO code of the country for which geoboundaries are requested.
+        data (gpd.GeoDataFrame): The geometries (e.g. points) to locate, with a CRS.
+        adm_level (str, optional): Administrative level of the geoboundary. Default is "ADM0".
+        predicate (str, optional): Spatial predicate, as in `gpd.sjoin`. Default is "within".
+
+    Returns:
+        np.ndarray: For each geometry, the positional index of its geoboundary in
+            `get_geoboundaries(config, iso_code, adm_level=adm_level)`, or -1 if none.
+    """
+    crs = data.crs.to_string() if data.crs is not None else "EPSG:4326"
+    _, tree = get_geoboundary_tree(config, iso_code, adm_level, crs=crs)
+    return query_first(tree, data.geometry.values, predicate=predicate)
+
+
+def get_parent_lookup(
+    config: dict, iso_code: str, adm_level: str, parent_level: str
+) -> np.ndarray:
+    """
+    Builds (once per process) the lookup table from the geoboundaries of an administrative
+    level to those of a coarser level, by locating a representative point of each
+    geoboundary in the parent level.
+
+    Args:
+        config (dict): Configuration dictionary containing necessary parameters.
+        iso_code (str): ISO code of the country for which geoboundaries are requested.
+        adm_level (str): Administrative level of the child geoboundaries (e.g. "ADM3").
+        parent_level (str): Administrative level of the parent geoboundaries (e.g. "ADM1").
+
+    Returns:
+        np.ndarray: For each child geoboundary, the positional index of its parent, or -1.
+    """
+    geoboundaries = load_geoboundaries(config, iso_code, adm_level=adm_level)
+    if parent_level not in geoboundaries["parents"]:
+        children = geoboundaries["data"]["EPSG:4326"]
+        _, tree = get_geoboundary_tree(config, iso_code, parent_level, crs="EPSG:4326")
+        points = children.geometry.representative_point().values
+        geoboundaries["parents"][parent_level] = query_first(
+            tree, points, predicate="intersects"
+        )
+    return geoboundaries["parents"][parent_level]
+
+
+def assign_admin_levels(
+    config: dict,
+    iso_code: str,
+    data: gpd.GeoDataFrame,
+    adm_levels: list = ["ADM1", "ADM2", "ADM3"],
+    predicate: str = "intersects",
+) -> pd.DataFrame:
+    """
+    Assigns the geoboundary names of several administrative levels to each geometry in
+    a single pass. Each geometry is located in the finest level only; the coarser levels
+    are derived from parent lookup tables (see `get_parent_lookup`). Geometries that fall
+    outside the finest level (e.g. gaps in coverage) are located in the next level up.
+
+    Args:
+        config (dict): Configuration dictionary containing necessary parameters.
+        iso_code (str): ISO code of the country for which geoboundaries are requested.
+        data (gpd.GeoDataFrame): The geometries (e.g. points) to locate, with a CRS.
+        adm_levels (list, optional): Administrative levels, from coarsest to finest.
+            Default is ["ADM1", "ADM2", "ADM3"].
+        predicate (str, optional): Spatial predicate, as in `gpd.sjoin`. Default is "intersects".
+
+    Returns:
+        pd.DataFrame: One column of shape names per administrative level (NaN if not found),
+            with the same index as `data`.
+    """
+    matches = {adm_level: np.full(len(data), -1) for adm_level in adm_levels}
+    remaining = np.arange(len(data))
+
+    # Locate the geometries from the finest level up, only for those not yet found
+    for i in reversed(range(len(adm_levels))):
+        if len(remaining) == 0:
+            break
+        adm_level = adm_levels[i]
+        index = assign_geoboundary(
+            config, iso_code, data.iloc[remaining], adm_level, predicate=predicate
         )
-    return geoboundary
+        found = index >= 0
+        matches[adm_level][remaining[found]] = index[found]
+
+        # Derive the parent levels from the lookup tables
+        for parent_level in adm_levels[:i]:
+            lookup = get_parent_lookup(config, iso_code, adm_level, parent_level)
+            matches[parent_level][remaining[found]] = lookup[index[found]]
+        remaining = remaining[~found]
+
+    # Map the positional indices to shape names
+    admin = pd.DataFrame(index=data.index)
+    for adm_level in adm_levels:
+        names = get_geoboundary_tree(config, iso_code, adm_level)[0]["shapeName"]
+        names = names.to_numpy()[np.maximum(matches[adm_level], 0)]
+        admin[adm_level] = np.where(matches[adm_level] >= 0, names, np.nan)
+
+    return admin
 
 
 def read_data(iso_code: str, data_dir: str, sources: list = []) -> gpd.GeoDataFrame:
@@ -425,44 +749,72 @@ def filter_uninhabited(
     """
     Filters the data based on building presence by summing pixel values from building raster files.
 
+    Buildings are counted from the country's building centroid indexes (see
+    `build_building_index`) within the bounds of each geometry, i.e. the tiles
+    are assumed to be axis-aligned boxes in EPSG:3857, and the GHSL BUILT-C pixels
+    are summed with the country's summed-area tables (see `build_integral_image`).
+
     Args:
         iso_code (str): ISO code for the region, used to locate the raster files.
         config (dict): Configuration dictionary containing paths to raster directories.
         data (gpd.GeoDataFrame): DataFrame containing the data with geometries to be processed
+        in_vector (str, optional): Unused, kept for backward compatibility (the GHSL sums
+            no longer go through a temporary vector file). Defaults to None.
 
     Returns:
         pd.DataFrame: Filtered DataFrame containing only entries with building presence.
     """
 
-    def count_points(tiles: gpd.GeoDataFrame, path: str):
-        """
-        Counts the number of points from a given file that intersect with each polygon
-        in the provided GeoDataFrame.
+    # Reset the index of the data to ensure consistency
+    data = data.reset_index(drop=True)
 
-        Args:
-            tiles (gpd.GeoDataFrame): A GeoDataFrame containing polygons with a "UID" column to group by.
-            path (str): File path to a GeoJSON or similar file containing point geometries.
+    # Log the number of records being processed
+    print(f"Filtering uninhabited locations for {len(data)} tiles...")
 
-        Returns:
-            Series: A pandas Series indexed by "UID", where each value represents the count
-            of points intersecting with the corresponding polygon.
-        """
-        # Read the input file containing point data as a GeoDataFrame
-        tiles_ = tiles.copy()
-        points = gpd.GeoDataFrame.from_file(path)
+    # Load the building centroid indexes (see `build_building_index`)
+    index = load_building_index(iso_code, config)
+    bounds = data.to_crs("EPSG:3857").bounds.to_numpy()
 
-        # Convert the geometry of the points to their centroids
-        points["geometry"] = points.centroid
+    # If the Microsoft building data exists, count the buildings within each tile
+    ms_sum = 0
+    if "ms" in index:
+        print("Filtering with Microsoft building footprints...")
+        ms_sum = count_in_boxes(index["ms"], bounds)
 
-        # Count number of points in each tile
-        bldg_sum = tiles_.join(
-            gpd.sjoin(points, tiles).groupby("UID").size().rename("sum"),
-            how="left",
-        )
-        bldg_sum["sum"] = bldg_sum["sum"].fillna(0)
+    # If the Google building data exists, count the buildings within each tile
+    google_sum = 0
+    if "google" in index:
+        print("Filtering with Google Open Buildings...")
+        google_sum = count_in_boxes(index["google"], bounds)
+
+    # If the GHSL building data exists, sum the built-up pixels within each tile
+    ghsl_sum = 0
+    if "ghsl" in index:
+        print("Filtering with Global Human Settlements Layer (GHSL)...")
+        ghsl_sum = box_sums(index["ghsl"], data)
 
-        return bldg_sum["sum"].values
+    # Compute the total sum of building areas from all sources and add it as a new column
+    data["sum"] = ms_sum + google_sum + ghsl_sum
 
+    # Reset the index again to ensure the data is clean and ready for further processing
+    data = data.reset_index(drop=True)
+
+    return data
+
+
+def get_building_paths(iso_code: str, config: dict) -> tuple:
+    """
+    Returns the file paths of the building datasets of a country.
+
+    Args:
+        iso_code (str): ISO code for the region.
+        config (dict): Configuration dictionary containing "rasters_dir", "vectors_dir"
+            and "ghsl_built_c_file".
+
+    Returns:
+        tuple: The paths to the Microsoft and Google building footprints (EPSG:3857)
+            and to the GHSL BUILT-C raster.
+    """
     # Get the current working directory
     cwd = os.getcwd()
 
@@ -470,7 +822,6 @@ def filter_uninhabited(
     raster_dir = os.path.join(cwd, config["rasters_dir"])
     vector_dir = os.path.join(cwd, config["vectors_dir"])
 
-    # Define the file paths for different building datasets (e.g., Microsoft, Google, GHSL)
     ms_path = os.path.join(
         vector_dir, "ms_buildings", f"{iso_code}_ms_EPSG3857.geojson"
     )
@@ -478,41 +829,613 @@ def filter_uninhabited(
         vector_dir, "google_buildings", f"{iso_code}_google_EPSG3857.geojson"
     )
     ghsl_path = os.path.join(raster_dir, "ghsl", config["ghsl_built_c_file"])
+    return ms_path, google_path, ghsl_path
 
-    # Reset the index of the data to ensure consistency
-    data = data.reset_index(drop=True)
 
-    # Log the number of records being processed
-    print(f"Filtering uninhabited locations for {len(data)} tiles...")
+def get_source_stamp(source_path: str) -> dict:
+    """
+    Returns the path and modification time of the source file of a derived dataset
+    (e.g. a building index), to be stored with it.
 
-    # If the Microsoft building data exists, extract the sum of building areas within the vector
-    ms_sum = 0
-    if os.path.exists(ms_path):
-        print("Filtering with Microsoft building footprints...")
-        ms_sum = count_points(data, ms_path)
+    Args:
+        source_path (str): Path to the source file.
 
-    # If the Google building data exists, extract the sum of building areas within the vector
-    google_sum = 0
-    if os.path.exists(google_path):
-        print("Filtering with Google Open Buildings...")
-        google_sum = count_points(data, google_path)
+    Returns:
+        dict: Dictionary with the "source_path" and its "source_mtime" (in nanoseconds).
+    """
+    return {
+        "source_path": source_path,
+        "source_mtime": os.stat(source_path).st_mtime_ns,
+    }
 
-    # If the GHSL building data exists, extract the sum of building areas within the vector
-    ghsl_sum = 0
-    if os.path.exists(ghsl_path) and in_vector:
-        print("Filtering with Global Human Settlements Layer (GHSL)...")
-        data.to_crs("ESRI:54009").to_file(in_vector)
-        ghsl_sum = exact_extract(
-            ghsl_path, in_vector, "sum", output="pandas", progress=True
-        )["sum"].values
 
-        # Compute the total sum of building areas from all sources and add it as a new column
-        data["sum"] = ms_sum + google_sum + ghsl_sum
+def is_built_from(meta: dict, source_path: str) -> bool:
+    """
+    Checks whether a derived dataset was built from the current version of a source file,
+    i.e. from the same path with the same modification time (see `get_source_stamp`).
 
-    # Reset the index again to ensure the data is clean and ready for further processing
-    data = data.reset_index(drop=True)
+    Args:
+        meta (dict): Metadata stored with the derived dataset.
+        source_path (str): Path to the source file.
 
-    return data
+    Returns:
+        bool: True if the derived dataset is up to date.
+    """
+    return (
+        meta.get("source_path") == source_path
+        and meta.get("source_mtime") == os.stat(source_path).st_mtime_ns
+    )
+
+
+def get_building_index_file(iso_code: str, config: dict, source: str) -> str:
+    """
+    Returns the path of the building centroid index of a country.
+
+    Args:
+        iso_code (str): ISO code for the region.
+        config (dict): Configuration dictionary containing "vectors_dir".
+        source (str): Source of the building data, either "ms" or "google".
+
+    Returns:
+        str: Path to the building centroid index (.npz).
+    """
+    return os.path.join(
+        os.getcwd(),
+        config["vectors_dir"],
+        f"{source}_buildings",
+        f"{iso_code}_{source}_centroids.npz",
+    )
+
+
+def build_building_index(
+    iso_code: str,
+    config: dict,
+    source: str = "ms",
+    cell_size: float = 250,
+    overwrite: bool = False,
+) -> str:
+    """
+    Builds the building centroid index of a country, a one-off step that replaces reading
+    the full building footprint GeoJSON every time buildings are counted.
+
+    The centroids of the footprints (EPSG:3857) are stored as float32 coordinates relative
+    to the south-west corner of the country, sorted by the row-major key of a regular grid
+    of `cell_size` meters, so that the buildings of any box can be found by binary search
+    on the keys of the grid rows it spans (see `count_in_boxes`).
+
+    The path and modification time of the footprints are stored with the index, which is
+    rebuilt when the footprints are re-downloaded or an EPSG:3857 copy becomes available.
+
+    Args:
+        iso_code (str): ISO code for the region.
+        config (dict): Configuration dictionary containing "vectors_dir".
+        source (str, optional): Source of the building data, either "ms" or "google".
+            Defaults to "ms".
+        cell_size (float, optional): Size of the grid cells in meters. Defaults to 250.
+        overwrite (bool, optional): If True, rebuilds an existing index. Defaults to False.
+
+    Returns:
+        str: Path to the building centroid index, or None if the footprints are not available.
+    """
+    # Find the building footprints, reprojecting them if only EPSG:4326 is available
+    vector_dir = os.path.join(os.getcwd(), config["vectors_dir"], f"{source}_buildings")
+    paths = [
+        os.path.join(vector_dir, f"{iso_code}_{source}_EPSG3857.geojson"),
+        os.path.join(vector_dir, f"{iso_code}_{source}_EPSG4326.geojson"),
+    ]
+    paths = [path for path in paths if os.path.exists(path)]
+    if len(paths) == 0:
+        return None
+
+    # Reuse the index if it was built from the current version of the footprints
+    out_file = get_building_index_file(iso_code, config, source)
+    if os.path.exists(out_file) and not overwrite:
+        with np.load(out_file) as index:
+            meta = {key: index[key].item() for key in index.files if "source" in key}
+        if is_built_from(meta, paths[0]):
+            return out_file
+
+    # Compute the building centroids
+    logging.info(f"Building centroid index from {paths[0]}...")
+    buildings = gpd.read_file(paths[0])
+    if buildings.crs is not None and buildings.crs != "EPSG:3857":
+        buildings = buildings.to_crs("EPSG:3857")
+    centroids = buildings.centroid
+    coords = np.column_stack([centroids.x, centroids.y])
+    del buildings, centroids
+
+    # Store the coordinates relative to the origin to keep float32 precision
+    origin = coords.min(axis=0) if len(coords) > 0 else np.zeros(2)
+    coords = (coords - origin).astype(np.float32)
+
+    # Sort the centroids by their grid cell
+    cells = np.floor(coords / cell_size).astype(np.int64)
+    n_cols = int(cells[:, 0].max()) + 1 if len(cells) > 0 else 1
+    keys = cells[:, 1] * n_cols + cells[:, 0]
+    order = np.argsort(keys, kind="stable")
+
+    np.savez(
+        out_file,
+        coords=coords[order],
+        keys=keys[order],
+        origin=origin,
+        cell_size=cell_size,
+        n_cols=n_cols,
+        **get_source_stamp(paths[0]),
+    )
+    logging.info(f"Saved {len(coords)} building centroids to {out_file}")
+    return out_file
+
+
+def load_building_index(iso_code: str, config: dict) -> dict:
+    """
+    Loads the building presence layers of a country into memory, once per process.
+
+    The Microsoft and Google building centroid indexes and the GHSL BUILT-C
+    summed-area table are built if needed (see `build_building_index` and
+    `build_integral_image`).
+
+    Args:
+        iso_code (str): ISO code for the region.
+        config (dict): Configuration dictionary containing paths to the building datasets.
+
+    Returns:
+        dict: Dictionary with the centroid indexes of the available footprint
+            sources ("ms", "google") and the GHSL summed-area tables ("ghsl"), if available.
+    """
+    if iso_code in building_cache:
+        return building_cache[iso_code]
+
+    _, _, ghsl_path = get_building_paths(iso_code, config)
+
+    index = dict()
+    for source in ["ms", "google"]:
+        index_file = build_building_index(iso_code, config, source)
+        if index_file is not None:
+            with np.load(index_file) as source_index:
+                index[source] = {key: source_index[key] for key in source_index.files}
+
+    if os.path.exists(ghsl_path):
+        index["ghsl"] = load_integral_image(iso_code, config, "ghsl")
+
+    building_cache[iso_code] = index
+    return index
+
+
+def count_in_boxes(
+    index: dict, bounds: np.ndarray, chunk_size: int = 10000
+) -> np.ndarray:
+    """
+    Counts the building centroids that fall within each box (boundaries included).
+
+    For each grid row spanned by a box, the centroids of the cells between the box's
+    first and last columns are contiguous in the index, so they are found by binary
+    search on the grid keys and filtered against the box in one vectorized pass.
+
+    Args:
+        index (dict): Building centroid index (see `build_building_index`).
+        bounds (np.ndarray): Array of shape (M, 4) with the (minx, miny, maxx, maxy)
+            of each box in EPSG:3857.
+        chunk_size (int, optional): Number of boxes processed at once. Defaults to 10000.
+
+    Returns:
+        np.ndarray: The number of centroids in each box.
+    """
+    coords, keys = index["coords"], index["keys"]
+    cell_size, n_cols = float(index["cell_size"]), int(index["n_cols"])
+    counts = np.zeros(len(bounds))
+
+    for chunk in range(0, len(bounds), chunk_size):
+        # Express the boxes relative to the origin of the index
+        boxes = np.asarray(bounds[chunk : chunk + chunk_size], dtype=np.float64)
+        boxes = boxes - np.tile(index["origin"], 2)
+
+        # Find the grid cells spanned by each box
+        cols = np.clip(np.floor(boxes[:, [0, 2]] / cell_size), 0, n_cols - 1)
+        rows = np.maximum(np.floor(boxes[:, [1, 3]] / cell_size), 0)
+        cols, rows = cols.astype(np.int64), rows.astype(np.int64)
+
+        # Find the range of candidate centroids of each grid row spanned by the boxes
+        starts, ends, box_ids = [], [], []
+        for offset in range(int((rows[:, 1] - rows[:, 0]).max(initial=0)) + 1):
+            row = rows[:, 0] + offset
+            spans = np.where(row <= rows[:, 1])[0]
+            row = row[spans]
+            starts.append(np.searchsorted(keys, row * n_cols + cols[spans, 0], "left"))
+            ends.append(np.searchsorted(keys, row * n_cols + cols[spans, 1], "right"))
+            box_ids.append(spans)
+        starts, ends = np.concatenate(starts), np.concatenate(ends)
+        box_ids = np.concatenate(box_ids)
+
+        # Gather the candidates of all boxes and check them against the boxes
+        lengths = ends - starts
+        candidates = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        candidates = candidates + np.arange(lengths.sum())
+        box_ids = np.repeat(box_ids, lengths)
+        x, y = coords[candidates, 0], coords[candidates, 1]
+        inside = (
+            (x >= boxes[box_ids, 0])
+            & (x <= boxes[box_ids, 2])
+            & (y >= boxes[box_ids, 1])
+            & (y <= boxes[box_ids, 3])
+        )
+        counts[chunk : chunk + len(boxes)] = np.bincount(
+            box_ids[inside], minlength=len(boxes)
+        )
+
+    return counts
+
+
+def get_building_sums(
+    iso_code: str, config: dict, data: gpd.GeoDataFrame
+) -> np.ndarray:
+    """
+    Returns the building presence of small boxes (e.g. tiles or buffered CAM points) from
+    the in-memory building layers (see `load_building_index`), without temporary files.
+
+    The sum is the number of Microsoft and Google building centroids within each box's
+    bounds, plus the sum of the GHSL BUILT-C pixels whose centers fall within the box.
+
+    Args:
+        iso_code (str): ISO code for the region.
+        config (dict): Configuration dictionary containing paths to the building datasets.
+        data (gpd.GeoDataFrame): The boxes, as geometries with a CRS.
+
+    Returns:
+        np.ndarray: The building sum of each box.
+    """
+    index = load_building_index(iso_code, config)
+    bounds = data.to_crs("EPSG:3857").bounds.to_numpy()
+
+    # Count the building centroids in each box
+    sums = np.zeros(len(data))
+    for source in ["ms", "google"]:
+        if source in index:
+            sums = sums + count_in_boxes(index[source], bounds)
+
+    # Sum the GHSL pixels in each box
+    if "ghsl" in index:
+        sums = sums + box_sums(index["ghsl"], data)
+
+    return sums
+
+
+def get_integral_dir(iso_code: str, config: dict, source: str) -> str:
+    """
+    Returns the directory of the summed-area tables of a building raster of a country.
+
+    Args:
+        iso_code (str): ISO code for the region.
+        config (dict): Configuration dictionary containing "rasters_dir".
+        source (str): Source of the building raster: "ms", "google" or "ghsl".
+
+    Returns:
+        str: Path to the directory holding the georeferencing of the tables (meta.json)
+            and one table per block of the raster (see `build_integral_image`).
+    """
+    folder = "ghsl" if source == "ghsl" else f"{source}_buildings"
+    return os.path.join(
+        os.getcwd(),
+        config["rasters_dir"],
+        folder,
+        f"{iso_code}_{source}_integral",
+    )
+
+
+def build_integral_image(
+    iso_code: str,
+    config: dict,
+    source: str = "ms",
+    block_size: int = None,
+    overwrite: bool = False,
+) -> str:
+    """
+    Sets up the summed-area tables (integral images) of a building raster of a country, so
+    that the sum of the pixels of any rectangle can be computed with four lookups per block
+    it overlaps (see `box_sums`).
+
+    For the Microsoft and Google rasters (`<iso_code>_<source>.tif`, burned with 255), each
+    built pixel counts as 1. For GHSL BUILT-C, the global raster is cropped to the bounds
+    of the country (ADM0 geoboundary) and the no-data value 255 counts as 0.
+
+    The raster is split into blocks of `block_size` x `block_size` pixels, each with its own
+    uint32 table (starting from 0, so the sums are exact). The tables are only computed when
+    a block is first queried (see `get_integral_block`) and saved next to the georeferencing,
+    and blocks without any built pixel are only marked as empty, so the disk usage follows
+    the built-up area that is actually queried rather than the extent of the country.
+
+    The path and modification time of the raster are stored with the georeferencing, and
+    the tables are rebuilt when the raster is re-downloaded.
+
+    Args:
+        iso_code (str): ISO code for the region.
+        config (dict): Configuration dictionary containing the paths to the building rasters.
+        source (str, optional): Source of the building raster: "ms", "google" or "ghsl".
+            Defaults to "ms".
+        block_size (int, optional): Width and height of the blocks in pixels. Defaults to
+            the block size of the existing tables, or 2048 for new tables.
+        overwrite (bool, optional): If True, discards the existing tables. Defaults to False.
+
+    Returns:
+        str: Path to the georeferencing of the tables (meta.json), or None if the raster
+            is not available.
+    """
+    # Define the path to the building raster
+    raster_dir = os.path.join(os.getcwd(), config["rasters_dir"])
+    if source == "ghsl":
+        in_file = os.path.join(raster_dir, "ghsl", config["ghsl_built_c_file"])
+    else:
+        in_file = os.path.join(
+            raster_dir, f"{source}_buildings", f"{iso_code}_{source}.tif"
+        )
+    if not os.path.exists(in_file):
+        return None
+
+    # Reuse the tables if they were built from the current version of the raster
+    out_dir = get_integral_dir(iso_code, config, source)
+    meta_file = os.path.join(out_dir, "meta.json")
+    if os.path.exists(meta_file) and not overwrite:
+        with open(meta_file) as file:
+            meta = json.load(file)
+        if is_built_from(meta, in_file) and block_size in [None, meta["block_size"]]:
+            return meta_file
+    block_size = block_size or 2048
+
+    # Discard the tables of an earlier version of the raster
+    out_dir = makedir(out_dir)
+    for filename in os.listdir(out_dir):
+        os.remove(os.path.join(out_dir, filename))
+
+    with rio.open(in_file) as src:
+        window = rio.windows.Window(0, 0, src.width, src.height)
+        if source == "ghsl":
+            # Crop the global raster to the country
+            bounds = get_geoboundaries(config, iso_code, adm_level="ADM0")
+            bounds = bounds.to_crs(src.crs).total_bounds
+            window = rio.windows.from_bounds(*bounds, transform=src.transform)
+            col_off, row_off = np.floor(window.col_off), np.floor(window.row_off)
+            window = rio.windows.Window(
+                col_off,
+                row_off,
+                np.ceil(window.col_off + window.width) - col_off,
+                np.ceil(window.row_off + window.height) - row_off,
+            )
+            window = window.intersection(
+                rio.windows.Window(0, 0, src.width, src.height)
+            )
+        transform, crs = src.window_transform(window), src.crs
+
+    # Save the georeferencing of the tables
+    meta = {
+        "transform": list(transform.to_gdal()),
+        "crs": crs.to_wkt(),
+        "height": int(window.height),
+        "width": int(window.width),
+        "col_off": int(window.col_off),
+        "row_off": int(window.row_off),
+        "block_size": block_size,
+        "ghsl": source == "ghsl",
+        **get_source_stamp(in_file),
+    }
+    with open(meta_file, "w") as file:
+        json.dump(meta, file)
+
+    return meta_file
+
+
+def load_integral_image(iso_code: str, config: dict, source: str) -> dict:
+    """
+    Loads the georeferencing of the summed-area tables of a building raster, setting them
+    up if needed (see `build_integral_image`). The block tables are loaded on demand
+    (see `get_integral_block`).
+
+    Args:
+        iso_code (str): ISO code for the region.
+        config (dict): Configuration dictionary containing the paths to the building rasters.
+        source (str): Source of the building raster: "ms", "google" or "ghsl".
+
+    Returns:
+        dict: Dictionary with the georeferencing of the tables ("transform", "crs", "height",
+            "width", "block_size"), the raster window they cover, and the loaded blocks
+            ("blocks"), or None if the raster is not available.
+    """
+    if (iso_code, source) in integral_cache:
+        return integral_cache[(iso_code, source)]
+
+    integral = None
+    meta_file = build_integral_image(iso_code, config, source)
+    if meta_file is not None:
+        with open(meta_file) as file:
+            integral = json.load(file)
+        integral["transform"] = rio.Affine.from_gdal(*integral["transform"])
+        integral["crs"] = rio.crs.CRS.from_wkt(integral["crs"])
+        integral["dir"] = os.path.dirname(meta_file)
+        integral["blocks"] = dict()
+
+    integral_cache[(iso_code, source)] = integral
+    return integral
+
+
+def get_integral_block(integral: dict, block_row: int, block_col: int) -> np.ndarray:
+    """
+    Returns the summed-area table of a block of a building raster, computing and saving it
+    on first use.
+
+    Args:
+        integral (dict): The summed-area tables (see `load_integral_image`).
+        block_row (int): Row of the block.
+        block_col (int): Column of the block.
+
+    Returns:
+        np.ndarray: The memory-mapped uint32 table of shape (rows + 1, cols + 1) of the block,
+            or None if the block has no built pixel.
+    """
+    key = (block_row, block_col)
+    if key in integral["blocks"]:
+        return integral["blocks"][key]
+
+    name = os.path.join(integral["dir"], f"block_{block_row}_{block_col}")
+    if not os.path.exists(f"{name}.npy") and not os.path.exists(f"{name}.empty"):
+        # Read the pixels of the block
+        block_size = integral["block_size"]
+        row, col = block_row * block_size, block_col * block_size
+        window = rio.windows.Window(
+            integral["col_off"] + col,
+            integral["row_off"] + row,
+            min(block_size, integral["width"] - col),
+            min(block_size, integral["height"] - row),
+        )
+        with rio.open(integral["source_path"]) as src:
+            values = src.read(1, window=window, masked=True).filled(0)
+        if integral["ghsl"]:
+            values[values == 255] = 0
+        else:
+            values = values > 0
+
+        if values.any():
+            # Compute the summed-area table of the block
+            table = np.zeros(
+                (values.shape[0] + 1, values.shape[1] + 1), dtype=np.uint32
+            )
+            table[1:, 1:] = values.astype(np.uint32).cumsum(axis=0).cumsum(axis=1)
+            np.save(f"{name}.tmp.npy", table)
+            os.replace(f"{name}.tmp.npy", f"{name}.npy")
+        else:
+            # Mark blocks without built pixels as empty
+            open(f"{name}.empty", "w").close()
+
+    table = None
+    if os.path.exists(f"{name}.npy"):
+        table = np.load(f"{name}.npy", mmap_mode="r")
+    integral["blocks"][key] = table
+    return table
+
+
+def rect_sums(
+    integral: dict,
+    row_min: np.ndarray,
+    row_max: np.ndarray,
+    col_min: np.ndarray,
+    col_max: np.ndarray,
+) -> np.ndarray:
+    """
+    Sums the pixels of rectangles of a building raster from the summed-area tables of the
+    blocks they overlap.
+
+    Args:
+        integral (dict): The summed-area tables (see `load_integral_image`).
+        row_min (np.ndarray): First row of each rectangle.
+        row_max (np.ndarray): Row after the last row of each rectangle.
+        col_min (np.ndarray): First column of each rectangle.
+        col_max (np.ndarray): Column after the last column of each rectangle.
+
+    Returns:
+        np.ndarray: The pixel sum of each rectangle (0 for empty rectangles).
+    """
+    block_size = integral["block_size"]
+    sums = np.zeros(len(row_min), dtype=np.int64)
+    rects = np.where((row_max > row_min) & (col_max > col_min))[0]
+
+    # Pair each rectangle with the blocks it overlaps
+    block_rows = [row_min[rects] // block_size, (row_max[rects] - 1) // block_size]
+    block_cols = [col_min[rects] // block_size, (col_max[rects] - 1) // block_size]
+    n_rows = block_rows[1] - block_rows[0] + 1
+    n_cols = block_cols[1] - block_cols[0] + 1
+    pairs = np.repeat(np.arange(len(rects)), n_rows * n_cols)
+    offsets = np.arange(len(pairs)) - np.repeat(
+        np.cumsum(n_rows * n_cols) - n_rows * n_cols, n_rows * n_cols
+    )
+    pair_rows = block_rows[0][pairs] + offsets // n_cols[pairs]
+    pair_cols = block_cols[0][pairs] + offsets % n_cols[pairs]
+    rects = rects[pairs]
+
+    # Clip each rectangle to each of its blocks, in the coordinates of the block
+    r0 = np.maximum(row_min[rects], pair_rows * block_size) - pair_rows * block_size
+    r1 = np.minimum(row_max[rects], (pair_rows + 1) * block_size)
+    r1 = r1 - pair_rows * block_size
+    c0 = np.maximum(col_min[rects], pair_cols * block_size) - pair_cols * block_size
+    c1 = np.minimum(col_max[rects], (pair_cols + 1) * block_size)
+    c1 = c1 - pair_cols * block_size
+
+    # Combine the four corners of the rectangles, one block at a time
+    n_block_cols = -(-integral["width"] // block_size)
+    keys = pair_rows * n_block_cols + pair_cols
+    order = np.argsort(keys, kind="stable")
+    blocks, starts = np.unique(keys[order], return_index=True)
+    for block, group in zip(blocks, np.split(order, starts[1:])):
+        table = get_integral_block(
+            integral, int(block // n_block_cols), int(block % n_block_cols)
+        )
+        if table is None:
+            continue
+        values = (
+            table[r1[group], c1[group]].astype(np.int64)
+            - table[r0[group], c1[group]]
+            - table[r1[group], c0[group]]
+            + table[r0[group], c0[group]]
+        )
+        np.add.at(sums, rects[group], values)
+
+    return sums
+
+
+def box_sums(integral: dict, data: gpd.GeoDataFrame) -> np.ndarray:
+    """
+    Sums the pixels whose centers fall within the bounds of each geometry, using the
+    summed-area tables of the raster blocks (see `build_integral_image`).
+
+    Args:
+        integral (dict): The summed-area tables (see `load_integral_image`).
+        data (gpd.GeoDataFrame): The geometries (e.g. square tiles), with a CRS.
+
+    Returns:
+        np.ndarray: The pixel sum of each geometry.
+    """
+    transform = integral["transform"]
+    height, width = integral["height"], integral["width"]
+    bounds = data.to_crs(integral["crs"]).bounds.to_numpy()
+
+    # Find the first and last pixels whose centers fall within each box
+    col_min = np.ceil((bounds[:, 0] - transform.c) / transform.a - 0.5)
+    col_max = np.floor((bounds[:, 2] - transform.c) / transform.a - 0.5)
+    row_min = np.ceil((bounds[:, 3] - transform.f) / transform.e - 0.5)
+    row_max = np.floor((bounds[:, 1] - transform.f) / transform.e - 0.5)
+    col_min, col_max = np.clip(col_min, 0, width), np.clip(col_max + 1, 0, width)
+    row_min, row_max = np.clip(row_min, 0, height), np.clip(row_max + 1, 0, height)
+
+    return rect_sums(
+        integral,
+        row_min.astype(np.int64),
+        row_max.astype(np.int64),
+        col_min.astype(np.int64),
+        col_max.astype(np.int64),
+    )
+
+
+def pixel_values(integral: dict, data: gpd.GeoDataFrame) -> np.ndarray:
+    """
+    Returns the value of the pixel under each point from the summed-area tables
+    (see `build_integral_image`), i.e. 1 for built pixels of the building rasters.
+
+    Args:
+        integral (dict): The summed-area tables (see `load_integral_image`).
+        data (gpd.GeoDataFrame): The points, with a CRS.
+
+    Returns:
+        np.ndarray: The pixel value under each point (0 outside the raster).
+    """
+    transform = integral["transform"]
+    height, width = integral["height"], integral["width"]
+    points = data.to_crs(integral["crs"]).geometry
+
+    # Find the pixel under each point
+    cols = np.floor((points.x.to_numpy() - transform.c) / transform.a).astype(np.int64)
+    rows = np.floor((points.y.to_numpy() - transform.f) / transform.e).astype(np.int64)
+    inside = (cols >= 0) & (cols < width) & (rows >= 0) & (rows < height)
+    cols, rows = np.where(inside, cols, 0), np.where(inside, rows, 0)
+
+    # A pixel is a 1 x 1 rectangle (points outside the raster give empty rectangles)
+    return rect_sums(integral, rows, rows + inside, cols, cols + inside)
 
 
 def generate_samples(
@@ -522,6 +1445,7 @@ def generate_samples(
     spacing: float,
     adm_level: str = "ADM0",
     shapename: str = None,
+    chunk_size: int = 1000,
 ) -> gpd.GeoDataFrame:
     """
     Generate sample points within the geographical boundaries of a specified ISO code.
@@ -533,32 +1457,97 @@ def generate_samples(
         spacing (float): Spacing between sample points.
         adm_level (str, optional): Administrative level for geographical boundaries. Default is "ADM0".
         shapename (str, optional): Name of the shape within boundaries to filter. Default is None.
+        chunk_size (int, optional): Number of grid columns processed at a time
+            (see `iter_samples`). Default is 1000.
 
     Returns:
         gpd.GeoDataFrame: GeoDataFrame containing generated sample points within
             the specified boundaries.
     """
     # Get geographical boundaries for the ISO code at the specified administrative level
-    bounds = get_geoboundaries(config, iso_code, adm_level=adm_level)
+    bounds = get_geoboundaries(config, iso_code, adm_level=adm_level, crs="EPSG:3857")
     if shapename:
         bounds = bounds[bounds.shapeName == shapename]
-    bounds = bounds.to_crs("EPSG:3857")  # Convert to EPSG:3857
 
-    # Calculate bounds for generating XY coordinates
-    xmin, ymin, xmax, ymax = bounds.total_bounds
-    xcoords = [c for c in np.arange(xmin, xmax, spacing)]
-    ycoords = [c for c in np.arange(ymin, ymax, spacing)]
+    # Collect the interior points of the grid chunk by chunk
+    chunks = list(iter_samples(bounds, spacing, chunk_size=chunk_size))
+    if len(chunks) == 0:
+        points = gpd.GeoDataFrame(geometry=[], crs=bounds.crs)
+        return gpd.sjoin(points, bounds, predicate="within").drop(
+            ["index_right"], axis=1
+        )
 
-    # Create all combinations of XY coordinates
-    coordinate_pairs = np.array(np.meshgrid(xcoords, ycoords)).T.reshape(-1, 2)
-    # Create a list of Shapely points
-    geometries = gpd.points_from_xy(coordinate_pairs[:, 0], coordinate_pairs[:, 1])
+    return pd.concat(chunks)
 
-    # Create a GeoDataFrame of points and perform spatial join with bounds
-    points = gpd.GeoDataFrame(geometry=geometries, crs=bounds.crs).reset_index(
-        drop=True
-    )
-    points = gpd.sjoin(points, bounds, predicate="within")
-    points = points.drop(["index_right"], axis=1)
 
-    return points
+def iter_samples(bounds: gpd.GeoDataFrame, spacing: float, chunk_size: int = 1000):
+    """
+    Generate the points of a regular grid that fall within the given boundaries, in chunks.
+
+    The grid is the same as a full meshgrid over the boundaries' total bounds, but only the
+    points of the grid cells that touch the boundaries are created: the boundaries are
+    rasterized at grid resolution, one chunk of `chunk_size` grid columns at a time, and
+    only the candidate points are tested against the boundaries (`within`). Memory thus
+    grows with the size of a chunk rather than with the bounding box of the country.
+
+    Each point keeps its index in the full grid (x-major, as in `np.meshgrid(x, y).T`),
+    so the points and their UIDs do not depend on the chunk size.
+
+    Args:
+        bounds (gpd.GeoDataFrame): The boundaries, in a projected CRS (e.g. EPSG:3857).
+        spacing (float): Spacing between sample points.
+        chunk_size (int, optional): Number of grid columns processed at a time. Default is 1000.
+
+    Yields:
+        gpd.GeoDataFrame: The points of each chunk that fall within the boundaries,
+            with the attributes of their boundary.
+    """
+    if len(bounds) == 0:
+        return
+
+    # Calculate bounds for generating XY coordinates
+    xmin, ymin, xmax, ymax = bounds.total_bounds
+    xcoords = np.arange(xmin, xmax, spacing)
+    ycoords = np.arange(ymin, ymax, spacing)
+    n_y = len(ycoords)
+    if len(xcoords) == 0 or n_y == 0:
+        return
+
+    shapes = [
+        geom for geom in bounds.geometry if geom is not None and not geom.is_empty
+    ]
+    for start in range(0, len(xcoords), chunk_size):
+        chunk = xcoords[start : start + chunk_size]
+
+        # Rasterize the boundaries with one pixel centered on each grid point (north-up),
+        # marking every pixel touched by the boundaries as a candidate
+        transform = rio.Affine(
+            spacing, 0, chunk[0] - spacing / 2, 0, -spacing, ycoords[-1] + spacing / 2
+        )
+        mask = rasterio.features.rasterize(
+            shapes,
+            out_shape=(n_y, len(chunk)),
+            transform=transform,
+            all_touched=True,
+            dtype=np.uint8,
+        )
+        rows, cols = np.nonzero(mask)
+        if len(rows) == 0:
+            continue
+
+        # Create the candidate points, indexed by their position in the full grid
+        iy = n_y - 1 - rows
+        ix = start + cols
+        order = np.argsort(ix * n_y + iy)
+        ix, iy = ix[order], iy[order]
+        points = gpd.GeoDataFrame(
+            geometry=gpd.points_from_xy(xcoords[ix], ycoords[iy]),
+            index=ix * n_y + iy,
+            crs=bounds.crs,
+        )
+
+        # Keep the candidates that fall within the boundaries
+        points = gpd.sjoin(points, bounds, predicate="within")
+        points = points.drop(["index_right"], axis=1).sort_index(kind="stable")
+        if len(points) > 0:
+            yield points
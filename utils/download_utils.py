@@ -94,8 +94,7 @@ def download_osm(config: dict, category: str, source: str = "osm") -> gpd.GeoDat
     iso_codes = config["iso_codes"]
 
     # URL to fetch ISO code data
-    url = config["iso_codes_url"]
-    codes = pd.read_csv(url)
+    codes = data_utils.load_reference(config["iso_codes_url"], config=config)
 
     # Construct OSM query from the provided category keywords
     keywords = config[category]
@@ -408,7 +407,7 @@ def get_country(config: dict, source: str = "ms"):
     iso_codes = config["iso_codes"]
 
     # Load Microsoft dataset links
-    msf_links = pd.read_csv(config["microsoft_url"])
+    msf_links = data_utils.load_reference(config["microsoft_url"], config=config)
 
     matches = dict()  # Dictionary to store the matches
     for iso_code in iso_codes:
@@ -442,6 +441,9 @@ def download_buildings(config: dict, source: str = "ms", verbose: bool = False)
             - iso_codes (list): List of ISO codes to process.
             - vectors_dir (str): Directory where vector data is stored.
             - rasters_dir (str): Directory where raster data is stored.
+            - microsoft_url (str): URL of the Microsoft dataset links.
+            - google_url (str): URL of the Google Open Buildings tiles index.
+            - naturalearth_url (str): URL of the Natural Earth countries dataset.
         source (str): Source of the building data.
             Can be either "ms" (Microsoft) or "google". Defaults to "ms".
         verbose (bool): Flag to indicate verbosity of the download process. Defaults to False.
@@ -456,6 +458,12 @@ def download_buildings(config: dict, source: str = "ms", verbose: bool = False)
     # Get country matches based on the source
     matches = get_country(config, source)
 
+    # Resolve the dataset indexes to their cached local copies
+    url_key = {"ms": "microsoft_url", "google": "google_url"}[source]
+    building_url = data_utils.get_reference_file(config, config[url_key])
+    if source == "google":
+        country_url = data_utils.get_reference_file(config, config["naturalearth_url"])
+
     for iso_code in (pbar := data_utils.create_progress_bar(iso_codes)):
         pbar.set_description(f"Processing {iso_code}")
 
@@ -474,7 +482,7 @@ def download_buildings(config: dict, source: str = "ms", verbose: bool = False)
                 if source == "ms":
                     download_ms_buildings(
                         country,
-                        config["microsoft_url"],
+                        building_url,
                         out_dir=temp_dir,
                         merge_output=out_file,
                         quiet=quiet,
@@ -483,7 +491,8 @@ def download_buildings(config: dict, source: str = "ms", verbose: bool = False)
                 elif source == "google":
                     download_google_buildings(
                         country,
-                        config["google_url"],
+                        building_url,
+                        country_url=country_url,
                         out_dir=temp_dir,
                         merge_output=out_file,
                         quiet=quiet,
@@ -601,7 +610,7 @@ def download_ms_buildings(
     if not os.path.exists(out_dir):
         os.makedirs(out_dir)
 
-    dataset_links = pd.read_csv(building_url)
+    dataset_links = data_utils.load_reference(building_url, pd.read_csv)
     country_links = dataset_links[dataset_links.Location == location]
 
     if not quiet:
@@ -644,6 +653,7 @@ def download_google_buildings(
     keep_geojson: bool = False,
     overwrite: bool = False,
     quiet: bool = False,
+    country_url: str = "https://naciscdn.org/naturalearth/110m/cultural/ne_110m_admin_0_countries.zip",
     **kwargs,
 ) -> List[str]:
     """
@@ -660,15 +670,13 @@ def download_google_buildings(
         keep_geojson: Optional. If True, the GeoJSON files will be kept after converting them to CSV files.
         overwrite: Optional. If True, overwrite the existing files.
         quiet: Optional. If True, suppresses the download progress messages.
+        country_url: Optional. URL or local path of the Natural Earth countries dataset.
         **kwargs: Additional keyword arguments to be passed to the `gpd.to_file` function.
 
     Returns:
         A list of file paths of the downloaded files.
 
     """
-    country_url = (
-        "https://naciscdn.org/naturalearth/110m/cultural/ne_110m_admin_0_countries.zip"
-    )
 
     if out_dir is None:
         out_dir = os.getcwd()
@@ -676,8 +684,8 @@ def download_google_buildings(
     if not os.path.exists(out_dir):
         os.makedirs(out_dir)
 
-    building_gdf = gpd.read_file(building_url)
-    country_gdf = gpd.read_file(country_url)
+    building_gdf = data_utils.load_reference(building_url, gpd.read_file)
+    country_gdf = data_utils.load_reference(country_url, gpd.read_file)
 
     country = country_gdf[country_gdf["NAME"] == location]
 
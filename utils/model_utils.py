@@ -1,6 +1,6 @@
 import os
+import copy
 import yaml
-import operator
 import pandas as pd
 import geopandas as gpd
 import rasterio as rio
@@ -15,6 +15,9 @@ import logging
 logging.basicConfig(level=logging.INFO)
 SEED = 42
 
+model_config_cache = dict()
+leaderboard_cache = dict()
+
 
 def load_data(
     config: dict,
@@ -246,6 +249,7 @@ def train_val_test_split(
     test_size: float = 0.2,
     attributes: list = ["rurban"],
     verbose: bool = True,
+    seed: int = SEED,
 ) -> pd.DataFrame:
     """
     Split data into training, validation, and test sets.
@@ -257,6 +261,8 @@ def train_val_test_split(
         attributes (list, optional): List of attributes to group by for stratified splitting.
             Defaults to ["rurban"].
         verbose (bool, optional): Whether to print detailed logging info. Defaults to True.
+        seed (int, optional): Seed of the random permutation within each stratum.
+            Defaults to SEED.
 
     Returns:
         DataFrame: The dataset with an additional 'dataset' column indicating
@@ -266,55 +272,44 @@ def train_val_test_split(
     if "dataset" in data.columns:
         return data
 
-    # Initialize dataset column
-    data["dataset"] = None
     total_size = len(data)
-    test_size = int((total_size * test_size))
     logging.info(f"Data dimensions: {total_size}")
 
-    # Make a copy of the data for manipulation
-    test = data.copy()
-
-    # Calculate value counts for stratification
-    value_counts = data.groupby(attributes)[attributes[-1]].value_counts()
-    value_counts = pd.DataFrame(value_counts).reset_index()
+    # Assign each row to a stratum; rows with missing attributes get -1
+    strata = data.groupby(attributes, sort=True).ngroup()
+    strata = strata.fillna(-1).astype(int).to_numpy()
+    in_strata = strata >= 0
+    counts = np.bincount(strata[in_strata])
 
-    for _, row in value_counts.iterrows():
-        subtest = test.copy()
-        # Filter data by stratification attributes
-        for i in range(len(attributes)):
-            subtest = subtest[subtest[attributes[i]] == row[attributes[i]]]
-
-        # Determine size of the subtest split
-        subtest_size = int(test_size * (row["count"] / total_size))
-        if subtest_size > len(subtest):
-            subtest_size = len(subtest)
-
-        # Sample UIDs for the test split
-        subtest_files = subtest.sample(subtest_size, random_state=SEED).UID.values
-        in_test = data["UID"].isin(subtest_files)
-        data.loc[in_test, "dataset"] = "test"
-
-        # Sample UIDs for the validation split
-        subval_files = (
-            data[data.dataset != "test"]
-            .sample(subtest_size, random_state=SEED)
-            .UID.values
-        )
-        in_val = data["UID"].isin(subval_files)
-        data.loc[in_val, "dataset"] = "val"
+    # Determine the size of the test (and val) split of each stratum
+    test_size = int((total_size * test_size))
+    subtest_sizes = (test_size * counts / total_size).astype(int)
+    subtest_size = np.zeros(total_size, dtype=int)
+    subtest_size[in_strata] = subtest_sizes[strata[in_strata]]
+
+    # Randomly permute rows within each stratum and rank them
+    rng = np.random.default_rng(seed)
+    order = np.lexsort((rng.random(total_size), strata))
+    sorted_strata = strata[order]
+    ranks = np.empty(total_size, dtype=int)
+    ranks[order] = np.arange(total_size) - np.searchsorted(
+        sorted_strata, sorted_strata, side="left"
+    )
 
-    # Fill remaining data as training split
-    data.dataset = data.dataset.fillna("train")
+    # The first ranks of each stratum go to test, the next to val, and the rest to train
+    dataset = np.full(total_size, "train", dtype=object)
+    dataset[in_strata & (ranks < 2 * subtest_size)] = "val"
+    dataset[in_strata & (ranks < subtest_size)] = "test"
+    data["dataset"] = dataset
 
     return data
 
 
-def get_model_output(
+def get_model_output_file(
     iso_code: str, config: dict, phase: str = "test", pretrained=None
-) -> pd.DataFrame:
+) -> str:
     """
-    Retrieve the model output from a CSV file.
+    Construct the path to the CSV file containing the model output.
 
     Args:
         iso_code (str): ISO code of the dataset.
@@ -325,7 +320,7 @@ def get_model_output(
         phase (str, optional): Phase of the data ('test', 'train', 'val'). Defaults to "test".
 
     Returns:
-        pd.DataFrame: DataFrame containing the model output.
+        str: Path to the model output CSV file.
     """
     if pretrained:
         exp_name = f"{iso_code}_{config['config_name']}_{pretrained}"
@@ -340,82 +335,296 @@ def get_model_output(
         exp_name,
         filename,
     )
+    return output_path
+
+
+def get_model_file(
+    iso_code: str, config: dict, suffix: str = None, ext: str = ".pth"
+) -> str:
+    """
+    Construct the path to a trained model file.
+
+    Args:
+        iso_code (str): ISO code of the dataset.
+        config (dict): Configuration dictionary with keys:
+            - config_name (str): Name of the configuration.
+            - exp_dir (str): Directory where experiments are stored.
+            - project (str): Name of the project.
+        suffix (str, optional): Suffix of an exported model (e.g., "export"). Defaults to None.
+        ext (str, optional): File extension. Defaults to ".pth".
+
+    Returns:
+        str: Path to the model file.
+    """
+    exp_name = f"{iso_code}_{config['config_name']}"
+    filename = f"{exp_name}_{suffix}{ext}" if suffix else f"{exp_name}{ext}"
+    model_file = os.path.join(
+        os.getcwd(), config["exp_dir"], config["project"], exp_name, filename
+    )
+    return model_file
+
+
+def get_model_output(
+    iso_code: str, config: dict, phase: str = "test", pretrained=None
+) -> pd.DataFrame:
+    """
+    Retrieve the model output from a CSV file.
+
+    Args:
+        iso_code (str): ISO code of the dataset.
+        config (dict): Configuration dictionary with keys:
+            - config_name (str): Name of the configuration.
+            - exp_dir (str): Directory where experiments are stored.
+            - project (str): Name of the project.
+        phase (str, optional): Phase of the data ('test', 'train', 'val'). Defaults to "test".
+
+    Returns:
+        pd.DataFrame: DataFrame containing the model output.
+    """
+    output_path = get_model_output_file(iso_code, config, phase, pretrained)
     # logging.info(output_path)
     output = pd.read_csv(output_path)
     return output
 
 
-def get_best_models(iso_code: str, config: dict = None) -> list:
+def get_cam_results_file(iso_code: str, model_config: dict) -> str:
     """
-    Identifies the best-performing models based on their Area Under the Precision-Recall Curve (AUPRC).
+    Construct the path to the CAM results file generated by `src/cam_evaluate.py`.
+
+    Args:
+        iso_code (str): ISO code of the dataset.
+        model_config (dict): Configuration dictionary with keys:
+            - model (str): The name of the model.
+            - project (str): Name of the project.
+
+    Returns:
+        str: Path to the CAM results CSV file.
+    """
+    return os.path.join(
+        os.getcwd(),
+        "exp",
+        model_config["project"],
+        f"{iso_code}_{model_config['model']}",
+        "cam_results.csv",
+    )
+
+
+def read_cam_method(cam_results_file: str) -> str:
+    """
+    Read the CAM method with the lowest score from a CAM results file.
+
+    Args:
+        cam_results_file (str): Path to the CAM results CSV file.
+
+    Returns:
+        str: The name of the CAM method with the lowest score.
+    """
+    cam_results = pd.read_csv(cam_results_file)
+    cam_results["method"] = cam_results["method"].replace(
+        {"gradcam++": "gradcamplusplus"}
+    )
+    cam_method = cam_results[cam_results["score"] == cam_results["score"].min()][
+        "method"
+    ].values[0]
+    return cam_method
+
+
+def load_model_config(model_file: str, config: dict = None) -> dict:
+    """
+    Load a model configuration file, reusing configurations already loaded
+    by the current process.
+
+    Args:
+        model_file (str): Path to the model configuration file.
+        config (dict, optional): Configuration dictionary whose project name
+            overwrites the project name of the model configuration. Defaults to None.
+
+    Returns:
+        dict: A copy of the model configuration dictionary.
+    """
+    if model_file not in model_config_cache:
+        model_config_cache[model_file] = config_utils.load_config(
+            os.path.join(os.getcwd(), model_file)
+        )
+    model_config = copy.deepcopy(model_config_cache[model_file])
+
+    # Update project name to match config
+    if config:
+        model_config["project"] = config["project"]
+    return model_config
+
+
+def get_leaderboard(iso_code: str, config: dict, refresh: bool = False) -> pd.DataFrame:
+    """
+    Loads the leaderboard of all candidate models for a given ISO code and project.
+
+    The leaderboard records, for each model in `config["all_models"]`, the test AUPRC
+    (at the optimal threshold of the validation set), the optimal threshold, and the
+    best CAM method. It is saved to `<exp_dir>/<project>/<iso_code>_leaderboard.csv`
+    and kept in memory for the lifetime of the process. A model is only re-evaluated
+    when the modification time of its val/test output CSVs or CAM results changes.
 
     Args:
         iso_code (str): ISO code for the region being evaluated.
         config (dict): Configuration dictionary containing:
             - "all_models": A dictionary of model types and corresponding file paths.
             - "project": Name of the current project.
+            - "exp_dir": Directory where experiments are stored.
+        refresh (bool, optional): If True, re-evaluates all models. Defaults to False.
 
     Returns:
-        list: A sorted list of the best model file paths, ranked by AUPRC.
+        pd.DataFrame: The leaderboard, with one row per model file.
     """
-    # Initialize a dictionary to store AUPRC results for each model type
-    config_results = dict()
+    out_file = os.path.join(
+        os.getcwd(), config["exp_dir"], config["project"], f"{iso_code}_leaderboard.csv"
+    )
 
-    # Loop through each model type and its corresponding files
+    # Collect the model files and the modification times of their outputs
+    models = []
     for model_type in config["all_models"]:
-        config_results[model_type] = dict()
-
         for model_file in config["all_models"][model_type]:
-            # Load the configuration for the current model
-            model_config = config_utils.load_config(model_file)
-            # Update project name to match config
-            if config:
-                model_config["project"] = config["project"]
-
-            # Get validation and test outputs
-            val_output = get_model_output(
-                iso_code, model_config, pretrained=None, phase="val"
-            )
-            test_output = get_model_output(
-                iso_code, model_config, pretrained=None, phase="test"
+            model_config = load_model_config(model_file, config)
+            val_file = get_model_output_file(iso_code, model_config, phase="val")
+            test_file = get_model_output_file(iso_code, model_config, phase="test")
+            cam_file = get_cam_results_file(iso_code, model_config)
+            mtimes = (
+                os.path.getmtime(val_file),
+                os.path.getmtime(test_file),
+                os.path.getmtime(cam_file) if os.path.exists(cam_file) else 0.0,
             )
+            models.append((model_type, model_file, model_config, mtimes, cam_file))
+
+    # Return the in-memory leaderboard if none of the outputs have changed
+    signature = tuple((model[1], model[3]) for model in models)
+    if not refresh and out_file in leaderboard_cache:
+        if leaderboard_cache[out_file][0] == signature:
+            return leaderboard_cache[out_file][1]
+
+    # Load the saved leaderboard to reuse the results of unchanged models
+    cached = pd.DataFrame()
+    if not refresh and os.path.exists(out_file):
+        cached = pd.read_csv(out_file, float_precision="round_trip")
+        cached = cached.drop_duplicates("model_file").set_index("model_file")
+
+    leaderboard = []
+    mtime_cols = ["val_mtime", "test_mtime", "cam_mtime"]
+    for model_type, model_file, model_config, mtimes, cam_file in models:
+        if model_file in cached.index:
+            row = cached.loc[model_file]
+            if tuple(row[mtime_cols]) == mtimes and row["model_type"] == model_type:
+                leaderboard.append({"model_file": model_file, **row.to_dict()})
+                continue
+
+        # Get validation and test outputs
+        val_output = get_model_output(iso_code, model_config, phase="val")
+        test_output = get_model_output(iso_code, model_config, phase="test")
+
+        # Evaluate model performance on validation data
+        val_results = eval_utils.evaluate(
+            y_true=val_output["y_true"],
+            y_pred=val_output["y_preds"],
+            y_prob=val_output["y_probs"],
+            beta=2,
+        )
+        # Evaluate model performance on test data using the
+        # optimal threshold from validation
+        test_results = eval_utils.evaluate(
+            y_true=test_output["y_true"],
+            y_pred=test_output["y_preds"],
+            y_prob=test_output["y_probs"],
+            beta=2,
+            optim_threshold=val_results["optim_threshold"],
+        )
 
-            # Evaluate model performance on validation data
-            val_results = eval_utils.evaluate(
-                y_true=val_output["y_true"],
-                y_pred=val_output["y_preds"],
-                y_prob=val_output["y_probs"],
-                beta=2,
-            )
-            # Evaluate model performance on test data using the
-            # optimal threshold from validation
-            test_results = eval_utils.evaluate(
-                y_true=test_output["y_true"],
-                y_pred=test_output["y_preds"],
-                y_prob=test_output["y_probs"],
-                beta=2,
-                optim_threshold=val_results["optim_threshold"],
-            )
+        # Get the best CAM method, if the CAM methods have been evaluated
+        cam_method = None
+        if os.path.exists(cam_file):
+            cam_method = read_cam_method(cam_file)
+
+        leaderboard.append(
+            {
+                "model_file": model_file,
+                "model_type": model_type,
+                "config_name": model_config["config_name"],
+                "model": model_config["model"],
+                "val_auprc": val_results["auprc"],
+                "auprc": test_results["auprc"],
+                "optim_threshold": val_results["optim_threshold"],
+                "cam_method": cam_method,
+                "val_mtime": mtimes[0],
+                "test_mtime": mtimes[1],
+                "cam_mtime": mtimes[2],
+            }
+        )
 
-            # Store the test AUPRC for the current model
-            config_results[model_type][model_file] = test_results["auprc"]
+    # Save the leaderboard and keep it in memory
+    leaderboard = pd.DataFrame(leaderboard)
+    leaderboard["cam_method"] = leaderboard["cam_method"].astype(object)
+    leaderboard.loc[leaderboard["cam_method"].isna(), "cam_method"] = None
+    data_utils.makedir(os.path.dirname(out_file))
+    leaderboard.to_csv(out_file, index=False)
+    leaderboard_cache[out_file] = (signature, leaderboard)
 
-    # Identify the best model for each model type
-    best_models = []
-    for model_type in config_results:
-        # Select the model with the highest AUPRC within the type
-        best_model = max(config_results[model_type], key=config_results[model_type].get)
-        best_models.append((best_model, config_results[model_type][best_model]))
+    return leaderboard
 
-    # Sort all best models across types by AUPRC in descending order
-    best_models.sort(key=operator.itemgetter(1), reverse=True)
+
+def get_best_models(iso_code: str, config: dict = None) -> list:
+    """
+    Identifies the best-performing models based on their Area Under the Precision-Recall Curve (AUPRC).
+
+    Args:
+        iso_code (str): ISO code for the region being evaluated.
+        config (dict): Configuration dictionary containing:
+            - "all_models": A dictionary of model types and corresponding file paths.
+            - "project": Name of the current project.
+
+    Returns:
+        list: A sorted list of the best model file paths, ranked by AUPRC.
+    """
+    leaderboard = get_leaderboard(iso_code, config)
+
+    # Sort all models by AUPRC in descending order and select
+    # the model with the highest AUPRC within each type
+    best_models = leaderboard.sort_values("auprc", ascending=False, kind="stable")
+    best_models = best_models.drop_duplicates("model_type", keep="first")
 
     # Extract just the model file paths
-    best_models = [x[0] for x in best_models]
+    best_models = list(best_models["model_file"])
 
     return best_models
 
 
+def get_best_model(iso_code: str, config: dict) -> tuple:
+    """
+    Loads the configuration and best CAM method of the best-performing model.
+
+    Args:
+        iso_code (str): ISO code for the region being evaluated.
+        config (dict): Configuration dictionary containing:
+            - "all_models": A dictionary of model types and corresponding file paths.
+            - "project": Name of the current project.
+
+    Returns:
+        tuple: A tuple containing:
+            - model_config (dict): Configuration of the best model, with the project
+                name overwritten to match config.
+            - cam_method (str): The best CAM method for the best model.
+
+    Raises:
+        FileNotFoundError: If the CAM results file of the best model does not exist.
+    """
+    leaderboard = get_leaderboard(iso_code, config)
+    best_model = get_best_models(iso_code, config)[0]
+    model_config = load_model_config(best_model, config)
+
+    cam_method = leaderboard.set_index("model_file").loc[best_model, "cam_method"]
+    if not cam_method:
+        cam_results_file = get_cam_results_file(iso_code, model_config)
+        raise FileNotFoundError(f"CAM results file not found at {cam_results_file}")
+
+    return model_config, cam_method
+
+
 def get_ensemble_configs(iso_code: str, config: dict) -> list:
     """
     Loads and returns a list of model configuration files for ensemble predictions.
@@ -434,10 +643,9 @@ def get_ensemble_configs(iso_code: str, config: dict) -> list:
 
     # Iterate over each model file associated with the given iso_code
     for model_file in configs:  # config[iso_code]:
-        # Load the configuration file for the model
-        model_config = config_utils.load_config(os.path.join(os.getcwd(), model_file))
-        # Update project name to match config
-        model_config["project"] = config["project"]
+        # Load the configuration file for the model and update
+        # the project name to match config
+        model_config = load_model_config(model_file, config)
         # Add loaded configuration to the list
         model_configs.append(model_config)
 
@@ -2,6 +2,7 @@ import os
 import pandas as pd
 import numpy as np
 import geopandas as gpd
+import shapely
 import logging
 import joblib
 import torch
@@ -50,15 +51,8 @@ def read_file(
 
     # Determine the file path based on the source
     if source == "preds":
-        # Load best model config
-        best_models = model_utils.get_best_models(iso_code, config)
-        model_config = config_utils.load_config(best_models[0])
-
-        # Overwrite project name to match config
-        model_config["project"] = config["project"]
-
-        # Get best CAM method
-        cam_method = cam_utils.get_best_cam_method(iso_code, model_config)
+        # Load best model config and best CAM method from the leaderboard
+        model_config, cam_method = model_utils.get_best_model(iso_code, config)
 
         # Update output directory for CAM results
         out_dir = os.path.join(out_dir, "cams")
@@ -96,13 +90,8 @@ def standardize_data(
     Returns:
         gpd.GeoDataFrame: Standardized geospatial data ready for further analysis.
     """
-    # Load configuration files
-    best_models = model_utils.get_best_models(iso_code, config)
-    model_config = config_utils.load_config(best_models[0])
-    model_config["project"] = config["project"]
-
-    # Get best CAM method
-    cam_method = cam_utils.get_best_cam_method(iso_code, model_config)
+    # Load best model config and best CAM method from the leaderboard
+    model_config, cam_method = model_utils.get_best_model(iso_code, config)
 
     # Read the input data file based on iso_code, config, CAM method, and source
     data = read_file(iso_code, model_config, cam_method=cam_method, source=source)
@@ -206,23 +195,21 @@ def add_admin_fields(
     admin2.rename(columns={"name": "admin2"}, inplace=True)
 
     # Extract admin1 ID from admin2 entries by slicing the first six characters
-    admin2["admin1_id_giga"] = admin2["admin2_id_giga"].apply(lambda x: x[:6])
+    admin2["admin1_id_giga"] = admin2["admin2_id_giga"].str[:6]
 
     # Map admin1 names onto admin2 entries using admin1 IDs
     admin2["admin1"] = admin2["admin1_id_giga"].map(
         dict(zip(admin1["admin1_id_giga"], admin1["admin1"]))
     )
 
-    # Spatially join admin2 data to input data using 'intersects' predicate for matching
-    data_joined = data.sjoin(
-        admin2[["admin1", "admin1_id_giga", "admin2", "admin2_id_giga", "geometry"]],
-        how="left",
-        predicate="intersects",
-    )
-
-    # Remove 'index_right' column from the joined data (artifact of spatial join)
-    data = data_joined.drop(columns=["index_right"])
-    data = data.drop_duplicates(subset=["giga_id_school"], keep="first")
+    # Locate each point in admin2 once; admin1 fields come with the admin2 entry
+    data = data.drop_duplicates(subset=["giga_id_school"], keep="first").copy()
+    tree = shapely.STRtree(admin2.geometry.values)
+    matches = data_utils.query_first(tree, data.geometry.values, predicate="intersects")
+    columns = ["admin1", "admin1_id_giga", "admin2", "admin2_id_giga"]
+    admin = admin2[columns].iloc[np.maximum(matches, 0)].reset_index(drop=True)
+    for column in columns:
+        data[column] = admin[column].where(matches >= 0).values
 
     return data.reset_index(drop=True)
 
@@ -483,25 +470,21 @@ def join_with_geoboundary(
     Returns:
         gpd.GeoDataFrame: Updated GeoDataFrame with additional columns for each administrative level.
     """
-    # Initialize the list of columns to include in the final GeoDataFrame
-    columns = list(data.columns)
+    # Keep only the administrative levels that exist for this country
+    available = []
     for adm_level in adm_levels:
-        # Add the current administrative level to the list of columns
-        columns = columns + [adm_level]
-        # Retrieve geoboundary data for the current administrative level
         try:
-            admin = data_utils.get_geoboundaries(config, iso_code, adm_level=adm_level)
-            # Reproject the geoboundary data to match the CRS of the main dataset
-            admin = admin.to_crs(data.crs)
-            # Rename the shapeName column to match the administrative level
-            admin = admin.rename(columns={"shapeName": adm_level})
-            # Perform a spatial join with the main dataset to include administrative boundary information
-            data = gpd.sjoin(data, admin[["geometry", adm_level]], how="left")
-            # Keep only the columns that were in the original dataset plus the new administrative level
-            data = data[columns]
+            data_utils.load_geoboundaries(config, iso_code, adm_level=adm_level)
+            available.append(adm_level)
         except:
             print(f"ADM level {adm_level} does not exist for {iso_code}")
 
+    # Assign all administrative levels in a single pass
+    data = data.copy()
+    admin = data_utils.assign_admin_levels(config, iso_code, data, available)
+    for adm_level in available:
+        data[adm_level] = admin[adm_level]
+
     return data
 
 
@@ -624,15 +607,8 @@ def load_preds(
         gpd.GeoDataFrame: Processed GeoDataFrame with predictions, optional calibration applied,
             and joined administrative boundaries.
     """
-    # Get the ensemble model configurations
-    best_models = model_utils.get_best_models(iso_code, data_config)
-    model_config = config_utils.load_config(best_models[0])
-
-    # Update project name to match config
-    model_config["project"] = data_config["project"]
-
-    # Retrieve the best CAM method
-    cam_method = cam_utils.get_best_cam_method(iso_code, model_config)
+    # Load best model config and best CAM method from the leaderboard
+    model_config, cam_method = model_utils.get_best_model(iso_code, data_config)
 
     # Construct the output directory path for the CAM results
     out_dir = os.path.join(
@@ -716,21 +692,13 @@ def save_results(iso_code: str, data: gpd.GeoDataFrame, source: str, config: dic
         "results",
         config["project"],
     )
-    # Load best model config
-    best_models = model_utils.get_best_models(iso_code, config)
-    best_config = config_utils.load_config(best_models[0])
-
-    # Overwrite project name to match config
-    best_config["project"] = config["project"]
-
-    # Get best CAM method
-    cam_method = cam_utils.get_best_cam_method(iso_code, best_config)
+    # Load best model config and best CAM method from the leaderboard
+    model_config, cam_method = model_utils.get_best_model(iso_code, config)
 
     # Determine the output file name based on the source type and CAM method
     out_file = f"{iso_code}_{source}.geojson"
     if source == "preds":
         out_dir = os.path.join(out_dir, "cams")
-        model_config = model_utils.get_ensemble_configs(iso_code, config)[0]
         out_file = f"{iso_code}_{model_config['config_name']}_{cam_method}.geojson"
 
     # Construct the full path for the output file
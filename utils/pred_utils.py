@@ -1,4 +1,7 @@
 import os
+import contextlib
+from collections import OrderedDict
+import time
 import copy
 import logging
 import operator
@@ -11,6 +14,9 @@ import numpy as np
 
 import torch
 import torch.nn.functional as nn
+import onnxruntime as ort
+from torch.ao import quantization
+from torch.ao.quantization import quantize_fx
 
 import torchvision
 import torchvision.transforms.functional as F
@@ -22,6 +28,7 @@ import matplotlib.pyplot as plt
 from shapely import geometry
 import rasterio as rio
 from rasterio.mask import mask
+from rasterio.enums import Resampling
 import rasterio.plot
 
 from src import sat_download
@@ -29,6 +36,7 @@ from utils import cnn_utils
 from utils import data_utils
 from utils import config_utils
 from utils import model_utils
+from utils import eval_utils
 
 SEED = 42
 np.random.seed(SEED)
@@ -40,41 +48,289 @@ torch.backends.cudnn.benchmark = False
 device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
 logging.basicConfig(level=logging.INFO)
 
+# Tile statistics keyed by (path, modification time), least recently used first
+tile_stats_cache = OrderedDict()
+tile_stats_cache_size = 100000
+runtime_exts = {"onnx": ".onnx", "torchscript": ".ts"}
+
+
+def get_tile_stats(files: list, size: int = 32) -> pd.DataFrame:
+    """
+    Computes cheap quality statistics for each image from a low-resolution decode.
+
+    Each image is read at `size` x `size` pixels using decimated (nearest) reads, and the
+    statistics are computed in a vectorized way over the stacked thumbnails. Statistics
+    are cached per file path and modification time, so ensemble members do not decode the
+    same image twice and re-downloaded images are decoded again. The cache keeps the
+    `tile_stats_cache_size` most recently used images.
+
+    Args:
+        files (list): List of image file paths.
+        size (int, optional): Width and height of the thumbnails. Default is 32.
+
+    Returns:
+        pd.DataFrame: A DataFrame with one row per file and the following columns:
+            - readable (bool): Whether the image could be decoded as an RGB raster.
+            - nodata_fraction (float): Fraction of pixels that are all black or all white.
+            - std (float): Standard deviation of the grayscale pixel values.
+            - uniform_fraction (float): Fraction of pixels close to the median colour.
+            - cloud_fraction (float): Fraction of bright, unsaturated pixels.
+    """
+    # Key the images by path and modification time (None for missing files)
+    keys = []
+    for file in files:
+        try:
+            keys.append((file, os.stat(file).st_mtime_ns))
+        except OSError:
+            keys.append((file, None))
+    unique_keys = list(dict.fromkeys(keys))
+    tile_stats = {
+        key: tile_stats_cache[key] for key in unique_keys if key in tile_stats_cache
+    }
+
+    # Decode the thumbnails of the images that are not cached yet
+    new_keys = [key for key in unique_keys if key not in tile_stats]
+    new_files = [file for file, _ in new_keys]
+    thumbnails, readable = [], []
+    for file in new_files:
+        try:
+            with rio.open(file) as src:
+                image = src.read(
+                    indexes=[1, 2, 3] if src.count >= 3 else [1, 1, 1],
+                    out_shape=(3, size, size),
+                    resampling=Resampling.nearest,
+                )
+            thumbnails.append(image.astype(np.float32))
+            readable.append(True)
+        except Exception:
+            # Missing files and WMS error documents saved with a .tiff extension
+            thumbnails.append(np.zeros((3, size, size), dtype=np.float32))
+            readable.append(False)
+
+    if len(new_files) > 0:
+        # Compute the statistics over all thumbnails at once
+        images = np.stack(thumbnails).reshape(len(new_files), 3, -1)
+        nodata = (images.max(axis=1) == 0) | (images.min(axis=1) == 255)
+        gray = images.mean(axis=1)
+        median = np.median(images, axis=2, keepdims=True)
+        uniform = np.abs(images - median).max(axis=1) <= 8
+        cloud = (images.min(axis=1) >= 200) & (np.ptp(images, axis=1) <= 20)
+
+        stats = pd.DataFrame(
+            {
+                "readable": readable,
+                "nodata_fraction": nodata.mean(axis=1),
+                "std": gray.std(axis=1),
+                "uniform_fraction": uniform.mean(axis=1),
+                "cloud_fraction": cloud.mean(axis=1),
+            },
+        )
+        tile_stats.update(zip(new_keys, stats.to_dict(orient="records")))
+
+    # Update the cache and evict the least recently used images
+    for key in unique_keys:
+        tile_stats_cache[key] = tile_stats[key]
+        tile_stats_cache.move_to_end(key)
+    while len(tile_stats_cache) > tile_stats_cache_size:
+        tile_stats_cache.popitem(last=False)
+
+    return pd.DataFrame([tile_stats[key] for key in keys])
+
+
+def get_tile_status(files: list, config: dict = None) -> np.ndarray:
+    """
+    Tags degenerate images (unreadable, no-data, blank or cloudy) before inference.
+
+    The thresholds can be overridden in the configuration with the keys `max_nodata_fraction`
+    (default 0.5), `min_tile_std` (default 2.0), `max_uniform_fraction` (default 0.95),
+    and `max_cloud_fraction` (default 0.8).
+
+    Args:
+        files (list): List of image file paths.
+        config (dict, optional): Configuration dictionary with the filter thresholds.
+            Default is None.
+
+    Returns:
+        np.ndarray: Array of tile statuses, one of "valid", "unreadable", "nodata",
+            "cloud", or "blank", in order of precedence.
+    """
+    config = config or dict()
+    if len(files) == 0:
+        return np.array([], dtype=object)
+
+    stats = get_tile_stats(files)
+    status = np.select(
+        [
+            ~stats["readable"].astype(bool),
+            stats["nodata_fraction"] > config.get("max_nodata_fraction", 0.5),
+            stats["cloud_fraction"] > config.get("max_cloud_fraction", 0.8),
+            (stats["std"] < config.get("min_tile_std", 2.0))
+            | (stats["uniform_fraction"] > config.get("max_uniform_fraction", 0.95)),
+        ],
+        ["unreadable", "nodata", "cloud", "blank"],
+        default="valid",
+    ).astype(object)
+
+    # Log the number of skipped tiles
+    n_skipped = (status != "valid").sum()
+    if n_skipped > 0:
+        logging.info(f"Skipping {n_skipped}/{len(files)} degenerate tiles.")
+
+    return status
+
+
+def save_tile_report(
+    results: gpd.GeoDataFrame, iso_code: str, shapename: str, config: dict
+) -> pd.DataFrame:
+    """
+    Saves the number of tiles per pre-filter status of a prediction run to a CSV file.
+
+    Args:
+        results (gpd.GeoDataFrame): Prediction results with a "tile_status" column.
+        iso_code (str): ISO code for the region or dataset being processed.
+        shapename (str): Name of the shape or region for the output file naming.
+        config (dict): Configuration dictionary containing the project name.
+
+    Returns:
+        pd.DataFrame: A single-row DataFrame with the total, valid, and skipped tile counts,
+            and the count of each skip reason.
+    """
+    out_dir = data_utils.makedir(
+        os.path.join("output", iso_code, "results", config["project"], "tiles")
+    )
+    out_file = os.path.join(out_dir, f"{iso_code}_{shapename}_tile_report.csv")
+
+    # Results cached before the pre-filter was introduced have no status column
+    status = pd.Series("valid", index=results.index)
+    if "tile_status" in results.columns:
+        status = results["tile_status"].fillna("valid")
+
+    # Count the tiles per status
+    report = {"tiles": len(results), "skipped": int((status != "valid").sum())}
+    for name in ["valid", "unreadable", "nodata", "cloud", "blank"]:
+        report[name] = int((status == name).sum())
+    report = pd.DataFrame([report])
+    print(f"Tile report: {report.to_dict(orient='records')[0]}")
+    report.to_csv(out_file, index=False)
+
+    return report
+
+
+def load_image_batches(files: list, config: dict, batch_size: int = 16):
+    """
+    Loads and preprocesses images in batches with the test transforms.
+
+    Args:
+        files (list): List of image file paths.
+        config (dict): Configuration dictionary containing "img_size".
+        batch_size (int, optional): Number of images per batch. Default is 16.
+
+    Yields:
+        torch.Tensor: Batch of preprocessed images of shape (N, 3, img_size, img_size) on the CPU.
+    """
+    transforms = cnn_utils.get_transforms(config["img_size"])
+    batches = list(range(0, len(files), batch_size))
+    for index in data_utils.create_progress_bar(batches):
+        images = [
+            transforms["test"](Image.open(file).convert("RGB"))
+            for file in files[index : index + batch_size]
+        ]
+        yield torch.stack(images)
+
+
+def predict_files(files: list, model, config: dict, batch_size: int = 16) -> np.ndarray:
+    """
+    Predicts the positive class probabilities of images in batches.
+
+    Args:
+        files (list): List of image file paths.
+        model (torch.nn.Module or RuntimeModel): The model used for predictions.
+        config (dict): Configuration dictionary containing "img_size".
+        batch_size (int, optional): Number of images per batch. Default is 16.
+
+    Returns:
+        np.ndarray: The predicted probabilities of the positive class.
+    """
+    probs = []
+    for batch in load_image_batches(files, config, batch_size):
+        with torch.no_grad():
+            output = model(batch.to(device))
+        probs.append(nnf.softmax(output, dim=1)[:, 1].cpu().numpy())
+
+    return np.concatenate(probs) if len(probs) > 0 else np.array([])
+
 
 def cnn_predict_images(data: dict, model: torch.nn.Module, config: dict, in_dir: str):
     """
     Predicts probabilities for images using a convolutional neural network (CNN).
 
+    Degenerate images (see `get_tile_status`) are not passed to the model and are assigned
+    a probability of 0.
+
     Args:
         data (dict): Dictionary containing the data and results, which will be updated with probabilities.
-        model (torch.nn.Module): The CNN model used for predictions.
+        model (torch.nn.Module or RuntimeModel): The CNN model used for predictions.
         config (dict): Configuration dictionary containing model and image settings, including "img_size".
         in_dir (str): Directory path where the images are stored.
 
     Returns:
-        dict: The updated `data` dictionary, now including a "prob" key with the predicted probabilities.
+        dict: The updated `data` dictionary, now including a "prob" key with the predicted
+            probabilities and a "tile_status" key with the pre-filter status of each image.
     """
     # Retrieve file paths for images to be processed
     files = data_utils.get_image_filepaths(config, data, in_dir)
-
-    probs = []
-    for file in data_utils.create_progress_bar(files):
-        # Open and preprocess the image
-        image = Image.open(file).convert("RGB")
-        transforms = cnn_utils.get_transforms(config["img_size"])
-
-        # Perform the model prediction
-        output = model(transforms["test"](image).to(device).unsqueeze(0))
-
-        # Compute the softmax probabilities and extract the probability for the positive class
-        soft_outputs = nnf.softmax(output, dim=1).detach().cpu().numpy()
-        probs.append(soft_outputs[:, 1][0])
+    status = get_tile_status(files, config)
+
+    # Predict the valid images in batches and skip degenerate images
+    valid = np.where(status == "valid")[0]
+    probs = np.zeros(len(files))
+    probs[valid] = predict_files(
+        [files[index] for index in valid],
+        model,
+        config,
+        batch_size=config.get("batch_size", 16),
+    )
 
     # Update the data dictionary with the computed probabilities
     data["prob"] = probs
+    data["tile_status"] = status
     return data
 
 
+def get_pred_file(
+    iso_code: str, shapename: str, config: dict, backend: str = None
+) -> str:
+    """
+    Returns the path of the per-tile results file of a model, creating its directory if needed.
+
+    The results of the exported and quantized models are saved apart from those of the
+    PyTorch model, so that switching backends does not reuse stale results.
+
+    Args:
+        iso_code (str): ISO code for the region or dataset being processed.
+        shapename (str): Name of the shape or region for the output file naming.
+        config (dict): Configuration dictionary containing "project" and "config_name".
+        backend (str, optional): Backend that produced the results. Defaults to the backend
+            selected in the configuration (see `get_backend`).
+
+    Returns:
+        str: The path to the results GeoJSON file.
+    """
+    # Define the output directory based on the configuration and ISO code
+    config_name = config["config_name"]
+    out_dir = data_utils.makedir(
+        os.path.join(
+            "output", iso_code, "results", config["project"], "tiles", config_name
+        )
+    )
+
+    name = f"{iso_code}_{shapename}_{config_name}"
+    backend = backend or get_backend(config)
+    if backend != "torch":
+        name = f"{name}_{backend}"
+    return os.path.join(out_dir, f"{name}_results.geojson")
+
+
 def cnn_predict(
     data: pd.DataFrame, iso_code: str, shapename: str, config: dict, in_dir: str = None
 ) -> gpd.GeoDataFrame:
@@ -92,59 +348,720 @@ def cnn_predict(
         gpd.GeoDataFrame: A GeoDataFrame containing the results with UID, geometry,
             and predicted probabilities.
     """
-    # Define the output directory based on the configuration and ISO code
-    config_name = config["config_name"]
-
     # Define the output file path
+    out_file = get_pred_file(iso_code, shapename, config)
+
+    # If the results file already exists, read and return it
+    if os.path.exists(out_file):
+        return gpd.read_file(out_file)
+
+    # Load the model and make predictions
+    model = load_model(iso_code, config=config)
+    results = cnn_predict_images(data, model, config, in_dir)
+
+    # Prepare and save the results as a GeoDataFrame
+    results = results[["UID", "geometry", "prob", "tile_status"]]
+    results = gpd.GeoDataFrame(results, geometry="geometry")
+    results.to_file(out_file, driver="GeoJSON")
+
+    return results
+
+
+def is_dense_model(model_type: str) -> bool:
+    """
+    Checks whether a model type supports dense inference (see `get_dense_layers`).
+
+    Args:
+        model_type (str): The type of model (e.g., "convnext_large", "vit_h_14").
+
+    Returns:
+        bool: True if the model is a ConvNeXt or ResNet, False otherwise.
+    """
+    return "convnext" in model_type or "resnet" in model_type
+
+
+def get_dense_layers(model: torch.nn.Module, model_type: str) -> tuple:
+    """
+    Splits a CNN classifier into its convolutional backbone and its classification head.
+
+    Args:
+        model (torch.nn.Module): The CNN model, optionally wrapped in DataParallel.
+        model_type (str): The type of model (e.g., "convnext_large", "resnet50").
+
+    Returns:
+        tuple: A tuple containing the backbone, which maps an image batch to a feature map
+            of stride 32, and the head, which maps pooled features of shape (N, C, 1, 1)
+            to class logits.
+
+    Raises:
+        ValueError: If the model type does not have a fully-convolutional backbone.
+    """
+    if isinstance(model, torch.nn.DataParallel):
+        model = model.module
+
+    if "convnext" in model_type:
+        # The ConvNeXt classifier applies LayerNorm2d, Flatten and Linear to the pooled features
+        backbone = model.features
+        head = model.classifier
+    elif model_type == "resnet50_fmow_rgb_gassl":
+        # The timm ResNet exposes its feature extractor directly
+        backbone = model.forward_features
+        head = torch.nn.Sequential(torch.nn.Flatten(1), model.fc)
+    elif model_type in ["resnet18", "resnet34", "resnet50"]:
+        backbone = torch.nn.Sequential(
+            model.conv1,
+            model.bn1,
+            model.relu,
+            model.maxpool,
+            model.layer1,
+            model.layer2,
+            model.layer3,
+            model.layer4,
+        )
+        head = torch.nn.Sequential(torch.nn.Flatten(1), model.fc)
+    else:
+        raise ValueError(f"Dense inference is not supported for {model_type}.")
+
+    return backbone, head
+
+
+def dense_predict_mosaic(
+    mosaic: Image.Image,
+    centers: np.ndarray,
+    backbone,
+    head,
+    config: dict,
+    stride: int = 32,
+) -> np.ndarray:
+    """
+    Predicts the probabilities of tiles within a mosaic with a single forward pass of the backbone.
+
+    The feature map of the mosaic is average-pooled over windows of the model's input size
+    (i.e. the global average pooling of a tile) at every feature cell, and the pooled features
+    are bilinearly sampled at each tile centre before being passed to the classification head.
+
+    Args:
+        mosaic (Image.Image): RGB mosaic, resized to the scale of the model's input.
+        centers (np.ndarray): Array of shape (n, 2) with the (x, y) pixel coordinates
+            of the tile centres in the mosaic.
+        backbone (callable): Convolutional backbone of the model (see `get_dense_layers`).
+        head (callable): Classification head of the model (see `get_dense_layers`).
+        config (dict): Configuration dictionary containing "img_size".
+        stride (int, optional): Output stride of the backbone. Default is 32.
+
+    Returns:
+        np.ndarray: The predicted probabilities of the positive class for each tile.
+    """
+    # Normalize the mosaic in the same way as the test transforms
+    image = F.to_tensor(mosaic)
+    image = F.normalize(image, cnn_utils.imagenet_mean, cnn_utils.imagenet_std)
+
+    with torch.no_grad():
+        # Compute the feature map of the whole mosaic once
+        features = backbone(image.unsqueeze(0).to(device))
+
+        # Pool the features over every tile-sized window
+        kernel = config["img_size"] // stride
+        pooled = nnf.avg_pool2d(features, kernel, stride=1)
+        height, width = pooled.shape[-2:]
+
+        # Map the tile centres to the (normalized) coordinates of the pooled windows
+        index = torch.tensor(centers / stride - kernel / 2, dtype=torch.float32)
+        scale = torch.tensor(
+            [max(width - 1, 1), max(height - 1, 1)], dtype=torch.float32
+        )
+        grid = (2 * index / scale - 1).view(1, 1, -1, 2).to(pooled.device)
+
+        # Sample the pooled features at each tile centre and apply the head
+        sampled = nnf.grid_sample(pooled, grid, mode="bilinear", align_corners=True)
+        sampled = sampled[0, :, 0].T.reshape(len(centers), -1, 1, 1)
+        output = head(sampled)
+
+    return nnf.softmax(output, dim=1)[:, 1].cpu().numpy()
+
+
+def dense_predict_images(
+    data: gpd.GeoDataFrame,
+    model: torch.nn.Module,
+    config: dict,
+    in_dir: str,
+    mosaic_size: int = 2048,
+) -> tuple:
+    """
+    Predicts probabilities for overlapping tiles by running the CNN backbone over mosaics.
+
+    Tiles are grouped into blocks on a regular grid, and the images of each block are pasted
+    into a mosaic at their georeferenced position, so that pixels shared by overlapping tiles
+    go through the backbone only once. Degenerate images (see `get_tile_status`) are left
+    out of the mosaics and are assigned a probability of 0.
+
+    Args:
+        data (gpd.GeoDataFrame): GeoDataFrame of square tiles with "UID" and "geometry" columns.
+        model (torch.nn.Module): The CNN model used for predictions.
+        config (dict): Configuration dictionary containing "model" and "img_size".
+        in_dir (str): Directory path where the images are stored.
+        mosaic_size (int, optional): Maximum width and height of a mosaic in image pixels.
+            Default is 2048.
+
+    Returns:
+        tuple: A tuple containing the `data` with "prob" and "tile_status" columns, a probability heatmap
+            (np.ndarray) with one cell per tile position (NaN where there is no tile),
+            and the affine transform of the heatmap in EPSG:3857.
+    """
+    backbone, head = get_dense_layers(model, config["model"])
+    files = data_utils.get_image_filepaths(config, data, in_dir)
+    status = get_tile_status(files, config)
+    valid = np.where(status == "valid")[0]
+
+    # Derive the tile extent, ground resolution and input scale from the data
+    tiles = data
+    if tiles.crs is not None and tiles.crs.is_geographic:
+        tiles = tiles.to_crs("EPSG:3857")
+    bounds = tiles.geometry.bounds.to_numpy()
+    extent = np.median(bounds[:, 2] - bounds[:, 0])
+    tile_px = Image.open(files[valid[0]]).size[0] if len(valid) > 0 else 1
+    gsd = extent / tile_px
+    scale = config["img_size"] / tile_px
+
+    # Index the tiles on a grid at the tile stride
+    x = (bounds[:, 0] + bounds[:, 2]) / 2
+    y = (bounds[:, 1] + bounds[:, 3]) / 2
+    spacing = np.diff(np.unique(np.round(x, 2)))
+    spacing = spacing.min() if len(spacing) > 0 else extent
+    cols = np.round((x - x.min()) / spacing).astype(int)
+    rows = np.round((y.max() - y) / spacing).astype(int)
+    heatmap = np.full((rows.max() + 1, cols.max() + 1), np.nan, dtype=np.float32)
+
+    # Fill the mosaics with the ImageNet mean so padding matches zero-padding after normalization
+    fill = tuple(int(255 * value) for value in cnn_utils.imagenet_mean)
+
+    probs = np.zeros(len(data))
+    block_size = max(mosaic_size * gsd - extent, spacing)
+    blocks = np.full(len(data), -1)
+    if len(valid) > 0:
+        blocks[valid] = data_utils.assign_blocks(x[valid], y[valid], block_size)
+    for block in data_utils.create_progress_bar(np.unique(blocks[valid])):
+        index = np.where(blocks == block)[0]
+        minx, maxy = bounds[index, 0].min(), bounds[index, 3].max()
+        width = int(round((bounds[index, 2].max() - minx) / gsd))
+        height = int(round((maxy - bounds[index, 1].min()) / gsd))
+
+        # Paste the tile images at their position within the mosaic
+        mosaic = Image.new("RGB", (width, height), fill)
+        for i in index:
+            image = Image.open(files[i]).convert("RGB")
+            if image.size != (tile_px, tile_px):
+                image = image.resize((tile_px, tile_px), Image.BILINEAR)
+            offset = (
+                int(round((bounds[i, 0] - minx) / gsd)),
+                int(round((maxy - bounds[i, 3]) / gsd)),
+            )
+            mosaic.paste(image, offset)
+
+        # Resize the mosaic to the scale of the model's input
+        size = (int(round(width * scale)), int(round(height * scale)))
+        mosaic = mosaic.resize(size, Image.BILINEAR)
+        centers = np.stack([(x[index] - minx) / gsd, (maxy - y[index]) / gsd], axis=1)
+        probs[index] = dense_predict_mosaic(
+            mosaic, centers * scale, backbone, head, config
+        )
+
+    # Rasterize the tile probabilities at the tile stride
+    heatmap[rows, cols] = probs
+    transform = rio.transform.from_origin(
+        x.min() - spacing / 2, y.max() + spacing / 2, spacing, spacing
+    )
+
+    data = data.copy()
+    data["prob"] = probs
+    data["tile_status"] = status
+    return data, heatmap, transform
+
+
+def dense_predict(
+    data: pd.DataFrame,
+    iso_code: str,
+    shapename: str,
+    config: dict,
+    in_dir: str = None,
+    mosaic_size: int = 2048,
+) -> gpd.GeoDataFrame:
+    """
+    Predicts probabilities using dense (sliding-window) CNN inference over mosaics and saves
+        the results and the probability heatmap.
+
+    Args:
+        data (pd.DataFrame): DataFrame containing the data to be processed.
+        iso_code (str): ISO code for the region or dataset being processed.
+        shapename (str): Name of the shape or region for the output file naming.
+        config (dict): Configuration dictionary containing model settings and project details.
+        in_dir (str, optional): Directory containing input images. Default is None.
+        mosaic_size (int, optional): Maximum width and height of a mosaic in image pixels.
+            Default is 2048.
+
+    Returns:
+        gpd.GeoDataFrame: A GeoDataFrame containing the results with UID, geometry,
+            and predicted probabilities.
+    """
+    # Define the output directory and file paths
+    config_name = config["config_name"]
     out_dir = data_utils.makedir(
         os.path.join(
             "output", iso_code, "results", config["project"], "tiles", config_name
         )
     )
-
-    name = f"{iso_code}_{shapename}"
-    out_file = os.path.join(out_dir, f"{name}_{config['config_name']}_results.geojson")
+    name = f"{iso_code}_{shapename}_{config_name}"
+    out_file = os.path.join(out_dir, f"{name}_dense_results.geojson")
+    heatmap_file = os.path.join(out_dir, f"{name}_dense_heatmap.tif")
 
     # If the results file already exists, read and return it
     if os.path.exists(out_file):
         return gpd.read_file(out_file)
 
     # Load the model and make predictions
-    model = load_model(iso_code, config=config)
-    results = cnn_predict_images(data, model, config, in_dir)
+    model = load_model(iso_code, config=config, backend="torch")
+    results, heatmap, transform = dense_predict_images(
+        data, model, config, in_dir, mosaic_size=mosaic_size
+    )
+
+    # Save the heatmap as a GeoTIFF with one pixel per tile position
+    with rio.open(
+        heatmap_file,
+        "w",
+        driver="GTiff",
+        height=heatmap.shape[0],
+        width=heatmap.shape[1],
+        count=1,
+        dtype="float32",
+        crs="EPSG:3857",
+        transform=transform,
+        nodata=np.nan,
+    ) as dst:
+        dst.write(heatmap, 1)
+
+    # Prepare and save the results as a GeoDataFrame
+    results = results[["UID", "geometry", "prob", "tile_status"]]
+    results = gpd.GeoDataFrame(results, geometry="geometry")
+    results.to_file(out_file, driver="GeoJSON")
+
+    return results
+
+
+def evaluate_dense_predict(
+    data: pd.DataFrame,
+    iso_code: str,
+    config: dict,
+    in_dir: str = None,
+    threshold: float = 0.5,
+    n_samples: int = None,
+    mosaic_size: int = 2048,
+    shapename: str = None,
+) -> dict:
+    """
+    Compares dense inference over mosaics against per-tile inference in accuracy and throughput.
+        If a shapename is given, the report is saved next to the dense results of that
+        shapename (see `dense_predict`).
+
+    Args:
+        data (pd.DataFrame): DataFrame containing the data to be processed.
+        iso_code (str): ISO code for the region or dataset being processed.
+        config (dict): Configuration dictionary containing model settings and project details.
+        in_dir (str, optional): Directory containing input images. Default is None.
+        threshold (float, optional): Threshold used to compare the class decisions. Default is 0.5.
+        n_samples (int, optional): If set, compares only the tiles of a contiguous block
+            of about this many tiles. Default is None.
+        mosaic_size (int, optional): Maximum width and height of a mosaic in image pixels.
+            Default is 2048.
+        shapename (str, optional): Name of the shape or region used to name the report file.
+            Default is None (the report is not saved).
+
+    Returns:
+        dict: A dictionary containing the number of tiles, the mean and maximum absolute
+            difference in probabilities, the decision agreement (%), and the throughput
+            (tiles/s) of both modes.
+    """
+    data = data.reset_index(drop=True)
+    if n_samples is not None and n_samples < len(data):
+        # Keep the tiles closest to the first tile, so that the sample overlaps
+        centroids = data.geometry.centroid
+        distances = centroids.distance(centroids.iloc[0]).to_numpy()
+        data = data.iloc[np.sort(np.argsort(distances)[:n_samples])]
+
+    model = load_model(iso_code, config=config, verbose=False, backend="torch")
+
+    # Time the per-tile inference
+    start = time.time()
+    tile_probs = cnn_predict_images(data.copy(), model, config, in_dir)["prob"]
+    tile_time = time.time() - start
+
+    # Time the dense inference
+    start = time.time()
+    dense_probs = dense_predict_images(
+        data.copy(), model, config, in_dir, mosaic_size=mosaic_size
+    )[0]["prob"]
+    dense_time = time.time() - start
+
+    # Compare the probabilities and decisions of both modes
+    tile_probs = np.asarray(tile_probs, dtype=float)
+    dense_probs = np.asarray(dense_probs, dtype=float)
+    diff = np.abs(tile_probs - dense_probs)
+    agreement = (tile_probs > threshold) == (dense_probs > threshold)
+
+    report = {
+        "model": config["config_name"],
+        "tiles": len(data),
+        "mean_abs_diff": diff.mean(),
+        "max_abs_diff": diff.max(),
+        "agreement": agreement.mean() * 100,
+        "tile_throughput": len(data) / max(tile_time, 1e-9),
+        "dense_throughput": len(data) / max(dense_time, 1e-9),
+        "speedup": tile_time / max(dense_time, 1e-9),
+    }
+    logging.info(f"Dense inference report for {config['config_name']}: {report}")
+
+    # Save the report next to the dense results
+    if shapename is not None:
+        config_name = config["config_name"]
+        out_dir = data_utils.makedir(
+            os.path.join(
+                "output", iso_code, "results", config["project"], "tiles", config_name
+            )
+        )
+        name = f"{iso_code}_{shapename}_{config_name}"
+        report_file = os.path.join(out_dir, f"{name}_dense_report.csv")
+        pd.DataFrame([report]).to_csv(report_file, index=False)
+
+    return report
+
+
+def ensemble_predict(
+    data: pd.DataFrame,
+    iso_code: str,
+    shapename: str,
+    model_configs: list,
+    threshold: float,
+    in_dir: str = None,
+    anytime: bool = False,
+    dense: bool = False,
+) -> gpd.GeoDataFrame:
+    """
+    Aggregates predictions from multiple models and saves the ensemble results to a GeoPackage file.
+
+    Args:
+        data (pd.DataFrame): DataFrame containing the data to be processed.
+        iso_code (str): ISO code for the region or dataset being processed.
+        shapename (str): Name of the shape or region for the output file naming.
+        model_configs (list of dicts): List of configuration dictionaries for each model in the ensemble.
+        threshold (float): Threshold value for converting probabilities to binary predictions.
+        in_dir (str, optional): Directory containing input images. Default is None.
+        anytime (bool, optional): If True, stops evaluating members for a tile as soon as
+            its decision is settled (see `anytime_ensemble_predict`). Default is False.
+        dense (bool, optional): If True, uses dense inference over mosaics for the ConvNeXt
+            and ResNet members (see `dense_predict`). Cannot be combined with anytime.
+            Default is False.
+
+    Returns:
+        gpd.GeoDataFrame: A GeoDataFrame containing the ensemble results with UID,
+            geometry, predicted probabilities, and class predictions.
+    """
+    # Early-exit averaging scores tiles one member at a time, which dense inference does not support
+    if anytime and dense:
+        raise ValueError("anytime and dense inference cannot be combined.")
+
+    if anytime:
+        return anytime_ensemble_predict(
+            data, iso_code, shapename, model_configs, threshold, in_dir=in_dir
+        )
+
+    # Define class labels based on the positive and negative class configurations from the first model
+    classes = {1: model_configs[0]["pos_class"], 0: model_configs[0]["neg_class"]}
+
+    # Create the output directory for saving the results
+    out_dir = data_utils.makedir(
+        os.path.join(
+            "output",
+            iso_code,
+            "results",
+            model_configs[0]["project"],
+            "tiles",
+            "ensemble",
+        )
+    )
+    # Define the output file path
+    out_file = os.path.join(out_dir, f"{iso_code}_{shapename}_ensemble_results.geojson")
+
+    # Initialize an array to accumulate probabilities from each model
+    probs = 0
+    for model_config in model_configs:
+        print(f"Generating predictions with {model_config['config_name']}...")
+        # Generate predictions for the current model
+        predict = cnn_predict
+        backend = get_backend(model_config)
+        if dense and backend == "torch" and is_dense_model(model_config["model"]):
+            predict = dense_predict
+        results = predict(
+            data=data,
+            iso_code=iso_code,
+            shapename=shapename,
+            config=model_config,
+            in_dir=in_dir,
+        )
+        if len(results) > 0:
+            # Accumulate probabilities from the current model
+            probs = probs + results["prob"].to_numpy()
+
+    # Average the probabilities across all models
+    results["prob"] = probs / len(model_configs)
+
+    # Convert probabilities to binary predictions based on the threshold
+    preds = results["prob"] > threshold
+    preds = [str(classes[int(pred)]) for pred in preds]
+    results["pred"] = preds
+
+    # Save the results to a GeoPackage file
+    results.to_file(out_file, driver="GeoJSON")
+    return results
+
+
+def anytime_ensemble_predict(
+    data: pd.DataFrame,
+    iso_code: str,
+    shapename: str,
+    model_configs: list,
+    threshold: float,
+    in_dir: str = None,
+) -> gpd.GeoDataFrame:
+    """
+    Aggregates predictions from multiple models with early exit and saves the ensemble
+        results to a GeoJSON file.
+
+    Members are evaluated in the order of `model_configs` (i.e. leaderboard order). After
+    each member, a tile is settled once its ensemble mean is guaranteed to stay on the same
+    side of the threshold whatever the remaining members predict, i.e. when the running sum
+    already exceeds `threshold * n_models`, or when it cannot exceed it even if every remaining
+    member predicts 1. Settled tiles are not passed to the remaining members, so the class
+    predictions are identical to those of `ensemble_predict`.
+
+    Args:
+        data (pd.DataFrame): DataFrame containing the data to be processed.
+        iso_code (str): ISO code for the region or dataset being processed.
+        shapename (str): Name of the shape or region for the output file naming.
+        model_configs (list of dicts): List of configuration dictionaries for each model in the ensemble.
+        threshold (float): Threshold value for converting probabilities to binary predictions.
+        in_dir (str, optional): Directory containing input images. Default is None.
+
+    Returns:
+        gpd.GeoDataFrame: A GeoDataFrame containing the ensemble results with UID, geometry,
+            predicted probabilities (averaged over the members evaluated for each tile),
+            the number of members evaluated, the pre-filter status, and class predictions.
+    """
+    # Define class labels based on the positive and negative class configurations from the first model
+    classes = {1: model_configs[0]["pos_class"], 0: model_configs[0]["neg_class"]}
+
+    # Create the output directory for saving the results
+    out_dir = data_utils.makedir(
+        os.path.join(
+            "output",
+            iso_code,
+            "results",
+            model_configs[0]["project"],
+            "tiles",
+            "ensemble",
+        )
+    )
+    out_file = os.path.join(
+        out_dir, f"{iso_code}_{shapename}_anytime_ensemble_results.geojson"
+    )
+
+    # If the results file already exists, read and return it
+    if os.path.exists(out_file):
+        return gpd.read_file(out_file)
+
+    # Initialize the running sums, member counts, and unsettled tiles
+    data = data.reset_index(drop=True)
+    n_models = len(model_configs)
+    sums = np.zeros(len(data))
+    n_members = np.zeros(len(data), dtype=int)
+
+    # Degenerate tiles are settled as negatives before any member is evaluated
+    files = data_utils.get_image_filepaths(model_configs[0], data, in_dir)
+    status = get_tile_status(files, model_configs[0])
+    active = status == "valid"
+
+    for index, model_config in enumerate(model_configs):
+        if not active.any():
+            break
+
+        # Generate predictions for the unsettled tiles with the current model
+        print(
+            f"Generating predictions with {model_config['config_name']} "
+            f"for {active.sum()}/{len(data)} tiles..."
+        )
+        model = load_model(iso_code, config=model_config)
+        subdata = cnn_predict_images(data[active].copy(), model, model_config, in_dir)
+        sums[active] += subdata["prob"].to_numpy()
+        n_members[active] += 1
+
+        # Settle tiles whose decision can no longer change
+        remaining = n_models - (index + 1)
+        positive = sums / n_models > threshold
+        negative = (sums + remaining) / n_models <= threshold
+        active &= ~(positive | negative)
+
+    # Average the probabilities across the members evaluated for each tile
+    results = gpd.GeoDataFrame(data[["UID", "geometry"]], geometry="geometry")
+    results["prob"] = sums / np.maximum(n_members, 1)
+    results["n_members"] = n_members
+    results["tile_status"] = status
+
+    # Convert the ensemble sums to binary predictions based on the threshold
+    preds = sums / n_models > threshold
+    results["pred"] = [str(classes[int(pred)]) for pred in preds]
+
+    # Log the number of forward passes saved by the early exit
+    if len(data) > 0:
+        logging.info(
+            f"Average members per tile: {n_members.mean():.2f}/{n_models} "
+            f"({n_members.sum()}/{len(data) * n_models} forward passes)"
+        )
+        logging.info(f"\n{results['n_members'].value_counts().sort_index()}")
+
+    # Save the results to a GeoJSON file
+    results.to_file(out_file, driver="GeoJSON")
+    return results
+
+
+def get_val_threshold(iso_code: str, config: dict) -> float:
+    """
+    Calculates the threshold that optimizes the F2 score of a model on the validation set.
+
+    Args:
+        iso_code (str): ISO code for the region or dataset being processed.
+        config (dict): Configuration dictionary of the model.
+
+    Returns:
+        float: The optimal threshold of the model on the validation set.
+    """
+    val_output = model_utils.get_model_output(iso_code, config, phase="val")
+    val_results = eval_utils.evaluate(
+        y_true=val_output["y_true"],
+        y_pred=val_output["y_preds"],
+        y_prob=val_output["y_probs"],
+        beta=2,
+    )
+    return val_results["optim_threshold"]
+
+
+def evaluate_cascade(
+    iso_code: str,
+    data_config: dict,
+    screen_config: dict,
+    threshold: float,
+    screen_threshold: float,
+    band: float,
+    model_configs: list = None,
+) -> dict:
+    """
+    Measures the recall lost by the cascade compared to its stage-2 ensemble on the validation set.
+
+    Args:
+        iso_code (str): ISO code for the region or dataset being processed.
+        data_config (dict): Configuration dictionary used to select the ensemble models.
+        screen_config (dict): Configuration dictionary of the screening model.
+        threshold (float): Threshold of the ensemble.
+        screen_threshold (float): Threshold of the screening model.
+        band (float): Half-width of the uncertainty band around the screening threshold.
+        model_configs (list of dicts, optional): Configuration dictionaries of the stage-2
+            ensemble members. Defaults to None (the full ensemble of `data_config`).
+
+    Returns:
+        dict: A dictionary containing the number of validation tiles, the number of tiles
+            sent to the ensemble, the recall of the ensemble and of the cascade, and the recall loss.
+    """
+    # Load the validation outputs of the screening model
+    screen = model_utils.get_model_output(iso_code, screen_config, phase="val")
+
+    # Reuse the saved ensemble outputs unless stage 2 runs a subset of the members
+    ensemble_configs = model_utils.get_ensemble_configs(iso_code, data_config)
+    model_configs = model_configs or ensemble_configs
+    names = [model_config["config_name"] for model_config in model_configs]
+    if names == [model_config["config_name"] for model_config in ensemble_configs]:
+        ensemble = model_utils.ensemble_models(iso_code, data_config, phase="val")
+    else:
+        # Average the validation outputs of the members that run in stage 2
+        probs = 0
+        for model_config in model_configs:
+            ensemble = model_utils.get_model_output(iso_code, model_config, phase="val")
+            probs = probs + ensemble["y_probs"].to_numpy()
+        ensemble["y_probs"] = probs / len(model_configs)
+
+    val = pd.merge(
+        screen[["UID", "y_true", "y_probs"]],
+        ensemble[["UID", "y_probs"]],
+        on="UID",
+        suffixes=("_screen", "_ensemble"),
+    )
 
-    # Prepare and save the results as a GeoDataFrame
-    results = results[["UID", "geometry", "prob"]]
-    results = gpd.GeoDataFrame(results, geometry="geometry")
-    results.to_file(out_file, driver="GeoJSON")
+    # Tiles inside the band are decided by the ensemble, the rest by the screening model
+    screen_probs = val["y_probs_screen"].to_numpy()
+    uncertain = np.abs(screen_probs - screen_threshold) <= band
+    ensemble_preds = val["y_probs_ensemble"].to_numpy() > threshold
+    cascade_preds = np.where(uncertain, ensemble_preds, screen_probs > screen_threshold)
 
-    return results
+    # Compute the recall of the ensemble and the cascade
+    positives = val["y_true"].to_numpy() == 1
+    n_positives = max(positives.sum(), 1)
+    ensemble_recall = ensemble_preds[positives].sum() / n_positives
+    cascade_recall = cascade_preds[positives].sum() / n_positives
 
+    return {
+        "val_tiles": len(val),
+        "val_ensemble_tiles": int(uncertain.sum()),
+        "val_ensemble_recall": ensemble_recall * 100,
+        "val_cascade_recall": cascade_recall * 100,
+        "val_recall_loss": (ensemble_recall - cascade_recall) * 100,
+    }
 
-def ensemble_predict(
+
+def cascade_predict(
     data: pd.DataFrame,
     iso_code: str,
     shapename: str,
+    data_config: dict,
+    screen_config: dict,
     model_configs: list,
     threshold: float,
+    band: float = 0.2,
     in_dir: str = None,
+    anytime: bool = False,
+    dense: bool = False,
 ) -> gpd.GeoDataFrame:
     """
-    Aggregates predictions from multiple models and saves the ensemble results to a GeoPackage file.
+    Generates predictions with a two-stage cascade: a fast screening model scores every tile,
+        and only tiles whose screening probability falls within an uncertainty band around
+        the screening model's validation threshold are passed to the full ensemble.
 
     Args:
         data (pd.DataFrame): DataFrame containing the data to be processed.
         iso_code (str): ISO code for the region or dataset being processed.
         shapename (str): Name of the shape or region for the output file naming.
+        data_config (dict): Configuration dictionary used to select the ensemble models.
+        screen_config (dict): Configuration dictionary of the screening model (e.g. convnext_small).
         model_configs (list of dicts): List of configuration dictionaries for each model in the ensemble.
-        threshold (float): Threshold value for converting probabilities to binary predictions.
+        threshold (float): Threshold value for converting ensemble probabilities to binary predictions.
+        band (float, optional): Half-width of the uncertainty band around the screening threshold.
+            Default is 0.2.
         in_dir (str, optional): Directory containing input images. Default is None.
+        anytime (bool, optional): If True, uses early-exit averaging in the ensemble stage.
+            Default is False.
+        dense (bool, optional): If True, uses dense inference over mosaics in the ensemble
+            stage. Default is False.
 
     Returns:
-        gpd.GeoDataFrame: A GeoDataFrame containing the ensemble results with UID,
-            geometry, predicted probabilities, and class predictions.
+        gpd.GeoDataFrame: A GeoDataFrame containing the cascade results with UID, geometry,
+            predicted probabilities, class predictions, and the stage that decided each tile.
     """
-    # Define class labels based on the positive and negative class configurations from the first model
+    # Define class labels based on the positive and negative class configurations
     classes = {1: model_configs[0]["pos_class"], 0: model_configs[0]["neg_class"]}
 
     # Create the output directory for saving the results
@@ -155,80 +1072,895 @@ def ensemble_predict(
             "results",
             model_configs[0]["project"],
             "tiles",
-            "ensemble",
+            "cascade",
         )
     )
-    # Define the output file path
-    out_file = os.path.join(out_dir, f"{iso_code}_{shapename}_ensemble_results.geojson")
+    # Name the outputs after the screening model and band, which decide the ensemble tiles
+    cascade_name = f"{shapename}_cascade_{screen_config['config_name']}_{band}"
+    out_file = os.path.join(out_dir, f"{iso_code}_{cascade_name}_results.geojson")
+    report_file = os.path.join(out_dir, f"{iso_code}_{cascade_name}_report.csv")
 
-    # Initialize an array to accumulate probabilities from each model
-    probs = 0
-    for model_config in model_configs:
-        print(f"Generating predictions with {model_config['config_name']}...")
-        # Generate predictions for the current model
-        results = cnn_predict(
-            data=data,
+    # If the results file already exists, read and return it
+    if os.path.exists(out_file):
+        return gpd.read_file(out_file)
+
+    # Stage 1: score every tile with the screening model
+    screen_threshold = get_val_threshold(iso_code, screen_config)
+    print(f"Screening tiles with {screen_config['config_name']}...")
+    results = cnn_predict(
+        data=data,
+        iso_code=iso_code,
+        shapename=shapename,
+        config=screen_config,
+        in_dir=in_dir,
+    ).reset_index(drop=True)
+    screen_probs = results["prob"].to_numpy()
+    uncertain = np.abs(screen_probs - screen_threshold) <= band
+    preds = screen_probs > screen_threshold
+    results["stage"] = "screen"
+
+    # Stage 2: pass uncertain tiles to the full ensemble
+    if uncertain.sum() > 0:
+        subdata = data[data["UID"].isin(results.loc[uncertain, "UID"])].copy()
+        ensemble = ensemble_predict(
+            data=subdata,
             iso_code=iso_code,
-            shapename=shapename,
-            config=model_config,
+            shapename=cascade_name,
+            model_configs=model_configs,
+            threshold=threshold,
             in_dir=in_dir,
+            anytime=anytime,
+            dense=dense,
         )
-        if len(results) > 0:
-            # Accumulate probabilities from the current model
-            probs = probs + results["prob"].to_numpy()
-
-    # Average the probabilities across all models
-    results["prob"] = probs / len(model_configs)
-
-    # Convert probabilities to binary predictions based on the threshold
-    preds = results["prob"] > threshold
-    preds = [str(classes[int(pred)]) for pred in preds]
-    results["pred"] = preds
+        ensemble_probs = ensemble.set_index("UID")["prob"]
+        ensemble_probs = ensemble_probs.loc[results.loc[uncertain, "UID"]].to_numpy()
+        results.loc[uncertain, "prob"] = ensemble_probs
+        results.loc[uncertain, "stage"] = "ensemble"
+        preds[uncertain] = ensemble_probs > threshold
+
+    # Convert the decisions to class predictions
+    results["pred"] = [str(classes[int(pred)]) for pred in preds]
+
+    # Report the per-stage tile counts and the recall loss on the validation set
+    report = {
+        "tiles": len(results),
+        "screen_tiles": int((~uncertain).sum()),
+        "ensemble_tiles": int(uncertain.sum()),
+        "screen_threshold": screen_threshold,
+        "threshold": threshold,
+        "band": band,
+    }
+    report.update(
+        evaluate_cascade(
+            iso_code,
+            data_config,
+            screen_config,
+            threshold,
+            screen_threshold,
+            band,
+            model_configs=model_configs,
+        )
+    )
+    print(f"Cascade report: {report}")
+    pd.DataFrame([report]).to_csv(report_file, index=False)
 
-    # Save the results to a GeoPackage file
+    # Save the results to a GeoJSON file
     results.to_file(out_file, driver="GeoJSON")
     return results
 
 
-def load_model(iso_code: str, config: dict, verbose: bool = True) -> torch.nn.Module:
+def load_model(
+    iso_code: str, config: dict, verbose: bool = True, backend: str = None
+) -> torch.nn.Module:
     """
     Loads a pre-trained CNN model from a file and prepares it for evaluation.
 
+    If an exported checkpoint (see `export_checkpoint`) exists, it is loaded instead of the
+    training checkpoint. In both cases, the architecture is built without pretrained weights,
+    so no weights are downloaded.
+
     Args:
         iso_code (str): ISO code for the region or dataset, used to locate the model file.
         config (dict): Configuration dictionary containing model settings and paths.
         verbose (bool, optional): If True, logs information about the loading process. Default is True.
+        backend (str, optional): "torch" for the PyTorch model, "onnx" / "torchscript" for an
+            exported graph run on the CPU (see `load_runtime_model`), or "int8" for the quantized
+            model (see `quantize_model`), using `config["n_threads"]` intra-op threads if set.
+            Defaults to the backend selected in the configuration (see `get_backend`).
 
     Returns:
         torch.nn.Module: The loaded and prepared model.
     """
-    # Construct the path to the model directory and file
-    exp_dir = os.path.join(
-        os.getcwd(),
-        config["exp_dir"],
-        config["project"],
-        f"{iso_code}_{config['config_name']}",
-    )
-    model_file = os.path.join(exp_dir, f"{iso_code}_{config['config_name']}.pth")
+    if backend is None:
+        backend = get_backend(config)
 
-    # Define the class labels based on the configuration
-    classes = {1: config["pos_class"], 0: config["neg_class"]}
+    if backend == "int8":
+        return load_quantized_model(
+            iso_code, config, n_threads=config.get("n_threads"), verbose=verbose
+        )
+    elif backend != "torch":
+        return load_runtime_model(
+            iso_code,
+            config,
+            backend=backend,
+            n_threads=config.get("n_threads"),
+            verbose=verbose,
+        )
+
+    start = time.time()
+
+    # Construct the path to the model files
+    model_file = model_utils.get_model_file(iso_code, config)
+    export_file = model_utils.get_model_file(iso_code, config, suffix="export")
+
+    if os.path.exists(export_file):
+        # Load the self-describing exported checkpoint
+        model_file = export_file
+        model, _ = cnn_utils.load_checkpoint(export_file, device=device)
+    else:
+        # Define the class labels based on the configuration
+        classes = {1: config["pos_class"], 0: config["neg_class"]}
+
+        # Initialize the model and load the trained weights
+        model = cnn_utils.get_model(config["model"], len(classes), pretrained=False)
+        state_dict = torch.load(model_file, map_location=device)
+        model.load_state_dict(cnn_utils.strip_state_dict(state_dict))
 
-    # Initialize the model and load the pre-trained weights
-    model = cnn_utils.get_model(config["model"], len(classes))
     model = torch.nn.DataParallel(model)
-    model.load_state_dict(torch.load(model_file, map_location=device))
     model = model.eval()
     model = model.to(device)
 
     # Log information if verbose is True
     if verbose:
         print(f"Device: {device}")
+        print(
+            "Model file {} successfully loaded in {:.2f}s.".format(
+                model_file, time.time() - start
+            )
+        )
+
+    return model
+
+
+def export_checkpoint(iso_code: str, config: dict) -> str:
+    """
+    Exports a trained model to a self-describing checkpoint containing the architecture,
+        the number of classes, the image size, the class labels, and the state dict without
+        the DataParallel "module." prefix.
+
+    Args:
+        iso_code (str): ISO code for the region or dataset, used to locate the model file.
+        config (dict): Configuration dictionary containing model settings and paths.
+
+    Returns:
+        str: Path to the exported checkpoint file.
+    """
+    # Load the training checkpoint
+    model_file = model_utils.get_model_file(iso_code, config)
+    state_dict = torch.load(model_file, map_location="cpu")
+    state_dict = cnn_utils.strip_state_dict(state_dict)
+
+    # Build the architecture without pretrained weights and check that the weights match
+    classes = {1: config["pos_class"], 0: config["neg_class"]}
+    model = cnn_utils.get_model(config["model"], len(classes), pretrained=False)
+    model.load_state_dict(state_dict)
+
+    out_file = model_utils.get_model_file(iso_code, config, suffix="export")
+    cnn_utils.save_checkpoint(
+        model,
+        model_type=config["model"],
+        n_classes=len(classes),
+        out_file=out_file,
+        img_size=config["img_size"],
+        classes=classes,
+        config_name=config["config_name"],
+    )
+    logging.info(f"Exported {model_file} to {out_file}")
+
+    return out_file
+
+
+def benchmark_model_loading(
+    iso_code: str, config: dict, n_runs: int = 3, pretrained: bool = False
+) -> dict:
+    """
+    Measures the time to load a model from the training checkpoint and from the exported
+        checkpoint, optionally including the previous path that builds the model with
+        pretrained weights before overwriting them.
+
+    Args:
+        iso_code (str): ISO code for the region or dataset, used to locate the model file.
+        config (dict): Configuration dictionary containing model settings and paths.
+        n_runs (int, optional): Number of times each path is timed. Default is 3.
+        pretrained (bool, optional): If True, also times the pretrained path, which may
+            download weights. Default is False.
+
+    Returns:
+        dict: A dictionary with the mean load time in seconds of each path.
+    """
+    model_file = model_utils.get_model_file(iso_code, config)
+    export_file = model_utils.get_model_file(iso_code, config, suffix="export")
+    if not os.path.exists(export_file):
+        export_checkpoint(iso_code, config)
+    n_classes = 2
+
+    def load_state_dict(pretrained):
+        model = cnn_utils.get_model(config["model"], n_classes, pretrained=pretrained)
+        state_dict = torch.load(model_file, map_location=device)
+        model.load_state_dict(cnn_utils.strip_state_dict(state_dict))
+        return model
+
+    loaders = {
+        "state_dict": lambda: load_state_dict(pretrained=False),
+        "export": lambda: cnn_utils.load_checkpoint(export_file, device=device),
+    }
+    if pretrained:
+        loaders["pretrained"] = lambda: load_state_dict(pretrained=True)
+
+    # Time each loading path
+    report = {"model": config["config_name"]}
+    for name, loader in loaders.items():
+        times = []
+        for _ in range(n_runs):
+            start = time.time()
+            loader()
+            times.append(time.time() - start)
+        report[f"{name}_load_time"] = np.mean(times)
+
+    logging.info(f"Model loading times: {report}")
+    return report
+
+
+def export_graph(iso_code: str, config: dict, backend: str = "onnx") -> str:
+    """
+    Exports a trained model to an ONNX or TorchScript graph with a fixed image size
+        and a dynamic batch size.
+
+    Args:
+        iso_code (str): ISO code for the region or dataset, used to locate the model file.
+        config (dict): Configuration dictionary containing model settings and paths.
+        backend (str, optional): Export format, either "onnx" or "torchscript". Default is "onnx".
+
+    Returns:
+        str: Path to the exported graph file.
+    """
+    # Load the model on the CPU without the DataParallel wrapper
+    model = load_model(iso_code, config, verbose=False, backend="torch")
+    model = model.module.cpu().eval()
+    example = torch.randn(2, 3, config["img_size"], config["img_size"])
+    out_file = model_utils.get_model_file(
+        iso_code, config, suffix="export", ext=runtime_exts[backend]
+    )
+
+    with torch.no_grad():
+        if backend == "onnx":
+            torch.onnx.export(
+                model,
+                example,
+                out_file,
+                input_names=["input"],
+                output_names=["output"],
+                dynamic_axes={"input": {0: "batch"}, "output": {0: "batch"}},
+                opset_version=17,
+            )
+        elif backend == "torchscript":
+            graph = torch.jit.trace(model, example)
+            graph = torch.jit.freeze(graph)
+            torch.jit.save(graph, out_file)
+
+    logging.info(f"Exported {config['config_name']} to {out_file}")
+    return out_file
+
+
+@contextlib.contextmanager
+def torch_threads(n_threads: int = None):
+    """
+    Temporarily sets the number of torch intra-op threads, restoring the previous
+        number on exit so that other models in the process are not affected.
+
+    Args:
+        n_threads (int, optional): Number of intra-op threads. Default is None (unchanged).
+    """
+    n_previous = torch.get_num_threads()
+    if n_threads:
+        torch.set_num_threads(n_threads)
+    try:
+        yield
+    finally:
+        torch.set_num_threads(n_previous)
+
+
+class RuntimeModel:
+    """
+    Wraps an exported ONNX or TorchScript graph for CPU inference, so that it can be used
+    in place of the PyTorch model in `cnn_predict_images`.
+    """
+
+    def __init__(self, model_file: str, backend: str = "onnx", n_threads: int = None):
+        """
+        Loads the exported graph. The number of intra-op threads only applies while the
+            graph is running (see `torch_threads`).
+
+        Args:
+            model_file (str): Path to the exported graph file.
+            backend (str, optional): Either "onnx" or "torchscript". Default is "onnx".
+            n_threads (int, optional): Number of intra-op threads. Defaults to the number of CPUs.
+        """
+        self.backend = backend
+        self.n_threads = n_threads or os.cpu_count()
+
+        if backend == "onnx":
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = self.n_threads
+            options.inter_op_num_threads = 1
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self.session = ort.InferenceSession(
+                model_file, options, providers=["CPUExecutionProvider"]
+            )
+        elif backend == "torchscript":
+            self.model = torch.jit.load(model_file, map_location="cpu").eval()
+
+    def __call__(self, inputs: torch.Tensor) -> torch.Tensor:
+        """
+        Computes the logits of a batch of images.
+
+        Args:
+            inputs (torch.Tensor): Batch of preprocessed images of shape (N, 3, H, W).
+
+        Returns:
+            torch.Tensor: The logits of shape (N, n_classes).
+        """
+        inputs = inputs.detach().cpu()
+        if self.backend == "onnx":
+            outputs = self.session.run(None, {"input": inputs.numpy()})[0]
+            return torch.from_numpy(outputs)
+
+        with torch.no_grad(), torch_threads(self.n_threads):
+            return self.model(inputs)
+
+    def eval(self):
+        return self
+
+
+def load_runtime_model(
+    iso_code: str,
+    config: dict,
+    backend: str = "onnx",
+    n_threads: int = None,
+    verbose: bool = True,
+) -> RuntimeModel:
+    """
+    Loads an exported ONNX or TorchScript graph for CPU inference, exporting it first
+        if it does not exist.
+
+    Args:
+        iso_code (str): ISO code for the region or dataset, used to locate the model file.
+        config (dict): Configuration dictionary containing model settings and paths.
+        backend (str, optional): Either "onnx" or "torchscript". Default is "onnx".
+        n_threads (int, optional): Number of intra-op threads. Defaults to the number of CPUs.
+        verbose (bool, optional): If True, logs information about the loading process. Default is True.
+
+    Returns:
+        RuntimeModel: The loaded graph.
+    """
+    model_file = model_utils.get_model_file(
+        iso_code, config, suffix="export", ext=runtime_exts[backend]
+    )
+    if not os.path.exists(model_file):
+        export_graph(iso_code, config, backend=backend)
+
+    model = RuntimeModel(model_file, backend=backend, n_threads=n_threads)
+    if verbose:
+        print(f"Backend: {backend} ({model.n_threads} threads)")
+        print("Model file {} successfully loaded.".format(model_file))
+
+    return model
+
+
+def benchmark_backend(
+    iso_code: str,
+    config: dict,
+    backend: str = "onnx",
+    n_samples: int = None,
+    batch_size: int = 16,
+    n_runs: int = 5,
+    atol: float = 1e-3,
+) -> pd.DataFrame:
+    """
+    Checks the parity of an exported graph with the PyTorch model on the validation split
+        and benchmarks its latency and throughput for different numbers of threads.
+        All timings run on the CPU, including the PyTorch baseline.
+
+    Args:
+        iso_code (str): ISO code for the region or dataset being processed.
+        config (dict): Configuration dictionary containing model settings and paths.
+        backend (str, optional): Either "onnx" or "torchscript". Default is "onnx".
+        n_samples (int, optional): If set, uses only the first n_samples validation images.
+            Default is None.
+        batch_size (int, optional): Batch size used for the throughput benchmark. Default is 16.
+        n_runs (int, optional): Number of timed runs per setting. Default is 5.
+        atol (float, optional): Maximum absolute difference in validation probabilities
+            for the exported graph to pass the parity check. Default is 1e-3.
+
+    Returns:
+        pd.DataFrame: One row per backend and number of threads, with the maximum absolute
+            difference in validation probabilities, whether it is within `atol` ("parity_ok"),
+            the decision agreement (%) at the validation threshold, the latency (ms) of a
+            single image, and the throughput (images/s).
+    """
+    # Load the validation images
+    files, _ = load_eval_images(iso_code, config, phase="val", n_samples=n_samples)
+    threshold = get_val_threshold(iso_code, config)
+
+    # Compute the reference probabilities with the PyTorch model
+    n_torch_threads = torch.get_num_threads()
+    model = load_model(iso_code, config, verbose=False, backend="torch")
+    torch_probs = predict_files(files, model, config, batch_size=batch_size)
+
+    # Compute the probabilities of the exported graph once, since the number of
+    # threads does not change its outputs
+    runtime = load_runtime_model(iso_code, config, backend=backend, verbose=False)
+    backend_probs = predict_files(files, runtime, config, batch_size=batch_size)
+
+    # Time the PyTorch baseline on the CPU, like the exported graph
+    model = model.module.cpu().eval()
+
+    # Benchmark with powers of two up to the number of CPUs
+    n_cpus = os.cpu_count()
+    thread_counts = sorted({2**i for i in range(int(np.log2(n_cpus)) + 1)} | {n_cpus})
+    inputs = torch.randn(batch_size, 3, config["img_size"], config["img_size"])
+
+    report = []
+    settings = [("torch", n_torch_threads)]
+    settings += [(backend, n_threads) for n_threads in thread_counts]
+    for name, n_threads in settings:
+        if name == "torch":
+            runtime = model
+            probs = torch_probs
+        else:
+            runtime = load_runtime_model(
+                iso_code, config, backend=backend, n_threads=n_threads, verbose=False
+            )
+            probs = backend_probs
+
+        # Time a single image and a full batch, after one warm-up run
+        timings = {}
+        for size in [1, batch_size]:
+            with torch.no_grad():
+                runtime(inputs[:size])
+                start = time.time()
+                for _ in range(n_runs):
+                    runtime(inputs[:size])
+            timings[size] = (time.time() - start) / n_runs
+
+        diff = np.abs(probs - torch_probs)
+        max_diff = diff.max() if len(diff) > 0 else 0
+        agreement = (probs > threshold) == (torch_probs > threshold)
+        report.append(
+            {
+                "model": config["config_name"],
+                "backend": name,
+                "n_threads": n_threads,
+                "val_images": len(files),
+                "max_abs_diff": max_diff,
+                "parity_ok": max_diff <= atol,
+                "agreement": agreement.mean() * 100 if len(diff) > 0 else 100,
+                "latency_ms": timings[1] * 1000,
+                "throughput": batch_size / timings[batch_size],
+            }
+        )
+
+    report = pd.DataFrame(report)
+    logging.info(f"\n{report}")
+
+    # Flag exported graphs whose outputs drift from the PyTorch model
+    if not report["parity_ok"].all():
+        logging.warning(
+            f"{backend} graph of {config['config_name']} differs from the PyTorch "
+            f"model by more than {atol} on the validation split"
+        )
+    return report
+
+
+def get_backend(config: dict) -> str:
+    """
+    Returns the inference backend selected in a model configuration.
+
+    Args:
+        config (dict): Configuration dictionary, optionally containing "quantize" (bool)
+            and "backend" ("torch", "onnx", or "torchscript").
+
+    Returns:
+        str: "int8" if the quantized model is selected, otherwise the configured backend
+            (default "torch").
+    """
+    if config.get("quantize", False):
+        return "int8"
+    return config.get("backend", "torch")
+
+
+def load_eval_images(
+    iso_code: str, config: dict, phase: str = "val", n_samples: int = None
+) -> tuple:
+    """
+    Loads the image file paths and labels of a data split.
+
+    Args:
+        iso_code (str): ISO code for the region or dataset being processed.
+        config (dict): Configuration dictionary containing data settings and "pos_class".
+        phase (str, optional): Data split ("train", "val", or "test"). Default is "val".
+        n_samples (int, optional): If set, keeps only the first n_samples images. Default is None.
+
+    Returns:
+        tuple: A tuple containing the list of image file paths and the array of binary labels.
+    """
+    data = model_utils.load_data(
+        config, iso_code=iso_code, attributes=["rurban", "iso"], verbose=False
+    )
+    data = data[data["dataset"] == phase].iloc[:n_samples]
+    files = data_utils.get_image_filepaths(config, data)
+    y_true = (data["class"] == config["pos_class"]).astype(int).to_numpy()
+    return files, y_true
+
+
+def quantize_model(
+    iso_code: str, config: dict, n_calibration: int = 256, batch_size: int = 16
+) -> str:
+    """
+    Quantizes a trained model to int8 for CPU inference and saves it as a TorchScript file.
+
+    CNNs are quantized statically: observers are inserted with FX graph mode quantization
+    and calibrated on images of the validation split. Linear-heavy transformer models
+    (ViT, Swin), and CNNs that cannot be traced, are quantized dynamically (int8 weights
+    of the Linear layers, activations quantized on the fly).
+
+    Args:
+        iso_code (str): ISO code for the region or dataset, used to locate the model file.
+        config (dict): Configuration dictionary containing model settings and paths.
+        n_calibration (int, optional): Number of validation images used for calibration.
+            Default is 256.
+        batch_size (int, optional): Batch size used for calibration. Default is 16.
+
+    Returns:
+        str: Path to the quantized model file.
+    """
+    # Load the fp32 model on the CPU without the DataParallel wrapper
+    model = load_model(iso_code, config, verbose=False, backend="torch")
+    model = copy.deepcopy(model.module).cpu().eval()
+    example = torch.randn(1, 3, config["img_size"], config["img_size"])
+    quantized = None
+
+    if config.get("type", "cnn") == "cnn":
+        # Insert observers (only the tracing and conversion may fail for some models)
+        prepared = None
+        try:
+            qconfig_mapping = quantization.get_default_qconfig_mapping("x86")
+            prepared = quantize_fx.prepare_fx(model, qconfig_mapping, (example,))
+        except Exception as e:
+            logging.warning(
+                f"Static quantization failed for {config['model']} ({e}), "
+                "falling back to dynamic quantization."
+            )
+
+        if prepared is not None:
+            # Calibrate the observers on the validation split
+            files, _ = load_eval_images(
+                iso_code, config, phase="val", n_samples=n_calibration
+            )
+            logging.info(f"Calibrating {config['config_name']} on {len(files)} images")
+            with torch.no_grad():
+                for batch in load_image_batches(files, config, batch_size):
+                    prepared(batch)
+
+            try:
+                quantized = quantize_fx.convert_fx(prepared)
+            except Exception as e:
+                logging.warning(
+                    f"Static quantization failed for {config['model']} ({e}), "
+                    "falling back to dynamic quantization."
+                )
+
+    if quantized is None:
+        quantized = quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+    # Save the quantized model as a TorchScript file
+    out_file = model_utils.get_model_file(iso_code, config, suffix="int8", ext=".ts")
+    with torch.no_grad():
+        graph = torch.jit.trace(quantized, example)
+        graph = torch.jit.freeze(graph)
+    torch.jit.save(graph, out_file)
+    logging.info(f"Quantized {config['config_name']} saved to {out_file}")
+
+    return out_file
+
+
+def load_quantized_model(
+    iso_code: str, config: dict, n_threads: int = None, verbose: bool = True
+) -> RuntimeModel:
+    """
+    Loads the int8 quantized model for CPU inference, quantizing it first if it does not exist.
+
+    Args:
+        iso_code (str): ISO code for the region or dataset, used to locate the model file.
+        config (dict): Configuration dictionary containing model settings and paths.
+        n_threads (int, optional): Number of intra-op threads. Defaults to the number of CPUs.
+        verbose (bool, optional): If True, logs information about the loading process. Default is True.
+
+    Returns:
+        RuntimeModel: The loaded quantized model.
+    """
+    model_file = model_utils.get_model_file(iso_code, config, suffix="int8", ext=".ts")
+    if not os.path.exists(model_file):
+        quantize_model(iso_code, config)
+
+    model = RuntimeModel(model_file, backend="torchscript", n_threads=n_threads)
+    if verbose:
+        print(f"Backend: int8 ({model.n_threads} threads)")
         print("Model file {} successfully loaded.".format(model_file))
 
     return model
 
 
+def evaluate_quantized_model(
+    iso_code: str,
+    config: dict,
+    phase: str = "test",
+    n_samples: int = None,
+    batch_size: int = 16,
+) -> dict:
+    """
+    Compares the int8 quantized model with the fp32 model on a held-out split.
+
+    Args:
+        iso_code (str): ISO code for the region or dataset being processed.
+        config (dict): Configuration dictionary containing model settings and paths.
+        phase (str, optional): Data split used for the comparison. Default is "test",
+            since the validation split is used for calibration.
+        n_samples (int, optional): If set, uses only the first n_samples images. Default is None.
+        batch_size (int, optional): Batch size used for predictions. Default is 16.
+
+    Returns:
+        dict: A dictionary with the AUPRC of the fp32 and int8 models, the AUPRC delta,
+            the CPU throughput (images/s) of both models, and the speedup.
+    """
+    files, y_true = load_eval_images(iso_code, config, phase=phase, n_samples=n_samples)
+    threshold = get_val_threshold(iso_code, config)
+
+    # Run both models on the CPU with the same number of threads
+    n_threads = config.get("n_threads") or os.cpu_count()
+    fp32_model = load_model(iso_code, config, verbose=False, backend="torch")
+    fp32_model = fp32_model.module.cpu().eval()
+    int8_model = load_quantized_model(
+        iso_code, config, n_threads=n_threads, verbose=False
+    )
+
+    # Decode each batch once and time the forward pass of both models
+    models = {"fp32": fp32_model, "int8": int8_model}
+    probs = {name: [] for name in models}
+    times = {name: 0 for name in models}
+    with torch_threads(n_threads):
+        for batch in load_image_batches(files, config, batch_size):
+            for name, model in models.items():
+                start = time.time()
+                with torch.no_grad():
+                    output = model(batch)
+                times[name] += time.time() - start
+                probs[name].append(nnf.softmax(output, dim=1)[:, 1].numpy())
+
+    report = {"model": config["config_name"], "images": len(files)}
+    for name in models:
+        y_prob = np.concatenate(probs[name])
+        results = eval_utils.evaluate(
+            y_true=y_true,
+            y_pred=(y_prob > threshold).astype(int),
+            y_prob=y_prob,
+            beta=2,
+            optim_threshold=threshold,
+        )
+        report[f"{name}_auprc"] = results["auprc"]
+        report[f"{name}_throughput"] = len(files) / max(times[name], 1e-9)
+
+    report["auprc_delta"] = report["int8_auprc"] - report["fp32_auprc"]
+    report["speedup"] = report["int8_throughput"] / report["fp32_throughput"]
+    logging.info(f"Quantization report: {report}")
+
+    return report
+
+
+def get_ensemble_soft_labels(
+    iso_code: str, config: dict, phase: str = "train", batch_size: int = 16
+) -> pd.DataFrame:
+    """
+    Computes the averaged probabilities of the ensemble members for the tiles of a data split.
+
+    The validation and test probabilities are read from the saved model outputs
+    (see `model_utils.ensemble_models`). The training probabilities are not saved during
+    training, so they are computed by running each member over the training images,
+    and cached to `<exp_dir>/<project>/<iso_code>_ensemble_<phase>_soft_labels.csv`.
+
+    Args:
+        iso_code (str): ISO code for the region or dataset being processed.
+        config (dict): Configuration dictionary used to select the ensemble models.
+        phase (str, optional): Data split ("train", "val", or "test"). Default is "train".
+        batch_size (int, optional): Batch size used for predictions. Default is 16.
+
+    Returns:
+        pd.DataFrame: A DataFrame with "UID" and "soft_prob" columns.
+    """
+    if phase in ["val", "test"]:
+        output = model_utils.ensemble_models(iso_code, config, phase=phase)
+        return output[["UID"]].assign(soft_prob=output["y_probs"].to_numpy())
+
+    out_file = os.path.join(
+        os.getcwd(),
+        config["exp_dir"],
+        config["project"],
+        f"{iso_code}_ensemble_{phase}_soft_labels.csv",
+    )
+    if os.path.exists(out_file):
+        return pd.read_csv(out_file)
+
+    # Load the tiles of the data split
+    data = model_utils.load_data(
+        config, iso_code=iso_code, attributes=["rurban", "iso"], verbose=False
+    )
+    data = data[data["dataset"] == phase].reset_index(drop=True)
+    files = data_utils.get_image_filepaths(config, data)
+
+    # Average the probabilities of the ensemble members
+    model_configs = model_utils.get_ensemble_configs(iso_code, config)
+    probs = 0
+    for model_config in model_configs:
+        print(f"Generating soft labels with {model_config['config_name']}...")
+        model = load_model(iso_code, model_config, verbose=False, backend="torch")
+        probs = probs + predict_files(files, model, model_config, batch_size=batch_size)
+
+    soft_labels = data[["UID"]].assign(soft_prob=probs / len(model_configs))
+    soft_labels.to_csv(out_file, index=False)
+    return soft_labels
+
+
+def get_unlabelled_soft_labels(
+    iso_code: str, config: dict, n_samples: int = None
+) -> pd.DataFrame:
+    """
+    Collects unlabelled prediction tiles with the ensemble probabilities saved by `ensemble_predict`.
+
+    Only the full-ensemble results of shapenames whose images are available in
+    `output/<iso_code>/images/<shapename>/` are used, and degenerate tiles are excluded.
+
+    Args:
+        iso_code (str): ISO code for the region or dataset being processed.
+        config (dict): Configuration dictionary containing the project name.
+        n_samples (int, optional): If set, randomly samples at most n_samples tiles. Default is None.
+
+    Returns:
+        pd.DataFrame: A DataFrame with "UID", "filepath", and "soft_prob" columns.
+    """
+    results_dir = os.path.join(
+        "output", iso_code, "results", config["project"], "tiles", "ensemble"
+    )
+    filenames = next(os.walk(results_dir), (None, None, []))[2]
+
+    data = []
+    for filename in filenames:
+        # Keep the full-ensemble results, identified by their image directory
+        if not filename.endswith("_ensemble_results.geojson"):
+            continue
+        shapename = filename[len(f"{iso_code}_") : -len("_ensemble_results.geojson")]
+        image_dir = os.path.join("output", iso_code, "images", shapename)
+        if not os.path.isdir(image_dir):
+            continue
+
+        subdata = gpd.read_file(os.path.join(results_dir, filename))
+        if "tile_status" in subdata.columns:
+            subdata = subdata[subdata["tile_status"].fillna("valid") == "valid"]
+        data.append(
+            pd.DataFrame(
+                {
+                    "UID": shapename + "_" + subdata["UID"].astype(str),
+                    "filepath": [
+                        os.path.join(image_dir, f"{uid}.tiff") for uid in subdata["UID"]
+                    ],
+                    "soft_prob": subdata["prob"].to_numpy(),
+                }
+            )
+        )
+
+    if len(data) == 0:
+        return pd.DataFrame(columns=["UID", "filepath", "soft_prob"])
+
+    data = pd.concat(data, ignore_index=True)
+    data = data[data["filepath"].apply(os.path.exists)]
+    if n_samples is not None and n_samples < len(data):
+        data = data.sample(n_samples, random_state=SEED)
+
+    logging.info(f"Loaded {len(data)} unlabelled tiles for {iso_code}")
+    return data.reset_index(drop=True)
+
+
+def evaluate_distillation(
+    iso_code: str,
+    config: dict,
+    student_config: dict,
+    n_samples: int = 256,
+    batch_size: int = 16,
+) -> pd.DataFrame:
+    """
+    Compares a distilled student with its teacher ensemble in test AUPRC and throughput,
+        and saves the report to the student's experiment directory.
+
+    Args:
+        iso_code (str): ISO code for the region or dataset being processed.
+        config (dict): Configuration dictionary used to select the ensemble models.
+        student_config (dict): Configuration dictionary of the student model.
+        n_samples (int, optional): Number of test images used to measure throughput. Default is 256.
+        batch_size (int, optional): Batch size used to measure throughput. Default is 16.
+
+    Returns:
+        pd.DataFrame: One row for the ensemble and one for the student, with the test AUPRC
+            (at the validation threshold), the number of models, and the throughput (images/s).
+    """
+    model_configs = model_utils.get_ensemble_configs(iso_code, config)
+    files, _ = load_eval_images(iso_code, config, phase="test", n_samples=n_samples)
+
+    report = []
+    for name, configs in [("ensemble", model_configs), ("student", [student_config])]:
+        # Compute the test AUPRC at the validation threshold
+        if name == "ensemble":
+            val_output = model_utils.ensemble_models(iso_code, config, phase="val")
+            test_output = model_utils.ensemble_models(iso_code, config, phase="test")
+        else:
+            val_output = model_utils.get_model_output(iso_code, configs[0], phase="val")
+            test_output = model_utils.get_model_output(iso_code, configs[0], "test")
+        threshold = eval_utils.evaluate(
+            y_true=val_output["y_true"],
+            y_pred=val_output["y_preds"],
+            y_prob=val_output["y_probs"],
+            beta=2,
+        )["optim_threshold"]
+        results = eval_utils.evaluate(
+            y_true=test_output["y_true"],
+            y_pred=(test_output["y_probs"] > threshold).astype(int),
+            y_prob=test_output["y_probs"],
+            beta=2,
+            optim_threshold=threshold,
+        )
+
+        # Measure the throughput of all models on the same test images
+        elapsed = 0
+        for model_config in configs:
+            model = load_model(iso_code, model_config, verbose=False)
+            start = time.time()
+            predict_files(files, model, model_config, batch_size=batch_size)
+            elapsed += time.time() - start
+
+        report.append(
+            {
+                "model": name,
+                "config_name": (
+                    student_config["config_name"] if name == "student" else ""
+                ),
+                "n_models": len(configs),
+                "test_auprc": results["auprc"],
+                "throughput": len(files) / max(elapsed, 1e-9),
+            }
+        )
+
+    report = pd.DataFrame(report)
+    report["auprc_delta"] = report["test_auprc"] - report["test_auprc"].iloc[0]
+    report["speedup"] = report["throughput"] / report["throughput"].iloc[0]
+    logging.info(f"\n{report}")
+
+    out_file = model_utils.get_model_file(
+        iso_code, student_config, suffix="distill_report", ext=".csv"
+    )
+    report.to_csv(out_file, index=False)
+    return report
+
+
 def generate_pred_tiles(
     config: dict,
     iso_code: str,
@@ -280,15 +2012,8 @@ def generate_pred_tiles(
     columns = ["UID", "geometry", "shapeName"]
     points = points[columns]
 
-    # Create temporary file for exact_extract
-    temp_file = os.path.join(out_dir, f"{iso_code}_{shapename}_temp.geojson")
-    if not os.path.exists(temp_file):
-        points.to_file(temp_file, driver="GeoJSON", index=False)
-
     # Filter tiles by uninhabited locations
-    filtered = data_utils.filter_uninhabited(
-        iso_code, config, points, in_vector=temp_file
-    )
+    filtered = data_utils.filter_uninhabited(iso_code, config, points)
     filtered = filtered[columns + ["sum"]]
     filtered = filtered[filtered["sum"] > 0]
 
@@ -313,11 +2038,10 @@ def get_shapenames(data_config: dict, iso_code: str, adm_level: str) -> list:
     """
 
     # Retrieve geographic boundaries for the specified country and administrative level
+    # Convert to metric CRS for accurate area calculations
     geoboundary = data_utils.get_geoboundaries(
-        data_config, iso_code, adm_level=adm_level
-    ).to_crs(
-        "EPSG:3857"
-    )  # Convert to metric CRS for accurate area calculations
+        data_config, iso_code, adm_level=adm_level, crs="EPSG:3857"
+    )
 
     # Dissolve boundaries by 'shapeName' to group features with the same name
     geoboundary = geoboundary.dissolve(by="shapeName").reset_index()
@@ -342,6 +2066,7 @@ def batch_download_sat_images(
     buffer_size: float,
     sum_threshold: float,
     adm_level: str,
+    mosaic: bool = False,
 ) -> None:
     """
     Downloads satellite images for multiple shapes based on generated prediction tiles.
@@ -355,6 +2080,7 @@ def batch_download_sat_images(
         buffer_size (float): Buffer size around each sample point.
         sum_threshold (float): Threshold value for filtering tiles based on building pixel sum.
         adm_level (str): Administrative level for sample generation.
+        mosaic (bool, optional): If True, downloads the images as mosaics. Default is False.
 
     Returns:
         None: This function performs side effects by downloading images and does not return a value.
@@ -381,5 +2107,5 @@ def batch_download_sat_images(
 
         # Download satellite images for the filtered tiles
         sat_download.download_sat_images(
-            sat_creds, sat_config, data=data, out_dir=sat_dir
+            sat_creds, sat_config, data=data, out_dir=sat_dir, mosaic=mosaic
         )